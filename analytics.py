@@ -0,0 +1,120 @@
+"""Study session trends served from day and week rollups.
+
+save_study_session keeps per-user rollups (sessions, score and question
+sums per session type) and the study streak current as it writes, so a
+trend chart reads one row per bucket and type from the rollup primary key
+instead of scanning the session history. Rollups can be rebuilt from
+study_sessions at any time:
+
+    python analytics.py backfill
+    python analytics.py trends alice --period week --start 2024-01-01
+"""
+import argparse
+import sys
+from datetime import date, datetime, timedelta
+
+from database import cached_read, rebuild_session_rollups, transaction, week_start
+from instrumentation import timed
+
+PERIODS = ('day', 'week')
+
+# ------------------- Trends -------------------
+def _buckets(start, end, period):
+    step = timedelta(days=1 if period == 'day' else 7)
+    bucket = date.fromisoformat(start if period == 'day' else week_start(start))
+    last = date.fromisoformat(end)
+    while bucket <= last:
+        yield bucket.isoformat()
+        bucket += step
+
+@timed('analytics.session_trends')
+@cached_read('session_rollups')
+def session_trends(user_id, start, end, period='day', session_type=None):
+    """Sessions, score and question totals per day or week from start to end (ISO dates, inclusive).
+
+    Every bucket in the range is returned, empty ones with zero counts; a
+    week is labelled by its Monday. accuracy is score_sum / question_sum in
+    percent, or None without questions. Cost grows with the number of
+    buckets, not with the number of sessions.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {PERIODS}")
+    if not user_id or start > end:
+        return []
+    query = '''SELECT bucket, SUM(sessions), SUM(score_sum), SUM(question_sum) FROM session_rollups
+               WHERE user_id = ? AND period = ? AND bucket BETWEEN ? AND ?'''
+    params = [user_id, period, start if period == 'day' else week_start(start), end]
+    if session_type is not None:
+        query += ' AND type = ?'
+        params.append(session_type)
+    with transaction() as c:
+        c.execute(query + ' GROUP BY bucket', params)
+        rows = {row[0]: row[1:] for row in c.fetchall()}
+    trends = []
+    for bucket in _buckets(start, end, period):
+        sessions, score_sum, question_sum = rows.get(bucket, (0, 0, 0))
+        trends.append({'bucket': bucket, 'sessions': sessions, 'score_sum': score_sum, 'question_sum': question_sum,
+                       'accuracy': 100.0 * score_sum / question_sum if question_sum else None})
+    return trends
+
+@cached_read('session_rollups')
+def _streak_row(user_id):
+    with transaction() as c:
+        c.execute('SELECT last_day, current_length, longest FROM study_streaks WHERE user_id = ?', (user_id,))
+        return c.fetchone()
+
+def study_streak(user_id, today=None):
+    """Current and longest runs of consecutive study days.
+
+    The current streak still counts when the last session was yesterday;
+    after a missed day it is 0.
+    """
+    streak = {'current': 0, 'longest': 0, 'last_day': None}
+    row = _streak_row(user_id) if user_id else None
+    if row:
+        today = date.fromisoformat(today) if today else datetime.now().date()
+        streak['last_day'], streak['longest'] = row[0], row[2]
+        if (today - date.fromisoformat(row[0])).days <= 1:
+            streak['current'] = row[1]
+    return streak
+
+# ------------------- Command Line -------------------
+def _user_id(username):
+    with transaction() as c:
+        c.execute('SELECT id FROM users WHERE username = ?', (username,))
+        row = c.fetchone()
+    if not row:
+        raise SystemExit(f"unknown user: {username}")
+    return row[0]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Study session rollups and trends")
+    commands = parser.add_subparsers(dest="command", required=True)
+    backfill = commands.add_parser("backfill", help="rebuild rollups and streaks from study_sessions")
+    backfill.add_argument("--user", help="only this username (default: everyone)")
+    trends = commands.add_parser("trends", help="print a user's sessions per day or week")
+    trends.add_argument("username")
+    trends.add_argument("--period", choices=PERIODS, default="week")
+    trends.add_argument("--start", help="ISO date (default: 12 periods ago)")
+    trends.add_argument("--end", help="ISO date (default: today)")
+    trends.add_argument("--type", help="only this session type")
+    args = parser.parse_args(argv)
+
+    if args.command == "backfill":
+        user_id = _user_id(args.user) if args.user else None
+        print(f"rebuilt {rebuild_session_rollups(user_id)} daily buckets", file=sys.stderr)
+        return 0
+
+    user_id = _user_id(args.username)
+    end = args.end or datetime.now().strftime("%Y-%m-%d")
+    start = args.start or (date.fromisoformat(end) - timedelta(days=11 if args.period == 'day' else 77)).isoformat()
+    for bucket in session_trends(user_id, start, end, args.period, args.type):
+        accuracy = f"{bucket['accuracy']:.1f}%" if bucket['accuracy'] is not None else "-"
+        print(f"{bucket['bucket']}  {bucket['sessions']:>4} sessions  "
+              f"{bucket['score_sum']}/{bucket['question_sum']}  {accuracy}")
+    streak = study_streak(user_id)
+    print(f"streak: {streak['current']} days (longest {streak['longest']})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 import streamlit as st
-from database import *
-from utils import *
-from pages import *
+from database import AuthBusyError, authenticate_user, create_user, read_cache
+from instrumentation import stage
+from pages import load_page, menu_pages
 
 def get_user_id():
     """Get current user ID from session state"""
@@ -24,15 +24,19 @@ def show_login_page():
             
             if login_btn:
                 if username and password:
-                    user = authenticate_user(username, password)
-                    if user:
-                        st.session_state.user_id = user['id']
-                        st.session_state.username = user['username']
-                        st.session_state.logged_in = True
-                        st.success(f"Welcome back, {user['username']}!")
-                        st.rerun()
+                    try:
+                        user = authenticate_user(username, password)
+                    except AuthBusyError as e:
+                        st.warning(str(e))
                     else:
-                        st.error("Invalid username or password")
+                        if user:
+                            st.session_state.user_id = user['id']
+                            st.session_state.username = user['username']
+                            st.session_state.logged_in = True
+                            st.success(f"Welcome back, {user['username']}!")
+                            st.rerun()
+                        else:
+                            st.error("Invalid username or password")
                 else:
                     st.warning("Please enter both username and password")
     
@@ -51,16 +55,21 @@ def show_login_page():
                     elif len(new_password) < 6:
                         st.error("Password must be at least 6 characters long")
                     else:
-                        if create_user(new_username, email, new_password):
-                            st.success("Account created successfully! Please login.")
-                        else:
-                            st.error("Username or email already exists")
+                        try:
+                            if create_user(new_username, email, new_password):
+                                st.success("Account created successfully! Please login.")
+                            else:
+                                st.error("Username or email already exists")
+                        except AuthBusyError as e:
+                            st.warning(str(e))
                 else:
                     st.warning("Please fill in all fields")
 
 def show_main_app():
     st.set_page_config(page_title="Smart Study Buddy", page_icon="📚", layout="wide")
     st.title(f"📚 Smart Study Buddy - Welcome {get_username()}!")
+    from jobs import ensure_worker_pool
+    ensure_worker_pool()  # also resumes jobs queued before a restart
     
     if 'current_note_id' not in st.session_state:
         st.session_state.current_note_id = None
@@ -69,29 +78,28 @@ def show_main_app():
     if 'current_note_content' not in st.session_state:
         st.session_state.current_note_content = ""
 
-    menu = st.sidebar.radio("Menu", ["Learn & Summarize", "My Notes", "Study Goals", "Progress", "Study Tips"])
+    menu = st.sidebar.radio("Menu", menu_pages(get_username()))
+    review = st.session_state.get('review_session')
+    if menu != "Review" and review and review.pending:
+        review.flush()  # grades not yet written in a batch; the sitting goes on if they come back
     
     st.sidebar.markdown("---")
     st.sidebar.write(f"**Logged in as:** {get_username()}")
     if st.sidebar.button("🚪 Logout"):
+        review = st.session_state.get('review_session')
+        if review:
+            review.finish()  # grades not yet written in a batch
+        read_cache.invalidate(get_user_id())
         for key in list(st.session_state.keys()):
             del st.session_state[key]
         st.rerun()
 
-    if menu == "Learn & Summarize":
-        show_learn_summarize_page()
-    elif menu == "My Notes":
-        show_notes_page()
-    elif menu == "Study Goals":
-        show_goals_page()
-    elif menu == "Progress":
-        show_progress_page()
-    elif menu == "Study Tips":
-        show_tips_page()
+    load_page(menu)()
 
 def main():
     if not st.session_state.get('logged_in'):
-        show_login_page()
+        with stage('startup.login_page'):
+            show_login_page()
     else:
         show_main_app()
 
@@ -0,0 +1,103 @@
+"""Batch summarization over a process pool.
+
+Tokenizing and tagging are CPU-bound and hold the GIL, so whole documents
+are spread across worker processes. Each worker loads the NLTK models once
+at start-up; results are yielded in input order as soon as they are ready,
+and a failing document only produces an error entry for itself.
+
+    python batch.py chapter1.txt chapter2.txt --points 5 --workers 4
+"""
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from utils import generate_smart_summary
+
+def _warm_up():
+    """Worker initializer: load tokenizer, tagger and stopwords once per process"""
+    from nlp_resources import pos_tag, stopword_set, word_tokenize
+    try:
+        pos_tag(word_tokenize("Warm up the models."))
+        stopword_set()
+    except LookupError:
+        pass  # summaries fall back to the regex heuristics
+
+def _summarize_one(index, text, num_points):
+    if isinstance(text, Exception):
+        return {'index': index, 'points': None, 'error': f"{type(text).__name__}: {text}"}
+    if not isinstance(text, str):
+        return {'index': index, 'points': None, 'error': f"expected text, got {type(text).__name__}"}
+    try:
+        return {'index': index, 'points': generate_smart_summary(text, num_points), 'error': None}
+    except Exception as e:
+        return {'index': index, 'points': None, 'error': f"{type(e).__name__}: {e}"}
+
+def summarize_batch(texts, num_points=5, workers=None):
+    """Summarize many documents in parallel, yielding one result dict per text in order.
+
+    Each result has 'index', 'points' and 'error' (None on success). At most
+    two documents per worker are in flight, so texts may be a lazy iterable.
+    workers=1 summarizes in the calling process.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _warm_up()
+        for index, text in enumerate(texts):
+            yield _summarize_one(index, text, num_points)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_up) as executor:
+        documents = enumerate(texts)
+        pending = deque()
+
+        def submit_next():
+            document = next(documents, None)
+            if document is not None:
+                index, text = document
+                pending.append((index, executor.submit(_summarize_one, index, text, num_points)))
+
+        for _ in range(workers * 2):
+            submit_next()
+        while pending:
+            index, future = pending.popleft()
+            try:
+                result = future.result()
+            except Exception as e:  # e.g. the worker process died
+                result = {'index': index, 'points': None, 'error': f"{type(e).__name__}: {e}"}
+            submit_next()
+            yield result
+
+def _read_text(path):
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            return f.read()
+    except OSError as e:
+        return e
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize many text files in parallel")
+    parser.add_argument("files", nargs="+", help=".txt or .md files to summarize")
+    parser.add_argument("--points", type=int, default=5, help="key points per document")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per line")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    texts = (_read_text(path) for path in args.files)
+    for result in summarize_batch(texts, args.points, args.workers):
+        path = args.files[result['index']]
+        failures += result['error'] is not None
+        if args.json:
+            print(json.dumps({'file': path, **result}), flush=True)
+        elif result['error']:
+            print(f"== {path} ==\nerror: {result['error']}\n", flush=True)
+        else:
+            points = "\n".join(f"{i}. {point}" for i, point in enumerate(result['points'], 1))
+            print(f"== {path} ==\n{points}\n", flush=True)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
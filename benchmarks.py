@@ -0,0 +1,1072 @@
+"""Offline benchmarks for Smart Study Buddy.
+
+Run with ``python benchmarks.py <name>``; without a name every benchmark runs.
+Everything is generated from fixed seeds, so runs on the same machine are
+comparable:
+
+    python benchmarks.py --quick --output before.json
+    python benchmarks.py --quick --output after.json
+    python benchmarks.py --compare before.json after.json --threshold 10
+
+``--generate-corpus DIR`` and ``--generate-db PATH`` write the synthetic
+texts and multi-user database used here for manual testing.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# ------------------- Synthetic Corpus -------------------
+WORDS = ("cell energy protein membrane nucleus enzyme reaction molecule gene structure "
+         "process system function theory model data result method analysis student "
+         "the of and to in is that for with as on by").split()
+INDICATORS = ["important", "key", "main", "essential", "fundamental"]
+
+def synthetic_text(size_bytes, seed=42):
+    """Deterministic study-material-like text of roughly size_bytes characters"""
+    rnd = random.Random(seed)
+    sentences = []
+    total = 0
+    while total < size_bytes:
+        words = [rnd.choice(WORDS) for _ in range(rnd.randint(5, 25))]
+        if rnd.random() < 0.1:
+            words.insert(rnd.randrange(len(words)), rnd.choice(INDICATORS))
+        words[0] = words[0].capitalize()
+        sentence = " ".join(words) + rnd.choice([".", ".", ".", "!", "?"])
+        sentences.append(sentence)
+        total += len(sentence) + 1
+    return " ".join(sentences)
+
+def synthetic_paragraph(rnd):
+    """A few sentences over the Zipf-weighted VOCABULARY"""
+    return " ".join(synthetic_note(rnd, rnd.randint(5, 25)).capitalize() + rnd.choice([".", ".", "!", "?"])
+                    for _ in range(rnd.randint(3, 8)))
+
+def synthetic_paragraphs(pages, seed=42, page_chars=3_000):
+    """Deterministic multi-paragraph note of roughly pages pages"""
+    rnd = random.Random(seed)
+    paragraphs = []
+    total = 0
+    while total < pages * page_chars:
+        paragraphs.append(synthetic_paragraph(rnd))
+        total += len(paragraphs[-1]) + 2
+    return paragraphs
+
+# Approximate sizes of the kinds of text people summarize, in characters
+CORPUS_SIZES = {"note": 500, "summary": 5_000, "article": 50_000, "chapter": 500_000, "book": 5_000_000}
+
+def write_corpus(directory, seed=42):
+    """Write one synthetic text per CORPUS_SIZES kind to directory"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for kind, size in CORPUS_SIZES.items():
+        path = os.path.join(directory, f"{kind}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(synthetic_text(size, seed))
+        paths.append(path)
+    return paths
+
+def _timed(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+# ------------------- Results -------------------
+_results = {}
+_current_benchmark = None
+
+def report(metric, value, unit, higher_is_better=False):
+    """Record one number of the running benchmark for --output and --compare"""
+    _results.setdefault(_current_benchmark or "adhoc", {})[metric] = {
+        'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+# ------------------- Benchmarks -------------------
+def bench_scoring(sizes=(1_000, 10_000, 100_000, 1_000_000, 5_000_000)):
+    """identify_main_points and create_basic_summary latency from 1 KB to 5 MB; flat us/KB means linear scaling"""
+    from utils import create_basic_summary, identify_main_points, summary_cache
+
+    def uncached(text):
+        summary_cache.clear()
+        identify_main_points(text, 5)
+
+    print(f"{'size':>10} {'seconds':>10} {'us/KB':>10} {'basic s':>10}")
+    for size in sizes:
+        text = synthetic_text(size)
+        repeat = 1 if size >= 1_000_000 else 3
+        elapsed = _timed(uncached, text, repeat=repeat)
+        basic = _timed(create_basic_summary, text, repeat=repeat)
+        print(f"{size:>10} {elapsed:>10.4f} {elapsed * 1e6 / (size / 1000):>10.1f} {basic:>10.4f}")
+        report(f"identify_main_points_{size}", elapsed, "s")
+        report(f"create_basic_summary_{size}", basic, "s")
+
+def bench_concepts(sizes=(10_000, 100_000, 1_000_000)):
+    """Concept extraction and full scoring: POS tagger vs. TF-IDF, plus a TF-IDF determinism check"""
+    from utils import extract_key_concepts, scored_analysis, summary_cache
+
+    def score(text, method):
+        summary_cache.clear()
+        scored_analysis(text, method)
+
+    try:
+        from nlp_resources import pos_tag
+        pos_tag(["warm", "up"])
+    except LookupError:
+        print("NLTK data missing: the tagger rows measure the regex fallback")
+    print(f"{'size':>10} {'method':>8} {'concepts s':>12} {'scoring s':>12}")
+    for size in sizes:
+        text = synthetic_text(size)
+        for method in ("tagger", "tfidf"):
+            repeat = 1 if size >= 1_000_000 else 3
+            concepts = _timed(extract_key_concepts, text, method, repeat=repeat)
+            scoring = _timed(score, text, method, repeat=repeat)
+            print(f"{size:>10} {method:>8} {concepts:>12.4f} {scoring:>12.4f}")
+            report(f"{method}_concepts_{size}", concepts, "s")
+            report(f"{method}_scoring_{size}", scoring, "s")
+        first = extract_key_concepts(text, "tfidf")
+        print(f"{'':>10} tfidf concepts identical across runs: {first == extract_key_concepts(text, 'tfidf')}")
+
+def _legacy_simplify_sentence(sentence):
+    simplified = re.sub(r'[,;].*?(?=\.|$)', '', sentence)
+    simplified = re.sub(r'\(.*?\)', '', simplified)
+    simplified = re.sub(r'\b(however|although|despite|nevertheless|furthermore|moreover)\b', '', simplified,
+                        flags=re.IGNORECASE)
+    simplified = re.sub(r'\b(is|are|was|were)\s+able to\b', 'can', simplified, flags=re.IGNORECASE)
+    simplified = re.sub(r'\b(utilize|utilizes|utilized)\b', 'use', simplified, flags=re.IGNORECASE)
+    simplified = re.sub(r'\b(approximately|roughly|about)\b', '~', simplified, flags=re.IGNORECASE)
+    return re.sub(r'\s+', ' ', simplified).strip()
+
+def bench_simplify(sentences=1_000_000):
+    """simplify_sentence throughput vs. the previous seven re.sub calls, checking identical output"""
+    from utils import simplify_sentence
+
+    rnd = random.Random(11)
+    extras = ["however", "about", "utilizes", "(see figure 2)", ", which is common", "was able to"]
+    corpus = []
+    for _ in range(sentences):
+        words = [rnd.choice(WORDS) for _ in range(rnd.randint(6, 20))]
+        words.insert(rnd.randrange(len(words)), rnd.choice(extras))
+        corpus.append(" ".join(words))
+
+    results = {}
+    for label, func in (("seven re.sub", _legacy_simplify_sentence), ("compiled rules", simplify_sentence)):
+        start = time.perf_counter()
+        results[label] = [func(sentence) for sentence in corpus]
+        elapsed = time.perf_counter() - start
+        print(f"{label:<16} {sentences / elapsed:>12.0f} sentences/s")
+        report(label.replace(" ", "_"), sentences / elapsed, "sentences/s", higher_is_better=True)
+    print("identical output:", results["seven re.sub"] == results["compiled rules"])
+
+def bench_startup(runs=5):
+    """Cold import time of utils, time to first summary and app cold start, each in a fresh interpreter"""
+    script = ("import time; t0 = time.perf_counter(); import utils; t1 = time.perf_counter(); "
+              "utils.generate_smart_summary(%r, 5); t2 = time.perf_counter(); "
+              "print(t1 - t0, t2 - t0)") % synthetic_text(5_000)
+    imports, firsts = [], []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        import_time, first_summary = map(float, out.stdout.split())
+        imports.append(import_time)
+        firsts.append(first_summary)
+    print(f"import utils:        {min(imports):.4f}s (best of {runs})")
+    print(f"time to 1st summary: {min(firsts):.4f}s (best of {runs})")
+    report("import_utils", min(imports), "s")
+    report("first_summary", min(firsts), "s")
+
+    from startup import COLD_START_LABELS, cold_start, import_times
+
+    login_imports = import_times("app")["app"]
+    print(f"import app (login):  {login_imports['ms'] / 1e3:.4f}s")
+    report("import_app", login_imports['ms'] / 1e3, "s")
+    for name, seconds in cold_start(runs).items():
+        print(f"{COLD_START_LABELS.get(name, name) + ':':<21}{seconds:.4f}s (best of {runs})")
+        report("cold_start." + name.lower().replace(" & ", "_").replace(" ", "_"), seconds, "s")
+
+def bench_summary_cache(size=200_000):
+    """Cold analysis vs. cache hits when only num_points changes"""
+    from utils import identify_main_points, summary_cache
+
+    text = synthetic_text(size)
+    summary_cache.clear()
+    start = time.perf_counter()
+    identify_main_points(text, 5)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    for num_points in range(3, 11):
+        identify_main_points(text, num_points)
+    warm = (time.perf_counter() - start) / 8
+    print(f"cold analysis  {cold * 1e3:>10.2f} ms")
+    print(f"cached slider  {warm * 1e3:>10.2f} ms")
+    report("cold_analysis", cold * 1e3, "ms")
+    report("cached_slider", warm * 1e3, "ms")
+    print(summary_cache.stats())
+
+def bench_streaming(sizes=(1_000_000, 10_000_000, 50_000_000)):
+    """Peak traced memory of summarize_stream vs. generate_smart_summary as input grows"""
+    from streaming import summarize_stream
+    from utils import generate_smart_summary, summary_cache
+
+    tmpdir = tempfile.mkdtemp(prefix="ssb-bench-")
+    print(f"{'size':>10} {'stream s':>10} {'stream MB':>10} {'in-mem MB':>10}")
+    for size in sizes:
+        path = os.path.join(tmpdir, f"doc-{size}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(synthetic_text(size))
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        summarize_stream(path, 5)
+        elapsed = time.perf_counter() - start
+        stream_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        in_memory_peak = float("nan")
+        if size <= 10_000_000:
+            summary_cache.clear()
+            tracemalloc.start()
+            with open(path, encoding="utf-8") as f:
+                generate_smart_summary(f.read(), 5)
+            in_memory_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        print(f"{size:>10} {elapsed:>10.2f} {stream_peak / 2**20:>10.1f} {in_memory_peak / 2**20:>10.1f}")
+        report(f"stream_seconds_{size}", elapsed, "s")
+        report(f"stream_peak_{size}", stream_peak / 2**20, "MB")
+
+def bench_segmenter(sizes=(1_000_000, 5_000_000)):
+    """Sentence splitting: re.split + strip copies vs. segmenter offsets on str and on an mmap.
+
+    re.split runs its whole loop in C, so it splits faster than the offsets
+    loop; the last columns put that difference next to an uncached summary of
+    the same text, whose cost is what the app pays.
+    """
+    from segmenter import mapped_file, sentence_spans
+    from utils import identify_main_points, summary_cache
+
+    def split_copies(text):
+        return [s.strip() for s in re.split(r'[.!?]', text) if len(s.strip()) > 20]
+
+    def uncached_summary(text):
+        summary_cache.clear()
+        identify_main_points(text, 5)
+
+    def traced(func, *args):
+        tracemalloc.start()
+        result = func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result, peak
+
+    tmpdir = tempfile.mkdtemp(prefix="ssb-bench-")
+    print(f"{'size':>10} {'split MB/s':>11} {'spans MB/s':>11} {'mmap MB/s':>10} "
+          f"{'split objs':>11} {'split peak':>11} {'spans peak':>11} {'summary s':>10} {'gap/sum':>10}")
+    for size in sizes:
+        text = synthetic_text(size)
+        path = os.path.join(tmpdir, f"doc-{size}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        mb = len(text) / 2**20
+        split_seconds = _timed(split_copies, text)
+        spans_seconds = _timed(sentence_spans, text, 20)
+        with mapped_file(path) as mapped:
+            mmap_seconds = _timed(sentence_spans, mapped, 20)
+        # Every fragment re.split returns is a new string, and strip() copies each one twice more
+        fragments = len(re.split(r'[.!?]', text))
+        _, split_peak = traced(split_copies, text)
+        _, spans_peak = traced(sentence_spans, text, 20)
+        summary_seconds = _timed(uncached_summary, text, repeat=1)
+        # Time the spans loop adds over re.split, as a share of the whole summary
+        overhead = (spans_seconds - split_seconds) / summary_seconds
+        print(f"{size:>10} {mb / split_seconds:>11.1f} {mb / spans_seconds:>11.1f} {mb / mmap_seconds:>10.1f} "
+              f"{fragments * 3:>11} {split_peak / 2**20:>9.2f}MB {spans_peak / 2**20:>9.2f}MB "
+              f"{summary_seconds:>10.2f} {overhead:>+10.1%}")
+        report(f"split_mb_per_s_{size}", mb / split_seconds, "MB/s", higher_is_better=True)
+        report(f"spans_mb_per_s_{size}", mb / spans_seconds, "MB/s", higher_is_better=True)
+        report(f"spans_mmap_mb_per_s_{size}", mb / mmap_seconds, "MB/s", higher_is_better=True)
+        report(f"split_peak_{size}", split_peak / 2**20, "MB")
+        report(f"spans_peak_{size}", spans_peak / 2**20, "MB")
+        report(f"summary_seconds_{size}", summary_seconds, "s")
+
+def bench_batch(documents=32, size=100_000):
+    """summarize_batch wall time and speedup from 1 worker up to the CPU count"""
+    from batch import summarize_batch
+
+    texts = [synthetic_text(size, seed=seed) for seed in range(documents)]
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+    baseline = None
+    print(f"{'workers':>8} {'seconds':>10} {'speedup':>8}")
+    for workers in worker_counts:
+        start = time.perf_counter()
+        results = list(summarize_batch(texts, 5, workers=workers))
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        assert not any(result['error'] for result in results)
+        print(f"{workers:>8} {elapsed:>10.2f} {baseline / elapsed:>8.2f}")
+        report(f"workers_{workers}", elapsed, "s")
+
+def _use_temp_database():
+    """Point database.py at a fresh file in a temporary directory"""
+    import database
+
+    tmpdir = tempfile.mkdtemp(prefix="ssb-bench-")
+    database.close_connections()
+    database.DB_FILE = os.path.join(tmpdir, "bench.db")
+    database.init_db()
+    return database
+
+def _run_concurrently(worker, threads):
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - start
+
+def bench_db_connections(threads=8, ops_per_thread=500):
+    """ops/sec of pooled transactions vs. a fresh sqlite3.connect per call, under concurrent sessions"""
+    insert = 'INSERT INTO study_goals (user_id, goal, created_date, completed) VALUES (?, ?, ?, ?)'
+    select = "SELECT * FROM study_goals WHERE user_id = ?"
+
+    def connect_per_call(user_id):
+        for i in range(ops_per_thread):
+            conn = sqlite3.connect(database.DB_FILE, timeout=30)
+            c = conn.cursor()
+            if i % 4 == 0:
+                c.execute(insert, (user_id + 1, f"goal {i}", "2024-01-01", False))
+                conn.commit()
+            else:
+                c.execute(select, (user_id + 1,))
+                c.fetchall()
+            conn.close()
+
+    def pooled(user_id):
+        for i in range(ops_per_thread):
+            with database.transaction() as c:
+                if i % 4 == 0:
+                    c.execute(insert, (user_id + 1, f"goal {i}", "2024-01-01", False))
+                else:
+                    c.execute(select, (user_id + 1,))
+                    c.fetchall()
+
+    total = threads * ops_per_thread
+    for label, worker in (("connect per call", connect_per_call), ("pooled", pooled)):
+        database = _use_temp_database()
+        elapsed = _run_concurrently(worker, threads)
+        print(f"{label:<18} {total / elapsed:>10.0f} ops/s ({threads} threads, 25% writes)")
+        report(label.replace(" ", "_"), total / elapsed, "ops/s", higher_is_better=True)
+
+# Zipf-weighted vocabulary so search terms range from very common to rare
+VOCABULARY = WORDS + [a + b + c for a in ("ka", "lo", "mi", "ne", "su", "ta", "ri", "vo")
+                      for b in ("ber", "cal", "dor", "fen", "gil", "hum", "jas", "kor")
+                      for c in ("ade", "ine", "ium", "oid", "ase", "ent", "ory", "ism")]
+VOCABULARY_WEIGHTS = [1 / rank for rank in range(1, len(VOCABULARY) + 1)]
+
+def synthetic_note(rnd, words=30):
+    return " ".join(rnd.choices(VOCABULARY, VOCABULARY_WEIGHTS, k=words))
+
+def populate_users(database, users, notes_per_user=5, goals_per_user=5, sessions_per_user=0, seed=7):
+    """Fill the database with a deterministic multi-user dataset"""
+    rnd = random.Random(seed)
+    note_rows, goal_rows, session_rows = [], [], []
+    for user_id in range(1, users + 1):
+        for n in range(notes_per_user):
+            stamp = f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d} {rnd.randint(0, 23):02d}:00:00"
+            note_rows.append((user_id, f"Topic {synthetic_note(rnd, 3)}", synthetic_note(rnd), stamp, stamp))
+        for g in range(goals_per_user):
+            goal_rows.append((user_id, f"Goal {g}", "2024-01-01", rnd.random() < 0.5))
+        for _ in range(sessions_per_user):
+            total = rnd.randint(5, 20)
+            session_rows.append((user_id, rnd.randint(0, total), total,
+                                 f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}", "quiz"))
+    with database.transaction() as c:
+        c.executemany('INSERT INTO users (id, username, email, password_hash, created_date) VALUES (?, ?, ?, ?, ?)',
+                      ((u, f"user{u}", f"user{u}@example.com", "x", "2024-01-01") for u in range(1, users + 1)))
+        c.executemany('INSERT INTO personal_notes (user_id, topic, content, created_date, last_modified) '
+                      'VALUES (?, ?, ?, ?, ?)', note_rows)
+        c.executemany('INSERT INTO study_goals (user_id, goal, created_date, completed) VALUES (?, ?, ?, ?)',
+                      goal_rows)
+        c.executemany('INSERT INTO study_sessions (user_id, score, total_questions, date, type) '
+                      'VALUES (?, ?, ?, ?, ?)', session_rows)
+
+def bench_per_user_queries(user_counts=(1_000, 10_000, 100_000), samples=200):
+    """Per-user page query latency as the total user base grows; flat means index-backed"""
+    print(f"{'users':>8} {'notes us':>10} {'goals us':>10}")
+    for users in user_counts:
+        database = _use_temp_database()
+        populate_users(database, users)
+        rnd = random.Random(users)
+        sample = [rnd.randint(1, users) for _ in range(samples)]
+        notes = _timed(lambda: [database.load_personal_notes.uncached(u) for u in sample])
+        goals = _timed(lambda: [database.load_study_goals.uncached(u) for u in sample])
+        print(f"{users:>8} {notes * 1e6 / samples:>10.1f} {goals * 1e6 / samples:>10.1f}")
+        report(f"notes_{users}_users", notes * 1e6 / samples, "us")
+        report(f"goals_{users}_users", goals * 1e6 / samples, "us")
+
+def bench_note_search(users=100_000, notes_per_user=10, heavy_notes=20_000, samples=100):
+    """FTS5 search_personal_notes vs. a naive LIKE '%q%' scan over ~1M notes.
+
+    Measured both for typical users and for one heavy user with heavy_notes
+    notes, where a LIKE scan has to read every note the user owns.
+    """
+    database = _use_temp_database()
+    start = time.perf_counter()
+    populate_users(database, users, notes_per_user=notes_per_user, goals_per_user=0)
+    heavy_user = users + 1
+    rnd = random.Random(5)
+    with database.transaction() as c:
+        c.executemany('INSERT INTO personal_notes (user_id, topic, content, created_date, last_modified) '
+                      'VALUES (?, ?, ?, ?, ?)',
+                      ((heavy_user, synthetic_note(rnd, 3), synthetic_note(rnd, 200), "2024-01-01 00:00:00",
+                        "2024-01-01 00:00:00") for _ in range(heavy_notes)))
+    print(f"indexed {users * notes_per_user + heavy_notes} notes in {time.perf_counter() - start:.1f}s")
+
+    rnd = random.Random(3)
+    terms = [rnd.choice(VOCABULARY[100:]) for _ in range(samples)]
+    typical_users = [rnd.randint(1, users) for _ in range(samples)]
+
+    def like_scan(user_ids):
+        with database.transaction() as c:
+            for user_id, term in zip(user_ids, terms):
+                # Reads every matching note, as ranking results without an index must
+                c.execute("SELECT id, topic, content FROM personal_notes "
+                          "WHERE user_id = ? AND (topic LIKE ? OR content LIKE ?)", (user_id, f"%{term}%", f"%{term}%"))
+                c.fetchall()
+
+    def fts(user_ids):
+        for user_id, term in zip(user_ids, terms):
+            database.search_personal_notes.uncached(user_id, term)
+
+    print(f"{'':<14} {'fts5 ms':>10} {'LIKE ms':>10}")
+    for label, user_ids in (("typical user", typical_users), ("heavy user", [heavy_user] * samples)):
+        fts_time = _timed(fts, user_ids)
+        like_time = _timed(like_scan, user_ids)
+        print(f"{label:<14} {fts_time * 1e3 / samples:>10.3f} {like_time * 1e3 / samples:>10.3f}")
+        report(f"fts5_{label.replace(' ', '_')}", fts_time * 1e3 / samples, "ms")
+        report(f"like_{label.replace(' ', '_')}", like_time * 1e3 / samples, "ms")
+
+def bench_similarity(sizes=(10_000, 100_000, 1_000_000), samples=50, threshold=0.5):
+    """MinHash/LSH indexing rate, find_similar_notes latency as one user's notes grow, recall vs. exact Jaccard.
+
+    Every 100th note is followed by three edited copies (5, 15 and 30% of its
+    words replaced). A sampled original's true neighbours are the copies whose
+    exact Jaccard similarity reaches threshold; unrelated notes stay far below
+    it (their highest similarity to the samples is reported as a check).
+    """
+    import bulk
+    from similarity import find_similar_notes, jaccard, signature
+
+    database = _use_temp_database()
+    rnd = random.Random(11)
+    edit_rates = (0.05, 0.15, 0.3)
+    clusters = {}  # original id -> (text, [(copy id, copy text)]), for the sampled originals
+    background = []
+
+    def notes():
+        note_id = 0
+        while True:
+            note_id += 1
+            text = synthetic_note(rnd, 40)
+            yield {'topic': f"Note {note_id}", 'content': text}
+            if note_id % 100:
+                if len(background) < 1_000:
+                    background.append(text)
+                continue
+            original, copies = note_id, []
+            for rate in edit_rates:
+                note_id += 1
+                copy = " ".join(rnd.choice(VOCABULARY) if rnd.random() < rate else word for word in text.split())
+                copies.append((note_id, copy))
+                yield {'topic': f"Note {note_id}", 'content': copy}
+            if len(clusters) < samples:
+                clusters[original] = (text, copies)
+
+    sample_texts = [synthetic_note(random.Random(seed), 40) for seed in range(2_000)]
+    sign_seconds = _timed(lambda: [signature(text) for text in sample_texts])
+    print(f"signature(): {len(sample_texts) / sign_seconds:,.0f} notes/s")
+    report("signatures_per_s", len(sample_texts) / sign_seconds, "notes/s", higher_is_better=True)
+
+    stream = notes()
+    indexed = 0
+    print(f"{'notes':>10} {'import notes/s':>15} {'query ms':>10} {'recall':>8} {'max unrelated':>14}")
+    for size in sizes:
+        start = time.perf_counter()
+        bulk.import_notes(1, itertools.islice(stream, size - indexed))
+        rate = (size - indexed) / (time.perf_counter() - start)
+        indexed = size
+        truths = {original: {copy_id for copy_id, copy in copies if jaccard(text, copy) >= threshold}
+                  for original, (text, copies) in clusters.items()}
+        start = time.perf_counter()
+        results = {original: {note['id'] for note in find_similar_notes.uncached(1, original, 10, 0.0)}
+                   for original in clusters}
+        query_ms = (time.perf_counter() - start) * 1e3 / max(len(clusters), 1)
+        found = sum(len(truth & results[original]) for original, truth in truths.items())
+        expected = sum(len(truth) for truth in truths.values())
+        unrelated = max(jaccard(text, other) for text, _ in list(clusters.values())[:5] for other in background)
+        print(f"{size:>10} {rate:>15,.0f} {query_ms:>10.2f} {found / max(expected, 1):>8.3f} {unrelated:>14.3f}")
+        report(f"import_notes_per_s_{size}", rate, "notes/s", higher_is_better=True)
+        report(f"similar_query_ms_{size}", query_ms, "ms")
+        report(f"similar_recall_{size}", found / max(expected, 1), "ratio", higher_is_better=True)
+
+def bench_login_burst(logins=500, users=50, rounds=10):
+    """Latency percentiles, throughput and rejections for a burst of concurrent logins"""
+    database = _use_temp_database()
+    database.BCRYPT_ROUNDS = rounds
+    for u in range(users):
+        database.create_user(f"user{u}", f"user{u}@example.com", "secret123")
+
+    latencies, busy = [], []
+    lock = threading.Lock()
+
+    def login(i):
+        start = time.perf_counter()
+        try:
+            ok = database.authenticate_user(f"user{i % users}", "secret123") is not None
+        except database.AuthBusyError:
+            ok = None
+        elapsed = time.perf_counter() - start
+        with lock:
+            (latencies if ok else busy).append(elapsed)
+
+    elapsed = _run_concurrently(login, logins)
+    latencies.sort()
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"accepted {len(latencies)}  p50 {p50 * 1e3:.1f} ms  p99 {p99 * 1e3:.1f} ms")
+        report("p50", p50 * 1e3, "ms")
+        report("p99", p99 * 1e3, "ms")
+    print(f"rejected {len(busy)} (AuthBusyError, answered in "
+          f"{max(busy, default=0) * 1e3:.1f} ms max)")
+    print(f"throughput {len(latencies) / elapsed:.1f} logins/s over {elapsed:.2f}s "
+          f"({database.HASH_WORKERS} hash workers, queue {database.HASH_QUEUE_LIMIT})")
+    report("throughput", len(latencies) / elapsed, "logins/s", higher_is_better=True)
+
+def bench_idle_reruns(notes=50, goals=20, reruns=20):
+    """SQL statements per Streamlit rerun of each page: first visit vs. idle reruns (read cache)"""
+    from streamlit.testing.v1 import AppTest
+    import jobs
+
+    jobs.JOB_WORKERS = 0  # keep the job queue poller out of the statement counts
+    database = _use_temp_database()
+    database.BCRYPT_ROUNDS = 4
+    database.create_user("bench", "bench@example.com", "bench-password")
+    user_id = database.authenticate_user("bench", "bench-password")['id']
+    rnd = random.Random(1)
+    for _ in range(notes):
+        database.save_personal_note(synthetic_note(rnd, 3), synthetic_note(rnd, 80), user_id)
+    for _ in range(goals):
+        database.add_study_goal(synthetic_note(rnd, 5), user_id)
+
+    app = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"),
+                            default_timeout=60)
+    app.session_state.user_id = user_id
+    app.session_state.username = "bench"
+    app.session_state.logged_in = True
+    app.run()
+    print(f"{'page':<18} {'first visit':>12} {'per idle rerun':>15}")
+    for page in ["My Notes", "Study Goals", "Progress"]:
+        database.read_cache.clear()
+        before = database.query_count()
+        app.sidebar.radio[0].set_value(page).run()
+        first = database.query_count() - before
+        before = database.query_count()
+        for _ in range(reruns):
+            app.run()
+        idle = (database.query_count() - before) / reruns
+        print(f"{page:<18} {first:>12} {idle:>15.1f}")
+        report(f"idle_statements_{page.lower().replace(' ', '_')}", idle, "statements")
+    print("read cache:", database.read_cache.stats())
+
+def bench_instrumentation(calls=1_000_000):
+    """Per-call overhead of @timed and stage() while disabled and enabled, vs. a bare call"""
+    import instrumentation
+
+    def bare():
+        pass
+
+    wrapped = instrumentation.timed("bench.noop")(bare)
+
+    def with_stage():
+        with instrumentation.stage("bench.stage"):
+            pass
+
+    variants = [("bare call", None, bare)]
+    for enabled in (False, True):
+        state = "enabled" if enabled else "disabled"
+        variants += [(f"@timed {state}", enabled, wrapped), (f"stage() {state}", enabled, with_stage)]
+
+    was_enabled = instrumentation.is_enabled()
+    try:
+        print(f"{'variant':<20} {'ns/call':>10}")
+        for label, enabled, func in variants:
+            instrumentation.enable() if enabled else instrumentation.disable()
+            elapsed = _timed(lambda: [func() for _ in range(calls)])
+            print(f"{label:<20} {elapsed * 1e9 / calls:>10.0f}")
+            report(re.sub(r"\W+", "_", label).strip("_"), elapsed * 1e9 / calls, "ns")
+    finally:
+        instrumentation.enable() if was_enabled else instrumentation.disable()
+        instrumentation.reset()
+
+def bench_page_loads(users=10_000, samples=500):
+    """Uncached data loading per page for random users of a multi-user database"""
+    database = _use_temp_database()
+    populate_users(database, users, notes_per_user=20, goals_per_user=10, sessions_per_user=20)
+    rnd = random.Random(users)
+    sample = [rnd.randint(1, users) for _ in range(samples)]
+    terms = [rnd.choice(VOCABULARY[:50]) for _ in range(samples)]
+    pages = {
+        "my_notes": lambda: [database.list_personal_notes.uncached(u) for u in sample],
+        "note_search": lambda: [database.search_personal_notes.uncached(u, t) for u, t in zip(sample, terms)],
+        "study_goals": lambda: [database.load_study_goals.uncached(u) for u in sample],
+        "progress": lambda: [(database.get_progress_stats.uncached(u), database.load_study_goals.uncached(u))
+                             for u in sample],
+    }
+    print(f"{'page':<14} {'ms/load':>10}")
+    for page, load in pages.items():
+        elapsed = _timed(load) * 1e3 / samples
+        print(f"{page:<14} {elapsed:>10.3f}")
+        report(f"{page}_ms", elapsed, "ms")
+
+def bench_writes(users=1_000, ops=2_000):
+    """Single-session throughput of the write functions, including read-cache invalidation"""
+    database = _use_temp_database()
+    populate_users(database, users)
+    rnd = random.Random(2)
+    user_ids = [rnd.randint(1, users) for _ in range(ops)]
+    with database.transaction() as c:
+        c.execute('SELECT id, user_id FROM study_goals ORDER BY id LIMIT ?', (ops,))
+        goals = c.fetchall()
+        c.execute('SELECT id, user_id FROM personal_notes ORDER BY id LIMIT ?', (ops,))
+        notes = c.fetchall()
+    writes = {
+        "add_study_goal": lambda: [database.add_study_goal(f"Goal {i}", u) for i, u in enumerate(user_ids)],
+        "mark_goal_complete": lambda: [database.mark_goal_complete(g, u) for g, u in goals],
+        "save_personal_note": lambda: [database.save_personal_note("Topic", synthetic_note(rnd), u)
+                                       for u in user_ids],
+        "update_personal_note": lambda: [database.update_personal_note(n, "Topic", synthetic_note(rnd), u)
+                                         for n, u in notes],
+        "save_study_session": lambda: [database.save_study_session(7, 10, "quiz", u) for u in user_ids],
+    }
+    print(f"{'write':<22} {'ops/s':>10}")
+    for label, write in writes.items():
+        count = len(goals) if label == "mark_goal_complete" else len(notes) if label == "update_personal_note" else ops
+        rate = count / _timed(write, repeat=1)
+        print(f"{label:<22} {rate:>10.0f}")
+        report(f"{label}_ops", rate, "ops/s", higher_is_better=True)
+
+def bench_bulk_import(rows=(10_000, 100_000), single_rows=2_000):
+    """import_notes/import_goals rows/s and peak memory vs. one save_personal_note call per row.
+
+    The similarity indexing that follows a notes import is timed on its own.
+    """
+    import bulk
+    from similarity import backfill
+
+    database = _use_temp_database()
+    rnd = random.Random(4)
+    start = time.perf_counter()
+    for _ in range(single_rows):
+        database.save_personal_note("Topic", synthetic_note(rnd), 1)
+    single = single_rows / (time.perf_counter() - start)
+    print(f"save_personal_note per row  {single:>10.0f} rows/s")
+    report("save_personal_note_rows", single, "rows/s", higher_is_better=True)
+
+    tmpdir = tempfile.mkdtemp(prefix="ssb-bench-")
+    print(f"{'rows':>8} {'notes rows/s':>13} {'index rows/s':>13} {'goals rows/s':>13} {'export rows/s':>14} "
+          f"{'peak MB':>8}")
+    for count in rows:
+        path = os.path.join(tmpdir, f"notes-{count}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for i in range(count):
+                f.write(json.dumps({'topic': f"Topic {i}", 'content': synthetic_note(rnd),
+                                    'created_date': "2024-01-01 00:00:00"}) + "\n")
+        # Memory is traced in a separate run; tracing slows the import down severalfold
+        _use_temp_database()
+        tracemalloc.start()
+        with open(path, "rb") as f:
+            bulk.import_notes(1, bulk.read_records(f))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        _use_temp_database()
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            bulk.import_notes(1, bulk.read_records(f))
+        notes = count / (time.perf_counter() - start)
+        start = time.perf_counter()
+        backfill(1)
+        indexed = count / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        bulk.import_goals(1, ({'goal': f"Goal {i}", 'completed': i % 2} for i in range(count)))
+        goals = count / (time.perf_counter() - start)
+        start = time.perf_counter()
+        with open(os.devnull, "w", encoding="utf-8") as f:
+            bulk.export_notes(1, f)
+        export = count / (time.perf_counter() - start)
+        print(f"{count:>8} {notes:>13.0f} {indexed:>13.0f} {goals:>13.0f} {export:>14.0f} {peak / 2**20:>8.1f}")
+        report(f"import_notes_{count}", notes, "rows/s", higher_is_better=True)
+        report(f"index_notes_{count}", indexed, "rows/s", higher_is_better=True)
+        report(f"import_goals_{count}", goals, "rows/s", higher_is_better=True)
+        report(f"export_notes_{count}", export, "rows/s", higher_is_better=True)
+        report(f"import_peak_{count}", peak / 2**20, "MB")
+
+def bench_incremental(pages=(10, 100), edits=20):
+    """Re-summarizing after single-paragraph edits: IncrementalSummarizer vs. a full recompute"""
+    from incremental import IncrementalSummarizer
+    from utils import generate_smart_summary, summary_cache
+
+    print(f"{'pages':>6} {'full ms':>10} {'incremental ms':>15} {'speedup':>8} {'identical':>10}")
+    for count in pages:
+        paragraphs = synthetic_paragraphs(count)
+        summarizer = IncrementalSummarizer("\n\n".join(paragraphs))
+        rnd = random.Random(count)
+        full_time = incremental_time = 0.0
+        identical = True
+        for _ in range(edits):
+            i = rnd.randrange(len(paragraphs))
+            paragraphs[i] = synthetic_paragraph(rnd)
+            text = "\n\n".join(paragraphs)
+
+            summary_cache.clear()
+            start = time.perf_counter()
+            expected = generate_smart_summary(text, 5, method="tfidf")
+            full_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            summarizer.update(text)
+            points = summarizer.summary(5)
+            incremental_time += time.perf_counter() - start
+            identical = identical and points == expected
+        full_ms, incremental_ms = full_time * 1e3 / edits, incremental_time * 1e3 / edits
+        print(f"{count:>6} {full_ms:>10.2f} {incremental_ms:>15.2f} {full_ms / incremental_ms:>8.1f} {str(identical):>10}")
+        report(f"full_ms_{count}_pages", full_ms, "ms")
+        report(f"incremental_ms_{count}_pages", incremental_ms, "ms")
+
+def bench_session_trends(sessions=200_000, days=1_095, samples=50):
+    """Trend chart data for a heavy user: session_trends (rollups) vs. grouping study_sessions"""
+    import analytics
+
+    database = _use_temp_database()
+    rnd = random.Random(4)
+    start = datetime(2022, 1, 1)
+    with database.transaction() as c:
+        c.executemany('INSERT INTO study_sessions (user_id, score, total_questions, date, type) VALUES (1, ?, 10, ?, ?)',
+                      ((rnd.randint(0, 10), (start + timedelta(days=rnd.randrange(days))).strftime("%Y-%m-%d"),
+                        rnd.choice(["quiz", "review", "flashcards"])) for _ in range(sessions)))
+    rebuild = _timed(database.rebuild_session_rollups, repeat=1)
+    print(f"backfill of {sessions} sessions: {rebuild * 1e3:.0f} ms")
+
+    def scan(first, last):
+        with database.transaction() as c:
+            c.execute('''SELECT date, COUNT(*), SUM(score), SUM(total_questions) FROM study_sessions
+                         WHERE user_id = 1 AND date BETWEEN ? AND ? GROUP BY date''', (first, last))
+            return c.fetchall()
+
+    end = (start + timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    print(f"{'range':<14} {'scan ms':>9} {'rollup ms':>10}")
+    for label, period, span in (("12 weeks", "week", 84), ("1 year daily", "day", 365), ("3 years", "week", days)):
+        first = (start + timedelta(days=days - span)).strftime("%Y-%m-%d")
+        scan_ms = _timed(lambda: [scan(first, end) for _ in range(samples)], repeat=1) * 1e3 / samples
+        rollup_ms = _timed(lambda: [analytics.session_trends.uncached(1, first, end, period) for _ in range(samples)],
+                           repeat=1) * 1e3 / samples
+        print(f"{label:<14} {scan_ms:>9.2f} {rollup_ms:>10.2f}")
+        key = label.replace(" ", "_")
+        report(f"scan_ms_{key}", scan_ms, "ms")
+        report(f"rollup_ms_{key}", rollup_ms, "ms")
+
+def bench_jobs(size=200_000, documents=8, users=4, workers=2):
+    """Script time of a large paste summarized inline vs. submitted as a job, and job queue throughput"""
+    import jobs
+    from utils import generate_smart_summary, summary_cache
+
+    database = _use_temp_database()
+    texts = [synthetic_text(size, seed=i) for i in range(documents)]
+    summary_cache.clear()
+    inline = _timed(generate_smart_summary, texts[0], 5, repeat=1)
+    start = time.perf_counter()
+    job_ids = [jobs.submit_summary_job(i % users + 1, text) for i, text in enumerate(texts)]
+    submit = (time.perf_counter() - start) / documents
+    duplicate = jobs.submit_summary_job(1, texts[0]) == job_ids[0]
+    print(f"inline summary of {size // 1000} KB: {inline * 1e3:.0f} ms; job submit: {submit * 1e3:.2f} ms "
+          f"(duplicate reused: {duplicate})")
+
+    pool = jobs.JobWorkerPool(workers, poll_interval=0.05).start()
+    start = time.perf_counter()
+    while jobs.job_counts().get('done', 0) + jobs.job_counts().get('failed', 0) < documents:
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    pool.stop(wait=True)
+    print(f"{documents} jobs from {users} users on {workers} workers: {elapsed:.2f}s "
+          f"({documents / elapsed:.1f} jobs/s, includes worker start-up), {jobs.job_counts()}")
+    report("inline_summary_ms", inline * 1e3, "ms")
+    report("job_submit_ms", submit * 1e3, "ms")
+    report("jobs_per_sec", documents / elapsed, "jobs/s", higher_is_better=True)
+
+def bench_quiz(notes=200, bank_notes=50_000, samples=200):
+    """Question bank generation rate, and quiz start latency from the stored bank vs. generating on the fly"""
+    import quiz
+    from utils import summary_cache
+
+    database = _use_temp_database()
+    rnd = random.Random(12)
+    now = "2024-01-01 00:00:00"
+    contents = [synthetic_paragraph(rnd) for _ in range(notes)]
+    with database.transaction() as c:
+        c.executemany('''INSERT INTO personal_notes (user_id, topic, content, created_date, last_modified)
+                         VALUES (1, ?, ?, ?, ?)''', ((f"Note {i}", text, now, now) for i, text in enumerate(contents)))
+    summary_cache.clear()
+    start = time.perf_counter()
+    questions = sum(len(quiz.build_question_bank(1, note_id)) for note_id in range(1, notes + 1))
+    elapsed = time.perf_counter() - start
+    print(f"generated {questions} questions for {notes} notes: {notes / elapsed:.1f} notes/s "
+          f"({questions / elapsed:.0f} questions/s)")
+
+    # Grow the user's bank to bank_notes notes by copying the generated ones
+    with database.transaction() as c:
+        c.executemany('''INSERT INTO personal_notes (user_id, topic, content, created_date, last_modified)
+                         VALUES (1, ?, ?, ?, ?)''',
+                      ((f"Note {i}", contents[i % notes], now, now) for i in range(notes, bank_notes)))
+        c.execute('''INSERT INTO quiz_questions (user_id, note_id, position, question)
+                     SELECT 1, n.id, q.position, q.question FROM personal_notes n
+                     JOIN quiz_questions q ON q.user_id = 1 AND q.note_id = (n.id - 1) % ? + 1 WHERE n.id > ?''',
+                  (notes, notes))
+        c.execute('''INSERT INTO quiz_banks (note_id, user_id, questions, generator, generated_date)
+                     SELECT n.id, 1, b.questions, b.generator, b.generated_date FROM personal_notes n
+                     JOIN quiz_banks b ON b.note_id = (n.id - 1) % ? + 1 WHERE n.id > ?''', (notes, notes))
+    picks = [rnd.randint(1, bank_notes) for _ in range(samples)]
+    generated = picks[:max(samples // 10, 1)]
+
+    def start_stored():
+        for note_id in picks:
+            database.read_cache.clear()
+            quiz.start_quiz(1, note_id, rnd=rnd)
+
+    def generate_on_the_fly():
+        for note_id in generated:
+            summary_cache.clear()
+            quiz.generate_questions(contents[(note_id - 1) % notes])
+
+    stored_ms = _timed(start_stored, repeat=1) * 1e3 / len(picks)
+    generate_ms = _timed(generate_on_the_fly, repeat=1) * 1e3 / len(generated)
+    print(f"quiz start with {bank_notes} banked notes: {stored_ms:.2f} ms from the bank vs. "
+          f"{generate_ms:.1f} ms generating ({generate_ms / stored_ms:.0f}x)")
+    report("generate_notes_per_s", notes / elapsed, "notes/s", higher_is_better=True)
+    report("start_stored_ms", stored_ms, "ms")
+    report("start_generate_ms", generate_ms, "ms")
+
+def bench_review(cards=50_000, other_users=100, samples=200, grades=2_000):
+    """Due-queue fetch for a user with many cards (index range vs. table scan) and batched grade writes"""
+    import review
+
+    database = _use_temp_database()
+    rnd = random.Random(13)
+    owners = [1] * cards + [user_id for user_id in range(2, other_users + 2) for _ in range(cards // 10)]
+    with database.transaction() as c:
+        # Each note's review card comes from the insert trigger
+        c.executemany('''INSERT INTO personal_notes (user_id, topic, content, created_date, last_modified)
+                         VALUES (?, ?, ?, ?, ?)''', ((user_id, f"Note {i}", "content", "2024-01-01 08:00:00",
+                                                      "2024-01-01 08:00:00") for i, user_id in enumerate(owners)))
+        # Due dates spread over 60 days, so about half of them are due on `day`
+        c.execute('''UPDATE review_cards SET due_at = datetime('2024-01-01 08:00:00', '+' || (note_id * 7919 % 60)
+                     || ' days', '+' || (note_id % 600) || ' minutes')''')
+    day = "2024-01-30"
+    until = f"{day} 23:59:59"
+    due = review._due_count.uncached(1, until)
+
+    def scan():
+        with database.transaction() as c:
+            c.execute('''SELECT r.note_id, n.topic FROM review_cards r NOT INDEXED JOIN personal_notes n ON n.id = r.note_id
+                         WHERE r.user_id = ? AND r.due_at <= ? ORDER BY r.due_at, r.note_id LIMIT ?''',
+                      (1, until, review.QUEUE_LENGTH))
+            return c.fetchall()
+
+    queue_ms = _timed(lambda: [review._due_queue.uncached(1, until, review.QUEUE_LENGTH)
+                               for _ in range(samples)]) * 1e3 / samples
+    count_ms = _timed(lambda: [review._due_count.uncached(1, until) for _ in range(samples)]) * 1e3 / samples
+    scan_ms = _timed(lambda: [scan() for _ in range(max(samples // 20, 1))]) * 1e3 / max(samples // 20, 1)
+    print(f"{cards} cards ({due} due) among {len(owners)}: next {review.QUEUE_LENGTH} in {queue_ms:.3f} ms "
+          f"(table scan {scan_ms:.1f} ms), due count {count_ms:.2f} ms")
+
+    note_ids = [rnd.randint(1, cards) for _ in range(grades)]
+    qualities = [rnd.choice(list(review.GRADES.values())) for _ in range(grades)]
+    rates = {}
+    for batch in (1, review.REVIEW_BATCH_SIZE):
+        start = time.perf_counter()
+        for i in range(0, grades, batch):
+            review.record_grades(1, list(zip(note_ids[i:i + batch], qualities[i:i + batch])), f"{day} 12:00:00")
+        rates[batch] = grades / (time.perf_counter() - start)
+    print(f"grade writes: {rates[1]:.0f}/s one at a time, {rates[review.REVIEW_BATCH_SIZE]:.0f}/s in batches "
+          f"of {review.REVIEW_BATCH_SIZE}")
+    report("due_queue_ms", queue_ms, "ms")
+    report("due_count_ms", count_ms, "ms")
+    report("scan_queue_ms", scan_ms, "ms")
+    report("grades_per_s_single", rates[1], "grades/s", higher_is_better=True)
+    report("grades_per_s_batched", rates[review.REVIEW_BATCH_SIZE], "grades/s", higher_is_better=True)
+
+BENCHMARKS = {
+    "scoring": bench_scoring,
+    "concepts": bench_concepts,
+    "startup": bench_startup,
+    "summary_cache": bench_summary_cache,
+    "simplify": bench_simplify,
+    "streaming": bench_streaming,
+    "segmenter": bench_segmenter,
+    "batch": bench_batch,
+    "db_connections": bench_db_connections,
+    "per_user_queries": bench_per_user_queries,
+    "login_burst": bench_login_burst,
+    "note_search": bench_note_search,
+    "idle_reruns": bench_idle_reruns,
+    "instrumentation": bench_instrumentation,
+    "page_loads": bench_page_loads,
+    "writes": bench_writes,
+    "bulk_import": bench_bulk_import,
+    "incremental": bench_incremental,
+    "jobs": bench_jobs,
+    "session_trends": bench_session_trends,
+    "similarity": bench_similarity,
+    "quiz": bench_quiz,
+    "review": bench_review,
+}
+
+# Smaller parameters for --quick, e.g. for a before/after check of one change
+QUICK = {
+    "scoring": {"sizes": (1_000, 10_000, 100_000)},
+    "concepts": {"sizes": (10_000, 100_000)},
+    "startup": {"runs": 2},
+    "summary_cache": {"size": 50_000},
+    "simplify": {"sentences": 100_000},
+    "streaming": {"sizes": (1_000_000,)},
+    "segmenter": {"sizes": (2_000_000,)},
+    "batch": {"documents": 8, "size": 20_000},
+    "db_connections": {"ops_per_thread": 100},
+    "per_user_queries": {"user_counts": (1_000, 10_000), "samples": 100},
+    "note_search": {"users": 5_000, "heavy_notes": 2_000, "samples": 50},
+    "login_burst": {"logins": 100, "users": 20},
+    "idle_reruns": {"reruns": 5},
+    "instrumentation": {"calls": 100_000},
+    "page_loads": {"users": 1_000, "samples": 200},
+    "writes": {"users": 200, "ops": 500},
+    "bulk_import": {"rows": (10_000, 50_000), "single_rows": 500},
+    "incremental": {"pages": (10, 100), "edits": 5},
+    "jobs": {"size": 50_000, "documents": 4},
+    "session_trends": {"sessions": 20_000, "samples": 20},
+    "similarity": {"sizes": (5_000, 20_000), "samples": 20},
+    "quiz": {"notes": 50, "bank_notes": 5_000, "samples": 50},
+    "review": {"other_users": 10, "samples": 50, "grades": 500},
+}
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(names, quick=False):
+    """Run benchmarks by name and return their results with run metadata"""
+    global _current_benchmark
+    _results.clear()
+    for name in names:
+        print(f"== {name} ==", flush=True)
+        _current_benchmark = name
+        try:
+            BENCHMARKS[name](**(QUICK.get(name, {}) if quick else {}))
+        finally:
+            _current_benchmark = None
+    meta = {'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"), 'commit': _git_commit(), 'quick': quick,
+            'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+            'hash_seed': os.environ.get("PYTHONHASHSEED")}
+    return {'meta': meta, 'results': {name: dict(metrics) for name, metrics in _results.items()}}
+
+def compare_results(baseline, current, threshold=10.0):
+    """Print every shared metric's change and return the number of regressions beyond threshold percent"""
+    if baseline['meta'].get('quick') != current['meta'].get('quick'):
+        print("warning: comparing a --quick run with a full run")
+    regressions = 0
+    print(f"{'benchmark':<18} {'metric':<32} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, metrics in current['results'].items():
+        for metric, entry in metrics.items():
+            base = baseline['results'].get(name, {}).get(metric)
+            if base is None:
+                print(f"{name:<18} {metric:<32} {'-':>12} {entry['value']:>12.4g} {'new':>9}")
+                continue
+            old, new = base['value'], entry['value']
+            if old:
+                change = (new - old) / abs(old) * 100
+            else:
+                change = 0.0 if new == old else float("inf") * (1 if new > old else -1)
+            worse = -change if entry['higher_is_better'] else change
+            flag = "  REGRESSION" if worse > threshold else "  improved" if worse < -threshold else ""
+            regressions += worse > threshold
+            print(f"{name:<18} {metric:<32} {old:>12.4g} {new:>12.4g} {change:>8.1f}%{flag}")
+    print(f"{regressions} regression(s) beyond {threshold:g}%")
+    return regressions
+
+def generate_database(path, users, notes_per_user=20, goals_per_user=10, sessions_per_user=20):
+    """Create a new SQLite file at path holding the synthetic multi-user dataset"""
+    import database
+
+    if os.path.exists(path):
+        raise SystemExit(f"{path} already exists")
+    database.close_connections()
+    database.DB_FILE = path
+    database.init_db()
+    populate_users(database, users, notes_per_user, goals_per_user, sessions_per_user)
+    database.close_connections()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for Smart Study Buddy")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs, for quick before/after checks")
+    parser.add_argument("--output", "-o", help="write results as JSON to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    parser.add_argument("--generate-corpus", metavar="DIR", help="write the synthetic texts to DIR")
+    parser.add_argument("--generate-db", metavar="PATH", help="write a synthetic multi-user database to PATH")
+    parser.add_argument("--users", type=int, default=1_000, help="users for --generate-db")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.compare[1], encoding="utf-8") as f:
+            current = json.load(f)
+        return 1 if compare_results(baseline, current, args.threshold) else 0
+    if args.generate_corpus:
+        for path in write_corpus(args.generate_corpus):
+            print(path)
+        return 0
+    if args.generate_db:
+        generate_database(args.generate_db, args.users)
+        print(f"{args.generate_db}: {args.users} users")
+        return 0
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    results = run_benchmarks(args.names or list(BENCHMARKS), args.quick)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"results written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
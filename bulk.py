@@ -0,0 +1,243 @@
+"""Bulk import and export of personal notes and study goals.
+
+Imports stream JSONL or CSV records through executemany in chunked
+transactions, so a large file costs one commit per chunk instead of one per
+row and memory stays bounded by the chunk size. Exports iterate a database
+cursor and write each row as it is read.
+
+    python bulk.py import-notes alice notes.jsonl
+    python bulk.py export-goals alice -o goals.csv
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+from datetime import datetime
+
+from database import read_cache, transaction
+
+IMPORT_CHUNK_SIZE = 5_000
+MAX_REPORTED_ERRORS = 20
+
+NOTE_FIELDS = ('topic', 'content', 'created_date', 'last_modified')
+GOAL_FIELDS = ('goal', 'created_date', 'completed')
+
+# ------------------- Reading and Writing Records -------------------
+def detect_format(name, fmt=None):
+    """'csv' for .csv names, otherwise 'jsonl', unless fmt is given"""
+    if fmt:
+        return fmt
+    return 'csv' if str(name).lower().endswith('.csv') else 'jsonl'
+
+def _text_stream(source):
+    """Text view of a binary upload or file; text streams are returned as they are"""
+    if isinstance(source, io.TextIOBase):
+        return source
+    return io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+
+def read_records(source, fmt='jsonl'):
+    """Yield one dict per JSONL line or CSV row; a malformed line yields the exception instead"""
+    stream = _text_stream(source)
+    try:
+        if fmt == 'csv':
+            yield from csv.DictReader(stream)
+            return
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield ValueError(f"line {number}: {e}")
+    finally:
+        if stream is not source:
+            stream.detach()  # leave the caller's binary file open
+
+def write_records(records, fileobj, fields, fmt='jsonl'):
+    """Write dict records to a text file one by one; returns the number written"""
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(fileobj, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+            count += 1
+        return count
+    for record in records:
+        fileobj.write(json.dumps(record, ensure_ascii=False))
+        fileobj.write('\n')
+        count += 1
+    return count
+
+# ------------------- Imports -------------------
+def _text(record, field, required=True):
+    value = record.get(field)
+    if value is None or value == '':
+        if required:
+            raise ValueError(f"missing {field!r}")
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"{field!r} must be text")
+    return value
+
+def _flag(value):
+    if isinstance(value, bool) or value is None:
+        return bool(value)
+    if isinstance(value, (int, float)):
+        return value != 0
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y', 'x', 'done', 'completed')
+
+def _note_row(user_id, record, now):
+    return (user_id, _text(record, 'topic'), _text(record, 'content'), _text(record, 'created_date', False), now,
+            _text(record, 'last_modified', False), _text(record, 'created_date', False), now)
+
+def _goal_row(user_id, record, now):
+    return (user_id, _text(record, 'goal'), _text(record, 'created_date', False), now[:10],
+            _flag(record.get('completed')))
+
+def _insert_chunk(c, table, columns, values, rows):
+    """Stage rows in a temp table, then copy them over with a single INSERT ... SELECT.
+
+    Within one statement FTS5 buffers the index updates fired by the notes
+    triggers; executemany straight into personal_notes flushes them per row.
+    """
+    staging = f"import_{table}"
+    c.execute(f"CREATE TEMP TABLE IF NOT EXISTS {staging} ({', '.join(columns)})")
+    c.executemany(f"INSERT INTO temp.{staging} VALUES ({values})", rows)
+    c.execute(f"INSERT INTO {table} ({', '.join(columns)}) SELECT * FROM temp.{staging} ORDER BY rowid")
+    c.execute(f"DELETE FROM temp.{staging}")
+
+def _import(user_id, records, to_row, table, columns, values, chunk_size):
+    """Insert valid records chunk by chunk; each chunk is one transaction"""
+    result = {'imported': 0, 'skipped': 0, 'errors': []}
+    if not user_id:
+        return result
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    chunk = []
+
+    def flush():
+        with transaction() as c:
+            _insert_chunk(c, table, columns, values, chunk)
+        read_cache.invalidate(user_id, (table,))
+        result['imported'] += len(chunk)
+        chunk.clear()
+
+    for number, record in enumerate(records, 1):
+        try:
+            if isinstance(record, Exception):
+                raise record
+            if not isinstance(record, dict):
+                raise ValueError("expected an object")
+            chunk.append(to_row(user_id, record, now))
+        except ValueError as e:
+            result['skipped'] += 1
+            if len(result['errors']) < MAX_REPORTED_ERRORS:
+                result['errors'].append(f"record {number}: {e}")
+            continue
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    return result
+
+def import_notes(user_id, records, chunk_size=IMPORT_CHUNK_SIZE):
+    """Bulk-insert notes from dicts with topic, content and optional created_date/last_modified.
+
+    Dates are stored in the canonical 'YYYY-MM-DD HH:MM:SS' form; missing or
+    unparseable ones become the import time. Returns counts of imported and
+    skipped records plus the first few error messages.
+
+    Imported notes are not hashed here, which would cut the insert rate
+    several times over; they join the similarity index when
+    similarity.backfill(user_id) runs, as the CLI and My Notes do right after.
+    """
+    return _import(user_id, records, _note_row, 'personal_notes',
+                   ('user_id', 'topic', 'content', 'created_date', 'last_modified'),
+                   '?, ?, ?, COALESCE(datetime(?), ?), COALESCE(datetime(?), datetime(?), ?)', chunk_size)
+
+def import_goals(user_id, records, chunk_size=IMPORT_CHUNK_SIZE):
+    """Bulk-insert goals from dicts with goal and optional created_date/completed; see import_notes"""
+    return _import(user_id, records, _goal_row, 'study_goals', ('user_id', 'goal', 'created_date', 'completed'),
+                   '?, ?, COALESCE(date(?), ?), ?', chunk_size)
+
+# ------------------- Exports -------------------
+def iter_notes(user_id):
+    """Yield a user's notes oldest first, straight from the database cursor"""
+    if not user_id:
+        return
+    with transaction() as c:
+        for row in c.execute('''SELECT topic, content, created_date, last_modified FROM personal_notes
+                                WHERE user_id = ? ORDER BY id''', (user_id,)):
+            yield dict(zip(NOTE_FIELDS, row))
+
+def iter_goals(user_id):
+    """Yield a user's goals oldest first, straight from the database cursor"""
+    if not user_id:
+        return
+    with transaction() as c:
+        for row in c.execute('''SELECT goal, created_date, completed FROM study_goals
+                                WHERE user_id = ? ORDER BY id''', (user_id,)):
+            yield {'goal': row[0], 'created_date': row[1], 'completed': bool(row[2])}
+
+def export_notes(user_id, fileobj, fmt='jsonl'):
+    """Write a user's notes to a text file; returns the number of notes written"""
+    return write_records(iter_notes(user_id), fileobj, NOTE_FIELDS, fmt)
+
+def export_goals(user_id, fileobj, fmt='jsonl'):
+    """Write a user's goals to a text file; returns the number of goals written"""
+    return write_records(iter_goals(user_id), fileobj, GOAL_FIELDS, fmt)
+
+# ------------------- Command Line -------------------
+def _user_id(username):
+    with transaction() as c:
+        c.execute('SELECT id FROM users WHERE username = ?', (username,))
+        row = c.fetchone()
+    if not row:
+        raise SystemExit(f"unknown user: {username}")
+    return row[0]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import and export of notes and goals")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for kind in ("notes", "goals"):
+        importer = commands.add_parser(f"import-{kind}", help=f"import {kind} from JSONL or CSV")
+        importer.add_argument("username")
+        importer.add_argument("file", help="input file, or - for stdin")
+        importer.add_argument("--format", choices=("jsonl", "csv"), help="default: by file extension")
+        exporter = commands.add_parser(f"export-{kind}", help=f"export {kind} as JSONL or CSV")
+        exporter.add_argument("username")
+        exporter.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+        exporter.add_argument("--format", choices=("jsonl", "csv"), help="default: by file extension")
+    args = parser.parse_args(argv)
+
+    user_id = _user_id(args.username)
+    action, kind = args.command.split("-")
+    if action == "import":
+        fmt = detect_format(args.file, args.format)
+        importer = import_notes if kind == "notes" else import_goals
+        if args.file == "-":
+            result = importer(user_id, read_records(sys.stdin, fmt))
+        else:
+            with open(args.file, encoding="utf-8-sig", newline="") as f:
+                result = importer(user_id, read_records(f, fmt))
+        for error in result['errors']:
+            print(error, file=sys.stderr)
+        print(f"imported {result['imported']} {kind}, skipped {result['skipped']}", file=sys.stderr)
+        if kind == "notes" and result['imported']:
+            from similarity import backfill
+            print(f"indexed {backfill(user_id)} notes for similar-note lookup", file=sys.stderr)
+        return 1 if result['skipped'] else 0
+
+    fmt = detect_format(args.output, args.format)
+    exporter = export_notes if kind == "notes" else export_goals
+    if args.output == "-":
+        count = exporter(user_id, sys.stdout, fmt)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            count = exporter(user_id, f, fmt)
+    print(f"exported {count} {kind}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
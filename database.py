@@ -1,201 +1,815 @@
+import argparse
+import functools
+import inspect
+import os
+import queue
+import re
 import sqlite3
+import sys
+import threading
 import bcrypt
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from instrumentation import stage, timed
+from read_cache import ReadCache
 
 # ------------------- Database Setup -------------------
 DB_FILE = "smart_study_buddy.db"
 
+# Idle connections kept per database file; extra ones are closed on release
+POOL_SIZE = 8
+CACHE_SIZE_KB = 8192
+STATEMENT_CACHE_SIZE = 256
+
+_pools = {}
+
+class _QueryCounter:
+    """Counts SQL statements run on pooled connections (including BEGIN/COMMIT)"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, statement):
+        with self._lock:
+            self.count += 1
+
+_query_counter = _QueryCounter()
+
+def query_count():
+    """Total SQL statements executed through transaction() so far"""
+    return _query_counter.count
+
+def _connect(db_file):
+    conn = sqlite3.connect(db_file, timeout=30, check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA cache_size=-{CACHE_SIZE_KB}')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.set_trace_callback(_query_counter)
+    return conn
+
+def _acquire():
+    pool = _pools.setdefault(DB_FILE, queue.LifoQueue(maxsize=POOL_SIZE))
+    try:
+        return pool, pool.get_nowait()
+    except queue.Empty:
+        return pool, _connect(DB_FILE)
+
+def _release(pool, conn):
+    try:
+        pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+@contextmanager
+def transaction():
+    """Borrow a pooled connection and yield a cursor inside one transaction.
+
+    Commits when the block exits normally and rolls back on error. Pooled
+    connections keep their prepared-statement cache between calls.
+    """
+    if DB_FILE not in _schema_ready:
+        ensure_schema()
+    pool, conn = _acquire()
+    reusable = True
+    try:
+        with stage('db.transaction'), conn:
+            yield conn.cursor()
+    except sqlite3.IntegrityError:
+        raise
+    except sqlite3.Error:
+        # The connection may be unusable (e.g. locked or replaced file); drop it
+        reusable = False
+        raise
+    finally:
+        if reusable:
+            _release(pool, conn)
+        else:
+            conn.close()
+
+def close_connections():
+    """Close every idle pooled connection"""
+    for pool in _pools.values():
+        while True:
+            try:
+                pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+# ------------------- Schema Migrations -------------------
+def _rollup_rebuild_statements(where="1"):
+    """Recompute session rollups and study streaks from study_sessions for the rows matching where.
+
+    Used by migration 6 for existing data and by rebuild_session_rollups.
+    Weeks start on Monday; a streak is a run of consecutive days with a session.
+    """
+    return [
+        f"DELETE FROM session_rollups WHERE {where}",
+        f'''INSERT INTO session_rollups (user_id, period, bucket, type, sessions, score_sum, question_sum)
+            SELECT user_id, 'day', date(date), COALESCE(type, ''), COUNT(*),
+                   COALESCE(SUM(score), 0), COALESCE(SUM(total_questions), 0)
+            FROM study_sessions WHERE date(date) IS NOT NULL AND {where}
+            GROUP BY user_id, date(date), COALESCE(type, '')''',
+        f'''INSERT INTO session_rollups (user_id, period, bucket, type, sessions, score_sum, question_sum)
+            SELECT user_id, 'week', date(date, 'weekday 0', '-6 days'), COALESCE(type, ''), COUNT(*),
+                   COALESCE(SUM(score), 0), COALESCE(SUM(total_questions), 0)
+            FROM study_sessions WHERE date(date) IS NOT NULL AND {where}
+            GROUP BY user_id, date(date, 'weekday 0', '-6 days'), COALESCE(type, '')''',
+        *_streak_rebuild_statements(where),
+    ]
+
+def _streak_rebuild_statements(where="1"):
+    # Consecutive days share julianday(day) - row_number(), which identifies each run
+    return [
+        f"DELETE FROM study_streaks WHERE {where}",
+        f'''INSERT INTO study_streaks (user_id, last_day, current_length, longest)
+            WITH days AS (SELECT DISTINCT user_id, bucket FROM session_rollups
+                          WHERE period = 'day' AND {where}),
+                 runs AS (SELECT user_id, MAX(bucket) AS last_day, COUNT(*) AS length
+                          FROM (SELECT user_id, bucket, julianday(bucket)
+                                       - ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY bucket) AS run
+                                FROM days)
+                          GROUP BY user_id, run)
+            SELECT user_id, last_day, length, longest
+            FROM (SELECT user_id, last_day, length, MAX(length) OVER (PARTITION BY user_id) AS longest,
+                         ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY last_day DESC) AS latest
+                  FROM runs)
+            WHERE latest = 1''',
+    ]
+
+# Ordered, append-only list of (version, description, statements). Every
+# statement is idempotent so a step can be re-run safely if a previous
+# attempt was interrupted. Dates are stored as ISO-8601 text
+# ("YYYY-MM-DD" / "YYYY-MM-DD HH:MM:SS"), which sorts chronologically.
+MIGRATIONS = [
+    (1, "initial tables", [
+        # Users table for authentication
+        '''CREATE TABLE IF NOT EXISTS users
+           (id INTEGER PRIMARY KEY, 
+            username TEXT UNIQUE, 
+            email TEXT UNIQUE,
+            password_hash TEXT,
+            created_date TEXT)''',
+        # Study goals table with user_id
+        '''CREATE TABLE IF NOT EXISTS study_goals
+           (id INTEGER PRIMARY KEY, 
+            user_id INTEGER, 
+            goal TEXT, 
+            created_date TEXT, 
+            completed BOOLEAN,
+            FOREIGN KEY (user_id) REFERENCES users (id))''',
+        # Study sessions table with user_id
+        '''CREATE TABLE IF NOT EXISTS study_sessions
+           (id INTEGER PRIMARY KEY, 
+            user_id INTEGER,
+            score INTEGER, 
+            total_questions INTEGER, 
+            date TEXT, 
+            type TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id))''',
+        # Personal notes table
+        '''CREATE TABLE IF NOT EXISTS personal_notes
+           (id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            topic TEXT,
+            content TEXT,
+            created_date TEXT,
+            last_modified TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id))''',
+    ]),
+    (2, "per-user indexes", [
+        'CREATE INDEX IF NOT EXISTS idx_notes_user_modified ON personal_notes (user_id, last_modified)',
+        'CREATE INDEX IF NOT EXISTS idx_goals_user_completed ON study_goals (user_id, completed)',
+        'CREATE INDEX IF NOT EXISTS idx_sessions_user_date ON study_sessions (user_id, date)',
+    ]),
+    (3, "canonical ISO-8601 timestamps", [
+        # Rewrite values SQLite can parse but that sort differently (e.g. a "T" separator or fractional seconds)
+        '''UPDATE personal_notes SET last_modified = datetime(last_modified)
+           WHERE datetime(last_modified) IS NOT NULL AND last_modified != datetime(last_modified)''',
+        '''UPDATE personal_notes SET created_date = datetime(created_date)
+           WHERE datetime(created_date) IS NOT NULL AND created_date != datetime(created_date)''',
+        '''UPDATE study_goals SET created_date = date(created_date)
+           WHERE date(created_date) IS NOT NULL AND created_date != date(created_date)''',
+        '''UPDATE study_sessions SET date = date(date)
+           WHERE date(date) IS NOT NULL AND date != date(date)''',
+        '''UPDATE users SET created_date = date(created_date)
+           WHERE date(created_date) IS NOT NULL AND created_date != date(created_date)''',
+    ]),
+    (4, "full-text search over personal notes", [
+        # owner holds "u<user_id>" as a single token so MATCH can restrict to one user
+        '''CREATE VIEW IF NOT EXISTS notes_fts_source AS
+           SELECT id, 'u' || user_id AS owner, topic, content FROM personal_notes''',
+        '''CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5
+           (owner, topic, content, content='notes_fts_source', content_rowid='id',
+            tokenize='porter unicode61')''',
+        '''CREATE TRIGGER IF NOT EXISTS personal_notes_fts_insert AFTER INSERT ON personal_notes BEGIN
+             INSERT INTO notes_fts (rowid, owner, topic, content)
+             VALUES (new.id, 'u' || new.user_id, new.topic, new.content);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS personal_notes_fts_delete AFTER DELETE ON personal_notes BEGIN
+             INSERT INTO notes_fts (notes_fts, rowid, owner, topic, content)
+             VALUES ('delete', old.id, 'u' || old.user_id, old.topic, old.content);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS personal_notes_fts_update AFTER UPDATE ON personal_notes BEGIN
+             INSERT INTO notes_fts (notes_fts, rowid, owner, topic, content)
+             VALUES ('delete', old.id, 'u' || old.user_id, old.topic, old.content);
+             INSERT INTO notes_fts (rowid, owner, topic, content)
+             VALUES (new.id, 'u' || new.user_id, new.topic, new.content);
+           END''',
+        "INSERT INTO notes_fts (notes_fts) VALUES ('rebuild')",
+    ]),
+    (5, "background summarization jobs", [
+        # status: queued -> running -> done | failed, or queued -> cancelled; text is dropped once the job ends
+        '''CREATE TABLE IF NOT EXISTS summary_jobs
+           (id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            content_hash TEXT,
+            num_points INTEGER,
+            text TEXT,
+            status TEXT,
+            worker TEXT,
+            lease_until REAL,
+            attempts INTEGER DEFAULT 0,
+            note_id INTEGER,
+            error TEXT,
+            created_date TEXT,
+            started_date TEXT,
+            finished_date TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id))''',
+        'CREATE INDEX IF NOT EXISTS idx_jobs_status_user ON summary_jobs (status, user_id)',
+        'CREATE INDEX IF NOT EXISTS idx_jobs_user_hash ON summary_jobs (user_id, content_hash)',
+        # At most one pending job per user and text, even with concurrent submits
+        '''CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_pending ON summary_jobs (user_id, content_hash, num_points)
+           WHERE status IN ('queued', 'running')''',
+    ]),
+    (6, "study session rollups", [
+        # Per user, 'day' or 'week' bucket (the Monday) and session type; kept current by save_study_session
+        '''CREATE TABLE IF NOT EXISTS session_rollups
+           (user_id INTEGER,
+            period TEXT,
+            bucket TEXT,
+            type TEXT,
+            sessions INTEGER,
+            score_sum INTEGER,
+            question_sum INTEGER,
+            PRIMARY KEY (user_id, period, bucket, type)) WITHOUT ROWID''',
+        '''CREATE TABLE IF NOT EXISTS study_streaks
+           (user_id INTEGER PRIMARY KEY,
+            last_day TEXT,
+            current_length INTEGER,
+            longest INTEGER)''',
+        *_rollup_rebuild_statements(),
+    ]),
+    (7, "note similarity index", [
+        # MinHash signature of each note's content and one row per LSH band bucket; see similarity.py
+        '''CREATE TABLE IF NOT EXISTS note_signatures
+           (note_id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            signature BLOB)''',
+        '''CREATE TABLE IF NOT EXISTS note_lsh
+           (user_id INTEGER,
+            bucket INTEGER,
+            note_id INTEGER,
+            PRIMARY KEY (user_id, bucket, note_id)) WITHOUT ROWID''',
+        # Bucket rows need the signature to be found, so delete_personal_note removes them first;
+        # this only catches other deletes, whose leftover buckets lookups skip
+        '''CREATE TRIGGER IF NOT EXISTS personal_notes_signature_delete AFTER DELETE ON personal_notes BEGIN
+             DELETE FROM note_signatures WHERE note_id = old.id;
+           END''',
+    ]),
+    (8, "quiz question bank", [
+        # Questions generated from a note's content (JSON), in quality order; see quiz.py
+        '''CREATE TABLE IF NOT EXISTS quiz_questions
+           (user_id INTEGER,
+            note_id INTEGER,
+            position INTEGER,
+            question TEXT,
+            PRIMARY KEY (user_id, note_id, position)) WITHOUT ROWID''',
+        # One row per generated bank, also for notes that gave no questions, so they are not re-analyzed
+        '''CREATE TABLE IF NOT EXISTS quiz_banks
+           (note_id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            questions INTEGER,
+            generator INTEGER,
+            generated_date TEXT)''',
+        # A bank is only stale once the content it came from changes; renaming a note keeps it
+        '''CREATE TRIGGER IF NOT EXISTS personal_notes_quiz_update AFTER UPDATE OF content ON personal_notes
+           WHEN old.content IS NOT new.content BEGIN
+             DELETE FROM quiz_questions WHERE user_id = old.user_id AND note_id = old.id;
+             DELETE FROM quiz_banks WHERE note_id = old.id;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS personal_notes_quiz_delete AFTER DELETE ON personal_notes BEGIN
+             DELETE FROM quiz_questions WHERE user_id = old.user_id AND note_id = old.id;
+             DELETE FROM quiz_banks WHERE note_id = old.id;
+           END''',
+    ]),
+    (9, "spaced repetition review cards", [
+        # SM-2 state of each note's review card; see review.py
+        '''CREATE TABLE IF NOT EXISTS review_cards
+           (note_id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            due_at TEXT,
+            interval_days INTEGER,
+            ease REAL,
+            repetitions INTEGER,
+            lapses INTEGER,
+            last_reviewed TEXT)''',
+        # The due queue is a range scan of this index, already in due order
+        'CREATE INDEX IF NOT EXISTS idx_cards_user_due ON review_cards (user_id, due_at)',
+        # Every note gets a card, due as soon as it is created
+        '''CREATE TRIGGER IF NOT EXISTS personal_notes_card_insert AFTER INSERT ON personal_notes BEGIN
+             INSERT OR IGNORE INTO review_cards (note_id, user_id, due_at, interval_days, ease, repetitions, lapses)
+             VALUES (new.id, new.user_id, COALESCE(new.created_date, datetime('now', 'localtime')), 0, 2.5, 0, 0);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS personal_notes_card_delete AFTER DELETE ON personal_notes BEGIN
+             DELETE FROM review_cards WHERE note_id = old.id;
+           END''',
+        '''INSERT OR IGNORE INTO review_cards (note_id, user_id, due_at, interval_days, ease, repetitions, lapses)
+           SELECT id, user_id, COALESCE(created_date, datetime('now', 'localtime')), 0, 2.5, 0, 0
+           FROM personal_notes''',
+    ]),
+]
+
+def schema_version():
+    """Highest migration version applied to the current database"""
+    with transaction() as c:
+        c.execute('CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, applied_date TEXT)')
+        c.execute('SELECT MAX(version) FROM schema_version')
+        return c.fetchone()[0] or 0
+
+def migrate():
+    """Apply pending migrations in order, each in its own write transaction"""
+    applied = []
+    current = schema_version()
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        with transaction() as c:
+            # Take the write lock first so concurrent workers apply each step once
+            c.execute('BEGIN IMMEDIATE')
+            c.execute('SELECT 1 FROM schema_version WHERE version = ?', (version,))
+            if c.fetchone():
+                continue
+            for statement in statements:
+                c.execute(statement)
+            c.execute('INSERT INTO schema_version (version, applied_date) VALUES (?, ?)',
+                      (version, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        applied.append((version, description))
+    return applied
+
+# The schema is brought up to date once per process and database file, on the
+# first transaction() (or ahead of time with `python database.py init`), not
+# on import, so importing this module costs no I/O.
+_schema_ready = set()
+_schema_lock = threading.Lock()
+_bootstrap = threading.local()
+
+def _bootstrap_schema():
+    # Called with _schema_lock held; the flag lets migrate() use transaction() itself
+    _bootstrap.running = True
+    try:
+        applied = migrate()
+    finally:
+        _bootstrap.running = False
+    _schema_ready.add(DB_FILE)
+    return applied
+
 def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
-    # Users table for authentication
-    c.execute('''CREATE TABLE IF NOT EXISTS users
-                 (id INTEGER PRIMARY KEY, 
-                  username TEXT UNIQUE, 
-                  email TEXT UNIQUE,
-                  password_hash TEXT,
-                  created_date TEXT)''')
-    
-    # Study goals table with user_id
-    c.execute('''CREATE TABLE IF NOT EXISTS study_goals
-                 (id INTEGER PRIMARY KEY, 
-                  user_id INTEGER, 
-                  goal TEXT, 
-                  created_date TEXT, 
-                  completed BOOLEAN,
-                  FOREIGN KEY (user_id) REFERENCES users (id))''')
-    
-    # Study sessions table with user_id
-    c.execute('''CREATE TABLE IF NOT EXISTS study_sessions
-                 (id INTEGER PRIMARY KEY, 
-                  user_id INTEGER,
-                  score INTEGER, 
-                  total_questions INTEGER, 
-                  date TEXT, 
-                  type TEXT,
-                  FOREIGN KEY (user_id) REFERENCES users (id))''')
-    
-    # Personal notes table
-    c.execute('''CREATE TABLE IF NOT EXISTS personal_notes
-                 (id INTEGER PRIMARY KEY,
-                  user_id INTEGER,
-                  topic TEXT,
-                  content TEXT,
-                  created_date TEXT,
-                  last_modified TEXT,
-                  FOREIGN KEY (user_id) REFERENCES users (id))''')
-    
-    conn.commit()
-    conn.close()
+    """Apply pending migrations to DB_FILE now; returns the (version, description) pairs applied"""
+    with _schema_lock:
+        return _bootstrap_schema()
 
-init_db()
+def ensure_schema():
+    """Bring DB_FILE's schema up to date unless this process already has"""
+    if DB_FILE in _schema_ready or getattr(_bootstrap, 'running', False):
+        return
+    with _schema_lock:
+        if DB_FILE not in _schema_ready:
+            _bootstrap_schema()
 
-# ------------------- Authentication Functions -------------------
-def hash_password(password):
+# ------------------- Password Hashing -------------------
+# bcrypt costs 100-300 ms of CPU per call, so hashing runs on a small
+# dedicated pool instead of the Streamlit script thread. When the pool and
+# its queue are full, callers get AuthBusyError and should ask the user to
+# retry rather than pile up behind a login burst.
+BCRYPT_ROUNDS = int(os.environ.get("STUDY_BUDDY_BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.environ.get("STUDY_BUDDY_HASH_WORKERS", "2"))
+HASH_QUEUE_LIMIT = int(os.environ.get("STUDY_BUDDY_HASH_QUEUE_LIMIT", "32"))
+HASH_TIMEOUT = 10
+
+class AuthBusyError(Exception):
+    """The password hashing queue is full; try again shortly"""
+
+_hash_executor = None
+_hash_executor_lock = threading.Lock()
+_hash_slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE_LIMIT)
+
+def _get_hash_executor():
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            _hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+        return _hash_executor
+
+def _submit_hashing(func, *args):
+    """Queue func on the hashing pool, or raise AuthBusyError when it is saturated"""
+    if not _hash_slots.acquire(blocking=False):
+        raise AuthBusyError("Too many sign-ins right now, please try again in a moment.")
+    try:
+        future = _get_hash_executor().submit(func, *args)
+    except BaseException:
+        _hash_slots.release()
+        raise
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return future
+
+def _run_hashing(func, *args):
+    try:
+        return _submit_hashing(func, *args).result(timeout=HASH_TIMEOUT)
+    except FutureTimeoutError:
+        raise AuthBusyError("Sign-in is taking too long, please try again in a moment.")
+
+@timed('db.hash_password')
+def hash_password(password, rounds=None):
     """Hash a password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    salt = bcrypt.gensalt(rounds or BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
+@timed('db.verify_password')
 def verify_password(password, hashed_password):
     """Verify a password against its hash"""
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+def _hash_rounds(hashed_password):
+    """Work factor stored in a bcrypt hash ("$2b$12$..." -> 12)"""
+    try:
+        return int(hashed_password.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+def _rehash_password(user_id, password, old_hash):
+    new_hash = hash_password(password)
+    with transaction() as c:
+        c.execute('UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?',
+                  (new_hash, user_id, old_hash))
+
+# ------------------- Authentication Functions -------------------
+@timed('db.create_user')
 def create_user(username, email, password):
-    """Create a new user in the database"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
+    """Create a new user in the database; raises AuthBusyError under overload"""
     try:
-        password_hash = hash_password(password)
-        c.execute('INSERT INTO users (username, email, password_hash, created_date) VALUES (?, ?, ?, ?)',
-                  (username, email, password_hash, datetime.now().strftime("%Y-%m-%d")))
-        conn.commit()
+        password_hash = _run_hashing(hash_password, password)
+        with transaction() as c:
+            c.execute('INSERT INTO users (username, email, password_hash, created_date) VALUES (?, ?, ?, ?)',
+                      (username, email, password_hash, datetime.now().strftime("%Y-%m-%d")))
         return True
     except sqlite3.IntegrityError:
         return False  # Username or email already exists
-    finally:
-        conn.close()
 
+@timed('db.authenticate_user')
 def authenticate_user(username, password):
-    """Authenticate a user"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT id, username, password_hash FROM users WHERE username = ?', (username,))
-    user = c.fetchone()
-    conn.close()
+    """Authenticate a user; raises AuthBusyError under overload"""
+    with transaction() as c:
+        c.execute('SELECT id, username, password_hash FROM users WHERE username = ?', (username,))
+        user = c.fetchone()
     
-    if user and verify_password(password, user[2]):
+    if user and _run_hashing(verify_password, password, user[2]):
+        if _hash_rounds(user[2]) != BCRYPT_ROUNDS:
+            # Upgrade to the configured work factor without delaying the login
+            try:
+                _submit_hashing(_rehash_password, user[0], password, user[2])
+            except AuthBusyError:
+                pass  # retried on a later login
         return {'id': user[0], 'username': user[1]}
     return None
 
+# ------------------- Read Cache -------------------
+read_cache = ReadCache()
+
+def cached_read(*tables):
+    """Serve a per-user read from read_cache until one of tables changes for that user.
+
+    The decorated function must take a user_id argument; the remaining
+    arguments (and the database file) are part of the cache key.
+    """
+    def decorate(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            user_id = bound.arguments['user_id']
+            if not user_id:
+                return func(*args, **kwargs)
+            key = (DB_FILE, func.__name__, tuple(bound.arguments.values()))
+            return read_cache.get_or_load(user_id, key, tables, lambda: func(*args, **kwargs))
+        wrapper.uncached = func
+        return wrapper
+    return decorate
+
 # ------------------- Database Utilities -------------------
+@timed('db.add_study_goal')
 def add_study_goal(goal, user_id):
     if not user_id:
         return False
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('INSERT INTO study_goals (user_id, goal, created_date, completed) VALUES (?, ?, ?, ?)',
-              (user_id, goal, datetime.now().strftime("%Y-%m-%d"), False))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute('INSERT INTO study_goals (user_id, goal, created_date, completed) VALUES (?, ?, ?, ?)',
+                  (user_id, goal, datetime.now().strftime("%Y-%m-%d"), False))
+    read_cache.invalidate(user_id, ('study_goals',))
     return True
 
+@timed('db.mark_goal_complete')
 def mark_goal_complete(goal_id, user_id):
     if not user_id:
         return False
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('UPDATE study_goals SET completed = ? WHERE id = ? AND user_id = ?', 
-              (True, goal_id, user_id))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute('UPDATE study_goals SET completed = ? WHERE id = ? AND user_id = ?', 
+                  (True, goal_id, user_id))
+    read_cache.invalidate(user_id, ('study_goals',))
     return True
 
+@timed('db.delete_goal')
 def delete_goal(goal_id, user_id):
     if not user_id:
         return False
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('DELETE FROM study_goals WHERE id = ? AND user_id = ?', (goal_id, user_id))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute('DELETE FROM study_goals WHERE id = ? AND user_id = ?', (goal_id, user_id))
+    read_cache.invalidate(user_id, ('study_goals',))
     return True
 
+def week_start(day):
+    """Monday of the week containing an ISO date, as an ISO date"""
+    day = date.fromisoformat(day)
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+def _rollup_session(c, user_id, day, session_type, score, total_questions):
+    """Add one session to its day and week rollups and extend the user's study streak"""
+    c.executemany('''INSERT INTO session_rollups (user_id, period, bucket, type, sessions, score_sum, question_sum)
+                     VALUES (?, ?, ?, ?, 1, ?, ?)
+                     ON CONFLICT (user_id, period, bucket, type) DO UPDATE SET
+                       sessions = sessions + 1, score_sum = score_sum + excluded.score_sum,
+                       question_sum = question_sum + excluded.question_sum''',
+                  [(user_id, 'day', day, session_type or '', score or 0, total_questions or 0),
+                   (user_id, 'week', week_start(day), session_type or '', score or 0, total_questions or 0)])
+    c.execute('SELECT last_day, current_length, longest FROM study_streaks WHERE user_id = ?', (user_id,))
+    row = c.fetchone()
+    if row is None:
+        c.execute('INSERT INTO study_streaks (user_id, last_day, current_length, longest) VALUES (?, ?, 1, 1)',
+                  (user_id, day))
+    elif day > row[0]:
+        current = row[1] + 1 if date.fromisoformat(day) - date.fromisoformat(row[0]) == timedelta(days=1) else 1
+        c.execute('UPDATE study_streaks SET last_day = ?, current_length = ?, longest = ? WHERE user_id = ?',
+                  (day, current, max(row[2], current), user_id))
+    elif day < row[0]:
+        # A backdated session can join two runs; recount this user's days
+        for statement in _streak_rebuild_statements("user_id = :user_id"):
+            c.execute(statement, {'user_id': user_id})
+
+def rebuild_session_rollups(user_id=None):
+    """Recompute rollups and streaks from study_sessions for one user, or everyone if None.
+
+    Returns the number of daily buckets rebuilt.
+    """
+    where, params = ("user_id = :user_id", {'user_id': user_id}) if user_id else ("1", {})
+    with transaction() as c:
+        c.execute('BEGIN IMMEDIATE')
+        for statement in _rollup_rebuild_statements(where):
+            c.execute(statement, params)
+        c.execute(f"SELECT COUNT(*) FROM session_rollups WHERE period = 'day' AND {where}", params)
+        buckets = c.fetchone()[0]
+    if user_id:
+        read_cache.invalidate(user_id, ('session_rollups',))
+    else:
+        read_cache.clear()
+    return buckets
+
+@timed('db.save_study_session')
 def save_study_session(score, total_questions, session_type, user_id):
     if not user_id:
         return False
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('INSERT INTO study_sessions (user_id, score, total_questions, date, type) VALUES (?, ?, ?, ?, ?)',
-              (user_id, score, total_questions, datetime.now().strftime("%Y-%m-%d"), session_type))
-    conn.commit()
-    conn.close()
+    today = datetime.now().strftime("%Y-%m-%d")
+    with transaction() as c:
+        c.execute('INSERT INTO study_sessions (user_id, score, total_questions, date, type) VALUES (?, ?, ?, ?, ?)',
+                  (user_id, score, total_questions, today, session_type))
+        _rollup_session(c, user_id, today, session_type, score, total_questions)
+    read_cache.invalidate(user_id, ('study_sessions', 'session_rollups'))
     return True
 
+@timed('db.load_study_goals')
+@cached_read('study_goals')
 def load_study_goals(user_id):
     if not user_id:
         return []
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("SELECT * FROM study_goals WHERE user_id = ?", (user_id,))
-    goals = [{'id': row[0], 'goal': row[2], 'created_date': row[3], 'completed': bool(row[4])} for row in c.fetchall()]
-    conn.close()
+    with transaction() as c:
+        c.execute("SELECT * FROM study_goals WHERE user_id = ?", (user_id,))
+        goals = [{'id': row[0], 'goal': row[2], 'created_date': row[3], 'completed': bool(row[4])} for row in c.fetchall()]
     return goals
 
+@timed('db.load_study_sessions')
+@cached_read('study_sessions')
 def load_study_sessions(user_id):
     if not user_id:
         return []
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("SELECT * FROM study_sessions WHERE user_id = ?", (user_id,))
-    sessions = [{'id': row[0], 'score': row[2], 'total_questions': row[3], 'date': row[4], 'type': row[5]} for row in c.fetchall()]
-    conn.close()
+    with transaction() as c:
+        c.execute("SELECT * FROM study_sessions WHERE user_id = ?", (user_id,))
+        sessions = [{'id': row[0], 'score': row[2], 'total_questions': row[3], 'date': row[4], 'type': row[5]} for row in c.fetchall()]
     return sessions
 
 # ------------------- Personal Notes Functions -------------------
+@timed('db.save_personal_note')
 def save_personal_note(topic, content, user_id):
     """Save a personal note"""
     if not user_id:
         return False
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
+    from similarity import index_notes, signature  # numpy is loaded on the first write, not at startup
+    note_signature = signature(content)
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    c.execute('INSERT INTO personal_notes (user_id, topic, content, created_date, last_modified) VALUES (?, ?, ?, ?, ?)',
-              (user_id, topic, content, current_time, current_time))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute('INSERT INTO personal_notes (user_id, topic, content, created_date, last_modified) VALUES (?, ?, ?, ?, ?)',
+                  (user_id, topic, content, current_time, current_time))
+        index_notes(c, user_id, [(c.lastrowid, note_signature)])
+    read_cache.invalidate(user_id, ('personal_notes',))
     return True
 
+@timed('db.update_personal_note')
 def update_personal_note(note_id, topic, content, user_id):
     """Update an existing note"""
     if not user_id:
         return False
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
+    from similarity import index_notes, signature
+    note_signature = signature(content)
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    c.execute('UPDATE personal_notes SET topic = ?, content = ?, last_modified = ? WHERE id = ? AND user_id = ?',
-              (topic, content, current_time, note_id, user_id))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute('UPDATE personal_notes SET topic = ?, content = ?, last_modified = ? WHERE id = ? AND user_id = ?',
+                  (topic, content, current_time, note_id, user_id))
+        if c.rowcount:
+            index_notes(c, user_id, [(note_id, note_signature)], replace=True)
+    read_cache.invalidate(user_id, ('personal_notes',))
     return True
 
+@timed('db.delete_personal_note')
 def delete_personal_note(note_id, user_id):
     """Delete a personal note"""
     if not user_id:
         return False
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('DELETE FROM personal_notes WHERE id = ? AND user_id = ?', (note_id, user_id))
-    conn.commit()
-    conn.close()
+    from similarity import unindex_note
+    with transaction() as c:
+        unindex_note(c, user_id, note_id)
+        c.execute('DELETE FROM personal_notes WHERE id = ? AND user_id = ?', (note_id, user_id))
+    read_cache.invalidate(user_id, ('personal_notes',))
     return True
 
+@timed('db.load_personal_notes')
+@cached_read('personal_notes')
 def load_personal_notes(user_id):
     """Load all personal notes for the current user"""
     if not user_id:
         return []
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("SELECT * FROM personal_notes WHERE user_id = ? ORDER BY last_modified DESC", (user_id,))
-    notes = [{'id': row[0], 'topic': row[2], 'content': row[3], 'created_date': row[4], 'last_modified': row[5]} for row in c.fetchall()]
-    conn.close()
-    return notes
\ No newline at end of file
+    with transaction() as c:
+        c.execute("SELECT * FROM personal_notes WHERE user_id = ? ORDER BY last_modified DESC", (user_id,))
+        notes = [{'id': row[0], 'topic': row[2], 'content': row[3], 'created_date': row[4], 'last_modified': row[5]} for row in c.fetchall()]
+    return notes
+
+# ------------------- Paginated Notes -------------------
+NOTES_PAGE_SIZE = 20
+NOTE_PREVIEW_CHARS = 200
+
+@timed('db.list_personal_notes')
+@cached_read('personal_notes')
+def list_personal_notes(user_id, cursor=None, limit=NOTES_PAGE_SIZE):
+    """Return one page of note metadata with a short preview, newest first.
+
+    cursor is the (last_modified, id) of the last note of the previous page;
+    the returned next_cursor is None once there are no more notes. Paging is
+    keyset-based, so every page is an index range scan of at most limit rows.
+    """
+    if not user_id:
+        return [], None
+    query = '''SELECT id, topic, substr(content, 1, ?), length(content), created_date, last_modified
+               FROM personal_notes WHERE user_id = ?'''
+    params = [NOTE_PREVIEW_CHARS, user_id]
+    if cursor:
+        query += ' AND (last_modified, id) < (?, ?)'
+        params.extend(cursor)
+    query += ' ORDER BY last_modified DESC, id DESC LIMIT ?'
+    params.append(limit + 1)
+    with transaction() as c:
+        c.execute(query, params)
+        rows = c.fetchall()
+    notes = [{'id': row[0], 'topic': row[1], 'preview': row[2], 'truncated': row[3] > NOTE_PREVIEW_CHARS,
+              'created_date': row[4], 'last_modified': row[5]} for row in rows[:limit]]
+    next_cursor = (notes[-1]['last_modified'], notes[-1]['id']) if len(rows) > limit else None
+    return notes, next_cursor
+
+@timed('db.list_note_topics')
+@cached_read('personal_notes')
+def list_note_topics(user_id):
+    """(id, topic) of every note of the user, newest first, for pickers; no content is read"""
+    if not user_id:
+        return []
+    with transaction() as c:
+        c.execute('SELECT id, topic FROM personal_notes WHERE user_id = ? ORDER BY last_modified DESC, id DESC',
+                  (user_id,))
+        return c.fetchall()
+
+@timed('db.get_personal_note')
+@cached_read('personal_notes')
+def get_personal_note(note_id, user_id):
+    """Load a single note including its full content"""
+    if not user_id:
+        return None
+    with transaction() as c:
+        c.execute('''SELECT id, topic, content, created_date, last_modified FROM personal_notes
+                     WHERE id = ? AND user_id = ?''', (note_id, user_id))
+        row = c.fetchone()
+    if not row:
+        return None
+    return {'id': row[0], 'topic': row[1], 'content': row[2], 'created_date': row[3], 'last_modified': row[4]}
+
+# ------------------- Note Search -------------------
+_SEARCH_TERM_RE = re.compile(r'\w+')
+
+def _fts_query(user_id, query):
+    """Build a safe FTS5 query: every word quoted and required, scoped to one user"""
+    terms = [f'"{term}"' for term in _SEARCH_TERM_RE.findall(query)]
+    if not terms:
+        return None
+    return f'owner:"u{int(user_id)}" AND {{topic content}}:({" ".join(terms)})'
+
+@timed('db.search_personal_notes')
+@cached_read('personal_notes')
+def search_personal_notes(user_id, query, limit=20):
+    """Full-text search of a user's notes, best BM25 match first.
+
+    Topic matches weigh more than content matches. Matched words are wrapped
+    in ** so the results render highlighted as Markdown.
+    """
+    if not user_id:
+        return []
+    match = _fts_query(user_id, query)
+    if not match:
+        return []
+    with transaction() as c:
+        c.execute('''SELECT n.id, highlight(notes_fts, 1, '**', '**'),
+                            snippet(notes_fts, 2, '**', '**', '…', 16), n.last_modified
+                     FROM notes_fts JOIN personal_notes n ON n.id = notes_fts.rowid
+                     WHERE notes_fts MATCH ? AND n.user_id = ?
+                     ORDER BY bm25(notes_fts, 0.0, 10.0, 1.0) LIMIT ?''', (match, user_id, limit))
+        return [{'id': row[0], 'topic': row[1], 'snippet': row[2], 'last_modified': row[3]}
+                for row in c.fetchall()]
+
+# ------------------- Progress Statistics -------------------
+@timed('db.get_progress_stats')
+@cached_read('study_goals', 'personal_notes', 'study_sessions')
+def get_progress_stats(user_id):
+    """Aggregate progress figures for the dashboard without loading any rows"""
+    stats = {'total_goals': 0, 'completed_goals': 0, 'completion_rate': 0.0,
+             'total_notes': 0, 'total_sessions': 0, 'average_score': None,
+             'average_percentage': None, 'recent_notes': []}
+    if not user_id:
+        return stats
+    with transaction() as c:
+        c.execute('''SELECT
+                       (SELECT COUNT(*) FROM study_goals WHERE user_id = :u),
+                       (SELECT COUNT(*) FROM study_goals WHERE user_id = :u AND completed),
+                       (SELECT COUNT(*) FROM personal_notes WHERE user_id = :u),
+                       (SELECT COUNT(*) FROM study_sessions WHERE user_id = :u),
+                       (SELECT AVG(score) FROM study_sessions WHERE user_id = :u),
+                       (SELECT AVG(100.0 * score / total_questions) FROM study_sessions
+                        WHERE user_id = :u AND total_questions > 0)''', {'u': user_id})
+        (stats['total_goals'], stats['completed_goals'], stats['total_notes'],
+         stats['total_sessions'], stats['average_score'], stats['average_percentage']) = c.fetchone()
+        c.execute('''SELECT topic, last_modified FROM personal_notes WHERE user_id = ?
+                     ORDER BY last_modified DESC LIMIT 5''', (user_id,))
+        stats['recent_notes'] = [{'topic': row[0], 'last_modified': row[1]} for row in c.fetchall()]
+    if stats['total_goals']:
+        stats['completion_rate'] = stats['completed_goals'] / stats['total_goals'] * 100
+    return stats
+
+# ------------------- Command Line -------------------
+def main(argv=None):
+    global DB_FILE
+    parser = argparse.ArgumentParser(description="Smart Study Buddy database maintenance")
+    parser.add_argument("--db", default=DB_FILE, help=f"database file (default: {DB_FILE})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("init", help="create the database or apply pending migrations")
+    commands.add_parser("version", help="print the schema version")
+    args = parser.parse_args(argv)
+
+    DB_FILE = args.db
+    if args.command == "init":
+        applied = init_db()
+        for version, description in applied:
+            print(f"applied {version}: {description}")
+        print(f"schema at version {schema_version()}" + ("" if applied else " (up to date)"))
+    else:
+        print(schema_version())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
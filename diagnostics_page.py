@@ -0,0 +1,65 @@
+"""Diagnostics page for administrators: stage timings, cache and SQL counters"""
+import streamlit as st
+import instrumentation
+from database import query_count, read_cache
+from pages import is_admin
+from utils import summary_cache
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+def show_diagnostics_page():
+    st.header("🩺 Diagnostics")
+    if not is_admin(st.session_state.get('username')):
+        st.error("Diagnostics are only available to administrators.")
+        return
+
+    recording = st.toggle("Record stage timings", value=instrumentation.is_enabled())
+    if recording != instrumentation.is_enabled():
+        instrumentation.enable() if recording else instrumentation.disable()
+
+    stages = instrumentation.snapshot()
+    if stages:
+        rows = [{'stage': name, 'calls': h['count'], 'total ms': _ms(h['total']), 'mean ms': _ms(h['mean']),
+                 'p50 ms': _ms(h['p50']), 'p95 ms': _ms(h['p95']), 'max ms': _ms(h['max'])}
+                for name, h in sorted(stages.items(), key=lambda item: -item[1]['total'])]
+        st.dataframe(rows, hide_index=True)
+    else:
+        st.info("No timings recorded yet. Enable recording and use the app.")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("SQL statements", query_count())
+    with col2:
+        read_stats = read_cache.stats()
+        st.metric("Read cache hits", f"{read_stats['hits']}/{read_stats['hits'] + read_stats['misses']}")
+    with col3:
+        summary_stats = summary_cache.stats()
+        st.metric("Summary cache hits", f"{summary_stats['hits']}/{summary_stats['hits'] + summary_stats['misses']}")
+
+    with st.expander("Cache details"):
+        st.json({'read_cache': read_stats, 'summary_cache': summary_stats})
+
+    st.subheader("Export")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button("Download JSON", instrumentation.to_json(), file_name="study_buddy_metrics.json",
+                           mime="application/json")
+    with col2:
+        st.download_button("Download Prometheus", instrumentation.to_prometheus(), file_name="study_buddy_metrics.prom",
+                           mime="text/plain")
+    with col3:
+        if st.button("Reset timings"):
+            instrumentation.reset()
+            st.rerun()
+
+    # Only the file the operator configured is written: a path typed here would be
+    # written with the server's permissions
+    if instrumentation.METRICS_FILE:
+        if st.button(f"Write {instrumentation.METRICS_FILE} now"):
+            try:
+                st.success(f"Metrics written to {instrumentation.export(instrumentation.METRICS_FILE)}")
+            except OSError as e:
+                st.error(f"Could not write metrics: {e}")
+    else:
+        st.caption("Set STUDY_BUDDY_METRICS_FILE to also write metrics to a file on the server.")
@@ -0,0 +1,52 @@
+"""Study Goals page"""
+import streamlit as st
+from database import add_study_goal, delete_goal, load_study_goals, mark_goal_complete
+
+def show_goals_page():
+    st.header("🎯 Study Goals")
+
+    goals = load_study_goals(st.session_state.user_id)
+    
+    with st.form("add_goal", clear_on_submit=True):
+        goal = st.text_input("Enter your study goal:")
+        submitted = st.form_submit_button("Add Goal")
+        if submitted:
+            if goal.strip():
+                if add_study_goal(goal, st.session_state.user_id):
+                    st.success("🎯 Goal added successfully!")
+                    st.rerun()
+                else:
+                    st.error("Failed to add goal. Please try again.")
+            else:
+                st.warning("Please enter a valid goal.")
+
+    if not goals:
+        st.info("📝 No goals set yet. Add your first study goal above!")
+    else:
+        st.subheader("Your Study Goals")
+        for goal in goals:
+            status = "✅" if goal['completed'] else "⏳"
+            cols = st.columns([4, 1, 1])
+            
+            with cols[0]:
+                st.write(f"{status} **{goal['goal']}**")
+                st.caption(f"Created: {goal['created_date']}")
+            
+            with cols[1]:
+                if not goal['completed']:
+                    if st.button("Mark Done", key=f"done_{goal['id']}"):
+                        if mark_goal_complete(goal['id'], st.session_state.user_id):
+                            st.success("✅ Goal completed!")
+                            st.rerun()
+                        else:
+                            st.error("Failed to update goal.")
+            
+            with cols[2]:
+                if st.button("Delete", key=f"del_{goal['id']}"):
+                    if delete_goal(goal['id'], st.session_state.user_id):
+                        st.success("🗑️ Goal deleted!")
+                        st.rerun()
+                    else:
+                        st.error("Failed to delete goal.")
+            
+            st.markdown("---")
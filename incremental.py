@@ -0,0 +1,238 @@
+"""Incremental re-summarization of an edited note.
+
+The text is cut into paragraph segments, each analyzed once and kept in a
+dict keyed by its text: its sentences, content scores, per-term counts and which
+sentences mention each term. On every update only new or changed paragraphs
+are analyzed; global term and sentence frequencies are adjusted by the
+difference, TF-IDF concepts are re-selected from those totals and the
+sentences are re-ranked from per-paragraph candidates.
+
+Concepts come from the TF-IDF extractor, whose statistics add up across
+paragraphs (POS tags depend on neighbouring words and do not), so
+``IncrementalSummarizer(text).summary(n)`` equals
+``generate_smart_summary(text, n, method='tfidf')``.
+"""
+import heapq
+import re
+from collections import Counter
+
+import numpy as np
+
+from instrumentation import timed
+from segmenter import ends_sentence
+from tfidf import NUM_CONCEPTS, build_matrix, term_weights, top_terms
+from utils import (analyze_document, content_score, create_basic_summary, finalize_points, position_score,
+                   simplify_sentence)
+
+_PARAGRAPH_RE = re.compile(r'\n\s*\n')
+# Whitespace that \s+ -> ' ' would change: runs of two or more, or one non-space character
+_WHITESPACE_RE = re.compile(r'\s{2,}|[^\S ]')
+
+def _normalize(paragraph):
+    return _WHITESPACE_RE.sub(' ', paragraph).strip(' ')
+
+def _merge_segments(paragraphs):
+    segments = []
+    pending = ''
+    for paragraph in paragraphs:
+        if not paragraph:
+            continue
+        pending = f"{pending} {paragraph}" if pending else paragraph
+        if ends_sentence(pending):
+            segments.append(pending)
+            pending = ''
+    if pending:
+        segments.append(pending)
+    return segments
+
+def split_segments(text):
+    """Whitespace-normalized paragraphs, merged until each ends a sentence.
+
+    Joining the segments with single spaces gives exactly the normalized
+    text the full summarizer works on, and no sentence crosses a segment.
+    """
+    return _merge_segments(_normalize(paragraph) for paragraph in _PARAGRAPH_RE.split(text))
+
+class _Segment:
+    """Analysis of one paragraph segment, independent of the rest of the text"""
+
+    def __init__(self, text):
+        analysis = analyze_document(text, key_concepts=[])
+        matrix = build_matrix(analysis)
+        self.sentences = [analysis.sentence(i) for i in range(len(analysis))]
+        self.content = [content_score(sentence) for sentence in self.sentences]
+        self.indices = {}
+        for i, sentence in enumerate(self.sentences):
+            self.indices.setdefault(sentence, []).append(i)
+        self.tf = Counter()
+        self.df = Counter()
+        self.postings = {}
+        for row, col, count in zip(matrix.rows.tolist(), matrix.cols.tolist(), matrix.counts.tolist()):
+            term = matrix.terms[col]
+            self.tf[term] += count
+            self.df[term] += 1
+            self.postings.setdefault(term, []).append(row)
+        self._concepts = None
+        self._present = None
+        self._ranked = None
+
+    def score(self, i, concepts):
+        """Content score plus 2 per distinct concept in sentence i"""
+        return self.content[i] + 2 * sum(i in self.postings.get(concept, ()) for concept in concepts)
+
+    def top(self, concepts, num_points):
+        """The num_points best (score, sentence, index) by score, ignoring position.
+
+        Cached per set of concepts that occur in this segment, so a change of
+        concepts the segment does not mention keeps its ranking.
+        """
+        if concepts == self._concepts and num_points == len(self._ranked):
+            return self._ranked
+        present = frozenset(concept for concept in concepts if concept in self.postings)
+        if present != self._present or num_points != len(self._ranked):
+            scores = list(self.content)
+            for concept in present:
+                for i in self.postings[concept]:
+                    scores[i] += 2
+            self._ranked = heapq.nlargest(num_points, zip(scores, self.sentences, range(len(scores))))
+            self._present = present
+        self._concepts = concepts
+        return self._ranked
+
+class IncrementalSummarizer:
+    """Keeps the analysis of one evolving text so each edit only costs its changed paragraphs"""
+
+    def __init__(self, text=''):
+        self._segments = {}  # segment text -> _Segment
+        self._normalized = {}  # raw paragraph -> normalized paragraph, for the current text
+        self._order = []
+        self._tf = Counter()
+        self._df = Counter()
+        self._occurrences = Counter()  # sentence text -> occurrences in the whole text
+        self.sentence_count = 0
+        self.text = ''
+        self.analyzed_segments = 0
+        self.update(text)
+
+    def _apply(self, segment, sign):
+        for counts, totals in ((segment.tf, self._tf), (segment.df, self._df)):
+            for term, count in counts.items():
+                total = totals[term] + sign * count
+                if total:
+                    totals[term] = total
+                else:
+                    del totals[term]
+        for sentence in segment.sentences:
+            self._occurrences[sentence] += sign
+        self.sentence_count += sign * len(segment.sentences)
+
+    @timed('incremental.update')
+    def update(self, text):
+        """Replace the text, analyzing only paragraphs not seen in the current version"""
+        previous, self._normalized = self._normalized, {}
+        paragraphs = []
+        for raw in _PARAGRAPH_RE.split(text):
+            paragraph = previous.get(raw)
+            if paragraph is None:
+                paragraph = _normalize(raw)
+            self._normalized[raw] = paragraph
+            paragraphs.append(paragraph)
+
+        order = _merge_segments(paragraphs)
+        for key in order:
+            if key not in self._segments:
+                self._segments[key] = _Segment(key)
+                self.analyzed_segments += 1
+        before, after = Counter(self._order), Counter(order)
+        for key, times in (after - before).items():
+            for _ in range(times):
+                self._apply(self._segments[key], 1)
+        for key, times in (before - after).items():
+            for _ in range(times):
+                self._apply(self._segments[key], -1)
+        for key in before.keys() - after.keys():
+            del self._segments[key]
+        self._order = order
+        self.text = text
+
+    def key_concepts(self, k=NUM_CONCEPTS):
+        """Top-k TF-IDF concepts of the whole text, from the running totals"""
+        if not self._tf:
+            return ()
+        terms = list(self._tf)
+        tf = np.array([self._tf[term] for term in terms], dtype=np.float64)
+        df = np.array([self._df[term] for term in terms], dtype=np.int64)
+        return tuple(terms[i] for i in top_terms(terms, term_weights(tf, df, self.sentence_count), k))
+
+    def _position_bonuses(self, segments):
+        """Bonus per (segment position, sentence index) for the opening and closing sentences.
+
+        Like base_scores, a repeated sentence takes the bonus of its first
+        occurrence; only sentences that do repeat need a scan of the segments.
+        """
+        count = self.sentence_count
+        special = []  # (global index, segment position, sentence index)
+        for p, segment in enumerate(segments):
+            for i in range(min(len(segment.sentences), 3 - len(special))):
+                special.append((len(special), p, i))
+            if len(special) == 3:
+                break
+        for p in range(len(segments) - 1, -1, -1):
+            if segments[p].sentences:
+                special.append((count - 1, p, len(segments[p].sentences) - 1))
+                break
+
+        bonuses = {}
+        done = set()
+        for index, p, i in special:
+            sentence = segments[p].sentences[i]
+            if sentence in done:
+                continue
+            done.add(sentence)
+            if self._occurrences[sentence] == 1:
+                bonus = position_score(index, count)
+                if bonus:
+                    bonuses[(p, i)] = bonus
+                continue
+            offset = 0
+            bonus = None
+            for q, segment in enumerate(segments):
+                indices = segment.indices.get(sentence)
+                if indices:
+                    if bonus is None:
+                        bonus = position_score(offset + indices[0], count)
+                    if not bonus:
+                        break
+                    for j in indices:
+                        bonuses[(q, j)] = bonus
+                offset += len(segment.sentences)
+        return bonuses
+
+    @timed('incremental.summary')
+    def summary(self, num_points=5):
+        """Key points of the current text, as generate_smart_summary(text, num_points, method='tfidf')"""
+        segments = [self._segments[key] for key in self._order]
+        if self.sentence_count <= num_points:
+            points = [simplify_sentence(sentence) for segment in segments for sentence in segment.sentences]
+        else:
+            concepts = self.key_concepts()
+            bonuses = self._position_bonuses(segments)
+            bonused = {p for p, i in bonuses}
+            candidates = []
+            for p, segment in enumerate(segments):
+                ranked = segment.top(concepts, num_points)
+                if p not in bonused:
+                    candidates.extend(ranked)
+                    continue
+                # Re-rank a segment holding bonus sentences with the bonuses added
+                for score, sentence, i in ranked:
+                    if (p, i) not in bonuses:
+                        candidates.append((score, sentence, i))
+                for (q, i), bonus in bonuses.items():
+                    if q == p:
+                        candidates.append((segment.score(i, concepts) + bonus, segment.sentences[i], i))
+            best = heapq.nlargest(num_points, candidates)
+            points = finalize_points([sentence for score, sentence, i in best], num_points)
+        if not points or len(points) < 2:
+            return create_basic_summary(self.text, num_points)
+        return points
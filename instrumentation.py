@@ -0,0 +1,161 @@
+"""Lightweight timing instrumentation for summaries and database calls.
+
+``@timed()`` and ``with stage(name):`` record wall-clock durations into
+in-memory histograms keyed by stage name. Recording is off unless
+STUDY_BUDDY_INSTRUMENTATION=1 (or ``enable()`` is called); while off, a
+timed call costs one flag check and ``stage`` returns a shared no-op context
+manager. Snapshots export as JSON or Prometheus text; with
+STUDY_BUDDY_METRICS_FILE set they are also written there at exit.
+"""
+import atexit
+import bisect
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+METRICS_FILE = os.environ.get("STUDY_BUDDY_METRICS_FILE")
+METRIC_NAME = "study_buddy_stage_duration_seconds"
+
+# Upper bounds in seconds, 1-2.5-5 steps from 1 us to 50 s
+BUCKETS = tuple(float(f"{m}e{e}") for e in range(-6, 2) for m in (1, 2.5, 5))
+
+_enabled = os.environ.get("STUDY_BUDDY_INSTRUMENTATION", "").lower() in ("1", "true", "yes")
+_lock = threading.Lock()
+_histograms = {}
+
+class Histogram:
+    """Call count, total, extremes and fixed-bucket counts of observed durations"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last bucket is +Inf
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (capped at the maximum seen)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {'count': self.count, 'total': self.total, 'mean': self.total / self.count if self.count else None,
+                'min': self.min if self.count else None, 'max': self.max, 'p50': self.quantile(0.5),
+                'p95': self.quantile(0.95), 'p99': self.quantile(0.99),
+                'buckets': dict(zip([*map(repr, BUCKETS), '+Inf'], self.buckets))}
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def record(name, seconds):
+    """Add one observation to the histogram for name"""
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+def timed(name=None):
+    """Decorator recording each call's duration under name (default module.qualname)"""
+    def decorate(func):
+        metric = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(metric, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+class _Stage:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+_NULL_STAGE = contextlib.nullcontext()
+
+def stage(name):
+    """Context manager recording the duration of its block under name"""
+    return _Stage(name) if _enabled else _NULL_STAGE
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+def snapshot():
+    """Summaries of every recorded stage, keyed by name"""
+    with _lock:
+        return {name: histogram.summary() for name, histogram in sorted(_histograms.items())}
+
+def to_json():
+    return json.dumps({'enabled': _enabled, 'stages': snapshot()}, indent=2)
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def to_prometheus():
+    """Snapshot in the Prometheus text exposition format, one histogram per stage"""
+    lines = [f"# HELP {METRIC_NAME} Wall-clock time spent per instrumented stage.",
+             f"# TYPE {METRIC_NAME} histogram"]
+    with _lock:
+        for name, histogram in sorted(_histograms.items()):
+            label = f'stage="{_label(name)}"'
+            cumulative = 0
+            for bound, count in zip([*map(repr, BUCKETS), '+Inf'], histogram.buckets):
+                cumulative += count
+                lines.append(f'{METRIC_NAME}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_sum{{{label}}} {histogram.total!r}')
+            lines.append(f'{METRIC_NAME}_count{{{label}}} {histogram.count}')
+    return "\n".join(lines) + "\n"
+
+def export(path, fmt=None):
+    """Write a snapshot to path; fmt is 'json' or 'prometheus' (default: by extension)"""
+    fmt = fmt or ('json' if str(path).endswith('.json') else 'prometheus')
+    text = to_json() if fmt == 'json' else to_prometheus()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return path
+
+if METRICS_FILE:
+    atexit.register(export, METRICS_FILE)
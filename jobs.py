@@ -0,0 +1,335 @@
+"""Background summarization jobs with a persistent SQLite queue.
+
+Large pastes are summarized outside the Streamlit script: the page submits a
+job row and returns at once, a local worker pool claims queued jobs and
+saves each result as a draft note, and the page polls the job status.
+Jobs are deduplicated per user by a hash of the normalized text. Claims
+respect a per-user and a global limit on running jobs, counted in the
+database so separate worker processes share them. A running job holds a
+lease its worker keeps renewing; if the worker dies (or the app restarts)
+the lease runs out and the job is queued again.
+
+    python jobs.py worker --workers 2
+    python jobs.py status
+"""
+import argparse
+import atexit
+import multiprocessing
+import os
+import re
+import socket
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from batch import _summarize_one, _warm_up
+from database import cached_read, read_cache, transaction
+from instrumentation import timed
+from summary_cache import content_key
+
+# Worker threads started inside the app process; 0 leaves jobs to `python jobs.py worker`
+JOB_WORKERS = int(os.environ.get("STUDY_BUDDY_JOB_WORKERS", "2"))
+JOB_USER_LIMIT = int(os.environ.get("STUDY_BUDDY_JOB_USER_LIMIT", "1"))
+JOB_GLOBAL_LIMIT = int(os.environ.get("STUDY_BUDDY_JOB_GLOBAL_LIMIT", "4"))
+JOB_QUEUE_LIMIT = int(os.environ.get("STUDY_BUDDY_JOB_QUEUE_LIMIT", "10"))
+# Pasted texts at least this long are summarized in the background
+JOB_MIN_CHARS = int(os.environ.get("STUDY_BUDDY_JOB_MIN_CHARS", "20000"))
+JOB_LEASE_SECONDS = 30
+JOB_MAX_ATTEMPTS = 3
+POLL_INTERVAL = 1.0
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+class JobQueueFullError(Exception):
+    """The user already has JOB_QUEUE_LIMIT jobs waiting"""
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def _job(row):
+    return {'id': row[0], 'status': row[1], 'num_points': row[2], 'note_id': row[3], 'error': row[4],
+            'created_date': row[5], 'started_date': row[6], 'finished_date': row[7]}
+
+_JOB_COLUMNS = 'id, status, num_points, note_id, error, created_date, started_date, finished_date'
+
+# ------------------- Submitting and Polling -------------------
+@timed('jobs.submit')
+def submit_summary_job(user_id, text, num_points=5):
+    """Queue text for summarization and return the job id.
+
+    Submitting the same text again returns the pending or finished job
+    instead of a new one (unless it failed, was cancelled or its draft note
+    was deleted).
+    Raises JobQueueFullError when the user has too many jobs waiting.
+    """
+    if not user_id:
+        return None
+    content_hash = content_key(re.sub(r'\s+', ' ', text).strip())
+    with transaction() as c:
+        c.execute('BEGIN IMMEDIATE')
+        c.execute('''SELECT id FROM summary_jobs
+                     WHERE user_id = ? AND content_hash = ? AND num_points = ?
+                       AND status NOT IN ('failed', 'cancelled')
+                       AND (note_id IS NULL OR note_id IN (SELECT id FROM personal_notes))
+                     ORDER BY id DESC LIMIT 1''', (user_id, content_hash, num_points))
+        row = c.fetchone()
+        if row:
+            return row[0]
+        c.execute("SELECT COUNT(*) FROM summary_jobs WHERE status = 'queued' AND user_id = ?", (user_id,))
+        if c.fetchone()[0] >= JOB_QUEUE_LIMIT:
+            raise JobQueueFullError("You already have several summaries waiting, please try again when they finish.")
+        c.execute('''INSERT INTO summary_jobs (user_id, content_hash, num_points, text, status, created_date)
+                     VALUES (?, ?, ?, ?, 'queued', ?)''', (user_id, content_hash, num_points, text, _now()))
+        job_id = c.lastrowid
+    read_cache.invalidate(user_id, ('summary_jobs',))
+    _wake_workers()
+    return job_id
+
+def get_job(job_id, user_id):
+    """Status of one of the user's jobs, or None"""
+    if not user_id:
+        return None
+    with transaction() as c:
+        c.execute(f'SELECT {_JOB_COLUMNS} FROM summary_jobs WHERE id = ? AND user_id = ?', (job_id, user_id))
+        row = c.fetchone()
+    return _job(row) if row else None
+
+@cached_read('summary_jobs')
+def list_jobs(user_id, limit=5):
+    """The user's most recent jobs, newest first; poll with list_jobs.uncached to see progress"""
+    if not user_id:
+        return []
+    with transaction() as c:
+        c.execute(f'SELECT {_JOB_COLUMNS} FROM summary_jobs WHERE user_id = ? ORDER BY id DESC LIMIT ?',
+                  (user_id, limit))
+        return [_job(row) for row in c.fetchall()]
+
+def cancel_job(job_id, user_id):
+    """Drop a job that has not started yet; returns whether it was cancelled"""
+    if not user_id:
+        return False
+    with transaction() as c:
+        c.execute('''UPDATE summary_jobs SET status = 'cancelled', text = NULL, finished_date = ?
+                     WHERE id = ? AND user_id = ? AND status = 'queued' ''', (_now(), job_id, user_id))
+        cancelled = c.rowcount == 1
+    read_cache.invalidate(user_id, ('summary_jobs',))
+    return cancelled
+
+def job_counts():
+    """Number of jobs per status"""
+    with transaction() as c:
+        c.execute('SELECT status, COUNT(*) FROM summary_jobs GROUP BY status')
+        return dict(c.fetchall())
+
+# ------------------- Claiming and Finishing -------------------
+def claim_job(worker, user_limit=None, global_limit=None):
+    """Lease the oldest queued job whose user is under the running limits, or return None"""
+    user_limit = user_limit or JOB_USER_LIMIT
+    global_limit = global_limit or JOB_GLOBAL_LIMIT
+    with transaction() as c:
+        # Only take the write lock when there is something to claim
+        c.execute("SELECT 1 FROM summary_jobs WHERE status = 'queued' LIMIT 1")
+        if not c.fetchone():
+            return None
+        c.execute('BEGIN IMMEDIATE')
+        c.execute('''SELECT j.id, j.text, j.num_points FROM summary_jobs j
+                     WHERE j.status = 'queued'
+                       AND (SELECT COUNT(*) FROM summary_jobs r
+                            WHERE r.status = 'running' AND r.user_id = j.user_id) < ?
+                       AND (SELECT COUNT(*) FROM summary_jobs WHERE status = 'running') < ?
+                     ORDER BY j.id LIMIT 1''', (user_limit, global_limit))
+        row = c.fetchone()
+        if not row:
+            return None
+        c.execute('''UPDATE summary_jobs SET status = 'running', worker = ?, lease_until = ?,
+                     attempts = attempts + 1, started_date = ? WHERE id = ?''',
+                  (worker, time.time() + JOB_LEASE_SECONDS, _now(), row[0]))
+    return {'id': row[0], 'text': row[1], 'num_points': row[2]}
+
+def renew_leases(worker):
+    """Extend the leases of every job the worker is running"""
+    with transaction() as c:
+        c.execute("UPDATE summary_jobs SET lease_until = ? WHERE worker = ? AND status = 'running'",
+                  (time.time() + JOB_LEASE_SECONDS, worker))
+
+def requeue_expired():
+    """Queue again running jobs whose worker stopped renewing; give up after JOB_MAX_ATTEMPTS"""
+    now = time.time()
+    with transaction() as c:
+        c.execute('''UPDATE summary_jobs SET status = 'failed', error = 'worker stopped', text = NULL,
+                     finished_date = ? WHERE status = 'running' AND lease_until < ? AND attempts >= ?''',
+                  (_now(), now, JOB_MAX_ATTEMPTS))
+        c.execute('''UPDATE summary_jobs SET status = 'queued', worker = NULL
+                     WHERE status = 'running' AND lease_until < ?''', (now,))
+        return c.rowcount
+
+def _draft_note(points):
+    return (f"Draft: Summary - {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+            "**Key Points:**\n\n" + "\n".join(f"• {point}" for point in points))
+
+def finish_job(job_id, worker, points=None, error=None):
+    """Record a job's outcome; on success its key points become a draft note.
+
+    A summary without key points leaves the job done with no note_id instead
+    of an empty draft. Nothing is written if the worker no longer holds the
+    job: its lease ran out, whether or not another worker has taken it over.
+    """
+    now = _now()
+    if error is None and points:
+        from similarity import index_notes, signature
+        topic, content = _draft_note(points)
+        note_signature = signature(content)
+    with transaction() as c:
+        # Lease check and status change in one statement, which also takes the write lock:
+        # requeue_expired() cannot hand the job to another worker in between
+        c.execute('''UPDATE summary_jobs SET status = ?, error = ?, text = NULL, finished_date = ?
+                     WHERE id = ? AND worker = ? AND status = 'running' AND lease_until > ?''',
+                  ('done' if error is None else 'failed', error, now, job_id, worker, time.time()))
+        if c.rowcount != 1:
+            return False
+        c.execute('SELECT user_id FROM summary_jobs WHERE id = ?', (job_id,))
+        user_id = c.fetchone()[0]
+        if error is None and points:
+            c.execute('''INSERT INTO personal_notes (user_id, topic, content, created_date, last_modified)
+                         VALUES (?, ?, ?, ?, ?)''', (user_id, topic, content, now, now))
+            note_id = c.lastrowid
+            index_notes(c, user_id, [(note_id, note_signature)])
+            c.execute('UPDATE summary_jobs SET note_id = ? WHERE id = ?', (note_id, job_id))
+    read_cache.invalidate(user_id, ('summary_jobs', 'personal_notes'))
+    return True
+
+# ------------------- Worker Pool -------------------
+class JobWorkerPool:
+    """Claims jobs from the queue and summarizes them on a process pool.
+
+    One dispatcher thread polls the queue (and wakes up early on local
+    submits), keeps at most `workers` jobs in flight, renews their leases
+    and writes results back as the processes finish.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, poll_interval=POLL_INTERVAL):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.completed = 0
+        self.failed = 0
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._executor = None
+        self._thread = None
+
+    def start(self):
+        # spawn, not fork: the app process has Streamlit and database threads running
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        self._thread = threading.Thread(target=self._run, name="summary-jobs", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, wait=False):
+        """Stop claiming jobs; unfinished ones are picked up again once their lease expires"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def wake(self):
+        self._wake.set()
+
+    def idle(self):
+        with self._lock:
+            return not self._in_flight
+
+    def _run(self):
+        last_renewal = 0.0
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() - last_renewal >= JOB_LEASE_SECONDS / 3:
+                    renew_leases(self.worker_id)
+                    requeue_expired()
+                    last_renewal = time.monotonic()
+                while len(self._in_flight) < self.workers and not self._stop.is_set():
+                    job = claim_job(self.worker_id)
+                    if job is None:
+                        break
+                    self._submit(job)
+            except Exception as e:  # e.g. the database is locked; retry on the next poll
+                print(f"summary jobs: {type(e).__name__}: {e}", file=sys.stderr)
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _submit(self, job):
+        with self._lock:
+            self._in_flight.add(job['id'])
+        future = self._executor.submit(_summarize_one, job['id'], job['text'], job['num_points'])
+        future.add_done_callback(lambda f, job_id=job['id']: self._finished(job_id, f))
+
+    def _finished(self, job_id, future):
+        try:
+            result = future.result()
+        except Exception as e:  # the worker process died or the pool shut down
+            result = {'points': None, 'error': f"{type(e).__name__}: {e}"}
+        if not self._stop.is_set():
+            try:
+                finish_job(job_id, self.worker_id, result['points'], result['error'])
+            except Exception as e:
+                print(f"summary jobs: job {job_id}: {type(e).__name__}: {e}", file=sys.stderr)
+            if result['error']:
+                self.failed += 1
+            else:
+                self.completed += 1
+        with self._lock:
+            self._in_flight.discard(job_id)
+        self._wake.set()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def ensure_worker_pool():
+    """Start the in-app worker pool once per process (unless STUDY_BUDDY_JOB_WORKERS=0)"""
+    global _pool
+    if JOB_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = JobWorkerPool().start()
+            atexit.register(_pool.stop)
+        return _pool
+
+def _wake_workers():
+    if _pool is not None:
+        _pool.wake()
+
+# ------------------- Command Line -------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run or inspect background summarization jobs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    worker = commands.add_parser("worker", help="process queued jobs until interrupted")
+    worker.add_argument("--workers", type=int, default=max(JOB_WORKERS, 1), help="concurrent summaries")
+    commands.add_parser("status", help="print the number of jobs per status")
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        for status, count in sorted(job_counts().items()):
+            print(f"{status}: {count}")
+        return 0
+
+    pool = JobWorkerPool(args.workers).start()
+    print(f"worker {pool.worker_id} running {args.workers} at a time; Ctrl+C to stop", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pool.stop()
+    print(f"completed {pool.completed}, failed {pool.failed}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""Learn & Summarize page: inline summaries and background summary jobs"""
+import os
+import shutil
+import tempfile
+import streamlit as st
+from contextlib import contextmanager
+from datetime import datetime
+from database import get_personal_note, read_cache
+from jobs import ACTIVE_STATUSES, JOB_MIN_CHARS, JobQueueFullError, cancel_job, get_job, list_jobs, submit_summary_job
+from pages import reset_note_listing
+from streaming import summarize_stream
+from utils import generate_smart_summary
+
+# Same as server.maxUploadSize in .streamlit/config.toml, which Streamlit only reads when
+# started from this directory; checked here too so the cap holds either way
+MAX_UPLOAD_MB = 500
+COPY_CHUNK = 2**20
+
+@contextmanager
+def _copied_to_disk(uploaded_file):
+    """Path of a temporary copy of the upload, written COPY_CHUNK bytes at a time and removed afterwards"""
+    uploaded_file.seek(0)
+    with tempfile.NamedTemporaryFile(suffix='.txt', delete=False) as copy:
+        shutil.copyfileobj(uploaded_file, copy, COPY_CHUNK)
+    try:
+        yield copy.name
+    finally:
+        os.remove(copy.name)
+
+def show_learn_summarize_page():
+    st.header("📖 Learn & Summarize")
+    
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        user_text = st.text_area("Paste your study material:", height=200, 
+                               placeholder="Enter your notes, textbook content, or any study material here...")
+        uploaded_file = st.file_uploader("...or upload a text file", type=["txt", "md"])
+        
+        num_points = st.slider("Summarize into how many key points?", min_value=3, max_value=10, value=5)
+        
+        if st.button("🎯 Generate Smart Summary", type="primary"):
+            if uploaded_file is None and user_text.strip() == "":
+                st.warning("Please enter some text first!")
+            elif uploaded_file is not None and uploaded_file.size > MAX_UPLOAD_MB * 2**20:
+                st.warning(f"That file is too large. Please upload at most {MAX_UPLOAD_MB} MB.")
+            elif uploaded_file is None and len(user_text) >= JOB_MIN_CHARS:
+                # Long pastes are summarized by the job workers so the page stays responsive
+                try:
+                    job_id = submit_summary_job(st.session_state.user_id, user_text, num_points)
+                    _show_submitted(get_job(job_id, st.session_state.user_id))
+                except JobQueueFullError as e:
+                    st.warning(str(e))
+            else:
+                with st.spinner("Analyzing and creating simple summary..."):
+                    if uploaded_file is not None:
+                        # Streamlit itself still holds the whole upload in memory (an UploadedFile is
+                        # a BytesIO, up to MAX_UPLOAD_MB); the summarizer reads a disk copy chunk by
+                        # chunk, so its own working set does not grow with the file
+                        progress_bar = st.progress(0.0, text="Reading file...")
+                        with _copied_to_disk(uploaded_file) as path:
+                            points = summarize_stream(path, num_points,
+                                                      progress=lambda done: progress_bar.progress(done, text="Reading file..."))
+                        progress_bar.empty()
+                    else:
+                        points = generate_smart_summary(user_text, num_points)
+                    
+                    st.subheader("✨ Simple & Clear Summary")
+                    st.success("Here are the main points in simple language:")
+                    
+                    for i, point in enumerate(points, 1):
+                        st.write(f"**{i}.** {point}")
+                    
+                    if points:
+                        summary_topic = f"Summary - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+                        summary_content = "**Key Points:**\n\n" + "\n".join([f"• {point}" for point in points])
+                        st.session_state.current_note_topic = summary_topic
+                        st.session_state.current_note_content = summary_content
+                        
+                        st.info("💡 **Summary ready!** Go to 'My Notes' to save these points and add your own thoughts.")
+    
+        _show_summary_jobs()
+    
+    with col2:
+        st.subheader("💡 Study Guide")
+        st.info("""
+        **How to use this effectively:**
+        
+        1. **Paste** your study material
+        2. **Generate** key points summary
+        3. **Write notes** in your own words
+        4. **Review** regularly
+        
+        **Pro Tip:** Use the summary as a starting point for your personal notes!
+        """)
+
+JOB_LABELS = {'queued': "⏳ Waiting", 'running': "⚙️ Summarizing", 'done': "✅ Saved as draft note",
+              'failed': "❌ Failed", 'cancelled': "🚫 Cancelled"}
+
+def _show_submitted(job):
+    """Say what a submit did; the same text may already have a finished job, which is reused"""
+    if job is None or job['status'] in ACTIVE_STATUSES:
+        st.info("⏳ Summarizing in the background. The key points will be saved as a draft in 'My Notes'.")
+        return
+    note = job['note_id'] and get_personal_note(job['note_id'], st.session_state.user_id)
+    if note:
+        reset_note_listing()  # so the listing includes the draft
+        st.session_state.open_note = note  # shown expanded on 'My Notes'
+        st.success(f"✅ Already summarized: the key points are in the draft '{note['topic']}' in 'My Notes'.")
+    else:
+        st.info("ℹ️ Already summarized: no key points were found in this text.")
+
+def _job_list(jobs):
+    for job in jobs:
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            label = JOB_LABELS.get(job['status'], job['status'])
+            if job['status'] == 'done' and job['note_id'] is None:
+                label = "ℹ️ No key points found"
+            if job['status'] == 'failed' and job['error']:
+                label += f": {job['error']}"
+            st.write(f"**{job['created_date']}** ({job['num_points']} points) — {label}")
+        with col2:
+            if job['status'] == 'queued' and st.button("Cancel", key=f"cancel_job_{job['id']}"):
+                cancel_job(job['id'], st.session_state.user_id)
+                st.rerun()
+
+@st.fragment(run_every=2)
+def _poll_summary_jobs():
+    jobs = list_jobs.uncached(st.session_state.user_id)
+    _job_list(jobs)
+    if not any(job['status'] in ACTIVE_STATUSES for job in jobs):
+        # Finished: refresh the whole page once, which also stops the polling. The job may
+        # have run in another worker process, whose writes the read cache cannot see.
+        read_cache.invalidate(st.session_state.user_id, ('summary_jobs', 'personal_notes'))
+        reset_note_listing()
+        st.rerun()
+
+def _show_summary_jobs():
+    """Recent background summaries; the list refreshes itself while any of them is pending"""
+    jobs = list_jobs(st.session_state.user_id)
+    if not jobs:
+        return
+    st.subheader("🗂️ Background Summaries")
+    if any(job['status'] in ACTIVE_STATUSES for job in jobs):
+        _poll_summary_jobs()
+    else:
+        _job_list(jobs)
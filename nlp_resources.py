@@ -0,0 +1,168 @@
+"""Offline NLTK resource manager.
+
+NLTK data is looked up in a local directory only and is never downloaded at
+runtime. The tokenizer, tagger and stopword set are loaded lazily on first use
+and shared by every caller in the process. Populate the directory once, e.g.
+during an image build, with:
+
+    python nlp_resources.py prefetch
+"""
+import argparse
+import os
+import sys
+import threading
+
+from instrumentation import timed
+
+NLTK_DATA_DIR = os.environ.get(
+    "STUDY_BUDDY_NLTK_DATA",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "nltk_data"),
+)
+
+# Logical resource -> NLTK packages that provide it (newer NLTK releases renamed some)
+RESOURCES = {
+    "punkt": ("punkt_tab", "punkt"),
+    "averaged_perceptron_tagger": ("averaged_perceptron_tagger_eng", "averaged_perceptron_tagger"),
+    "stopwords": ("stopwords",),
+}
+
+PACKAGE_PATHS = {
+    "punkt_tab": "tokenizers/punkt_tab",
+    "punkt": "tokenizers/punkt",
+    "averaged_perceptron_tagger_eng": "taggers/averaged_perceptron_tagger_eng",
+    "averaged_perceptron_tagger": "taggers/averaged_perceptron_tagger",
+    "stopwords": "corpora/stopwords",
+}
+
+_lock = threading.Lock()
+_available = {}
+_loaded = {}
+
+def _nltk():
+    """Import nltk with the local data directory searched first"""
+    import nltk
+    if NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+    return nltk
+
+def _find_local(nltk, resource):
+    for package in RESOURCES[resource]:
+        try:
+            nltk.data.find(PACKAGE_PATHS[package])
+            return True
+        except LookupError:
+            continue
+    return False
+
+def is_available(resource):
+    """Check once per process whether a resource is installed locally"""
+    if resource not in _available:
+        with _lock:
+            if resource not in _available:
+                try:
+                    _available[resource] = _find_local(_nltk(), resource)
+                except ImportError:
+                    _available[resource] = False
+    return _available[resource]
+
+def missing_resources():
+    return [resource for resource in RESOURCES if not is_available(resource)]
+
+def _load(resource, loader):
+    try:
+        return _loaded[resource]
+    except KeyError:
+        pass
+    if not is_available(resource):
+        raise LookupError(f"NLTK resource '{resource}' not found in {NLTK_DATA_DIR}; "
+                          f"run 'python nlp_resources.py prefetch'")
+    with _lock:
+        if resource not in _loaded:
+            _loaded[resource] = loader()
+    return _loaded[resource]
+
+def _load_tokenizer():
+    _nltk()
+    from nltk.tokenize import word_tokenize
+    return word_tokenize
+
+def _load_tagger():
+    _nltk()
+    from nltk.tag.perceptron import PerceptronTagger
+    return PerceptronTagger()
+
+def _load_stopwords():
+    _nltk()
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words('english'))
+
+# ------------------- Lazy NLTK Accessors -------------------
+@timed('nltk.word_tokenize')
+def word_tokenize(text):
+    """nltk.word_tokenize backed by the local punkt model"""
+    return _load("punkt", _load_tokenizer)(text)
+
+@timed('nltk.pos_tag')
+def pos_tag(tokens):
+    """POS-tag tokens with a single shared perceptron tagger instance"""
+    return _load("averaged_perceptron_tagger", _load_tagger).tag(tokens)
+
+def stopword_set():
+    """English stopwords as a frozenset, loaded once"""
+    return _load("stopwords", _load_stopwords)
+
+# ------------------- CLI -------------------
+def prefetch(data_dir=NLTK_DATA_DIR):
+    """Download every resource into data_dir; the only code path that uses the network"""
+    import nltk
+    os.makedirs(data_dir, exist_ok=True)
+    ok = True
+    for resource, packages in RESOURCES.items():
+        # Fetch every alias; which one is used depends on the installed NLTK version
+        results = [nltk.download(package, download_dir=data_dir, quiet=True, raise_on_error=False)
+                   for package in packages]
+        if not any(results):
+            print(f"failed to download {resource}", file=sys.stderr)
+            ok = False
+    return ok
+
+def check_offline_import(module="utils"):
+    """Import a module with sockets disabled; return True if no socket was opened"""
+    import importlib
+    import socket
+
+    opened = []
+    original = socket.socket
+
+    class _NoSocket(original):
+        def __init__(self, *args, **kwargs):
+            opened.append(args)
+            raise OSError("network access during import")
+
+    socket.socket = _NoSocket
+    try:
+        importlib.import_module(module)
+    finally:
+        socket.socket = original
+    return not opened
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local NLTK data used by Smart Study Buddy")
+    commands = parser.add_subparsers(dest="command", required=True)
+    prefetch_cmd = commands.add_parser("prefetch", help="download NLTK data for offline use")
+    prefetch_cmd.add_argument("--dir", default=NLTK_DATA_DIR, help="target data directory")
+    commands.add_parser("check", help="report missing resources and verify imports stay offline")
+    args = parser.parse_args(argv)
+
+    if args.command == "prefetch":
+        return 0 if prefetch(args.dir) else 1
+
+    missing = missing_resources()
+    print(f"data dir: {NLTK_DATA_DIR}")
+    print("missing: " + (", ".join(missing) if missing else "none"))
+    offline = check_offline_import()
+    print("import opened a socket" if not offline else "import is offline")
+    return 0 if offline and not missing else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
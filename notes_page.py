@@ -0,0 +1,187 @@
+"""My Notes page: writing, searching, paging and bulk transfer of personal notes"""
+import streamlit as st
+import io
+from bulk import detect_format, export_notes, import_notes, read_records
+from database import (delete_personal_note, get_personal_note, list_personal_notes, save_personal_note,
+                      search_personal_notes, update_personal_note)
+from incremental import IncrementalSummarizer
+from pages import reset_note_listing
+from similarity import backfill, find_duplicates, find_similar_notes
+
+def _load_more_notes():
+    notes, cursor = list_personal_notes(st.session_state.user_id, st.session_state.notes_cursor)
+    st.session_state.listed_notes = st.session_state.listed_notes + notes
+    st.session_state.notes_cursor = cursor
+
+def _show_note_transfer():
+    """Bulk upload and download of notes as JSONL or CSV"""
+    with st.expander("📦 Import / Export Notes"):
+        uploaded = st.file_uploader("Import notes (JSONL or CSV with topic and content columns)",
+                                    type=["jsonl", "json", "csv"], key="notes_import_file")
+        if uploaded is not None and st.button("📥 Import notes"):
+            result = import_notes(st.session_state.user_id, read_records(uploaded, detect_format(uploaded.name)))
+            st.success(f"✅ Imported {result['imported']} notes")
+            if result['imported']:
+                with st.spinner("Indexing the imported notes for similar-note lookup..."):
+                    backfill(st.session_state.user_id)
+            if result['skipped']:
+                st.warning(f"Skipped {result['skipped']} records:\n\n" + "\n\n".join(result['errors']))
+            reset_note_listing()
+
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            fmt = st.radio("Export format", ["jsonl", "csv"], horizontal=True, key="notes_export_format")
+        with col2:
+            if st.button("📤 Prepare export"):
+                buffer = io.StringIO()
+                count = export_notes(st.session_state.user_id, buffer, fmt)
+                st.session_state.notes_export = (f"my_notes.{fmt}", buffer.getvalue(), count)
+        if st.session_state.notes_export:
+            name, data, count = st.session_state.notes_export
+            st.download_button(f"⬇️ Download {count} notes ({name})", data, file_name=name,
+                               mime="text/csv" if name.endswith(".csv") else "application/jsonl")
+
+def show_notes_page():
+    st.header("📝 My Personal Notes")
+    
+    # Only note metadata and previews are kept per session; full content is
+    # fetched for the one note being read or edited.
+    if 'listed_notes' not in st.session_state:
+        reset_note_listing()
+    
+    st.subheader("✍️ Write New Note")
+    
+    with st.form("note_form"):
+        topic = st.text_input("Note Topic/Title:", 
+                            value=st.session_state.current_note_topic,
+                            placeholder="e.g., Python Functions Summary")
+        content = st.text_area("Your Notes:", 
+                             height=300,
+                             value=st.session_state.current_note_content,
+                             placeholder="Write your understanding, key insights, or reflections here...")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            save_btn = st.form_submit_button("💾 Save Note")
+        with col2:
+            points_btn = st.form_submit_button("🔑 Key Points")
+        with col3:
+            if st.session_state.current_note_id:
+                delete_btn = st.form_submit_button("🗑️ Delete Note")
+            else:
+                delete_btn = False
+        
+        if points_btn:
+            if content.strip():
+                # Kept across reruns so only paragraphs edited since the last run are re-analyzed
+                if 'note_summarizer' not in st.session_state:
+                    st.session_state.note_summarizer = IncrementalSummarizer()
+                summarizer = st.session_state.note_summarizer
+                summarizer.update(content)
+                st.markdown("**Key Points:**\n\n" + "\n".join(f"• {point}" for point in summarizer.summary(5)))
+            else:
+                st.warning("Write some notes first")
+        
+        if save_btn:
+            if topic.strip() and content.strip():
+                # Saving the same content a second time after the warning keeps it anyway
+                duplicates = []
+                if st.session_state.get('duplicate_ack') != hash(content):
+                    duplicates = find_duplicates(st.session_state.user_id, content,
+                                                 exclude=st.session_state.current_note_id)
+                if duplicates:
+                    st.session_state.duplicate_ack = hash(content)
+                    matches = ", ".join(f"\"{note['topic']}\" ({note['similarity']:.0%} alike)" for note in duplicates)
+                    st.warning(f"⚠️ This looks like a note you already have: {matches}. "
+                               "Press Save again to keep it anyway.")
+                elif st.session_state.current_note_id:
+                    if update_personal_note(st.session_state.current_note_id, topic, content, st.session_state.user_id):
+                        st.success("✅ Note updated successfully!")
+                        st.session_state.current_note_id = None
+                        st.session_state.current_note_topic = ""
+                        st.session_state.current_note_content = ""
+                        reset_note_listing()
+                        st.rerun()
+                    else:
+                        st.error("Failed to update note")
+                else:
+                    if save_personal_note(topic, content, st.session_state.user_id):
+                        st.success("✅ Note saved successfully!")
+                        st.session_state.current_note_topic = ""
+                        st.session_state.current_note_content = ""
+                        reset_note_listing()
+                        st.rerun()
+                    else:
+                        st.error("Failed to save note")
+            else:
+                st.warning("Please enter both topic and content")
+        
+        if delete_btn and st.session_state.current_note_id:
+            if delete_personal_note(st.session_state.current_note_id, st.session_state.user_id):
+                st.success("✅ Note deleted successfully!")
+                st.session_state.current_note_id = None
+                st.session_state.current_note_topic = ""
+                st.session_state.current_note_content = ""
+                reset_note_listing()
+                st.rerun()
+            else:
+                st.error("Failed to delete note")
+    
+    _show_note_transfer()
+    
+    search_query = st.text_input("🔍 Search your notes", placeholder="Search topics and content...")
+    if search_query.strip():
+        results = search_personal_notes(st.session_state.user_id, search_query)
+        st.subheader(f"🔍 Search Results ({len(results)})")
+        for result in results:
+            with st.expander(f"📄 {result['topic']} (Last modified: {result['last_modified']})"):
+                st.markdown(result['snippet'])
+                if st.button("Edit", key=f"search_edit_{result['id']}"):
+                    full_note = get_personal_note(result['id'], st.session_state.user_id)
+                    if full_note:
+                        st.session_state.current_note_id = full_note['id']
+                        st.session_state.current_note_topic = full_note['topic']
+                        st.session_state.current_note_content = full_note['content']
+                        st.rerun()
+        if not results:
+            st.info("No notes match your search.")
+        return
+    
+    listed_notes = st.session_state.listed_notes
+    if listed_notes:
+        st.subheader("📚 Your Saved Notes")
+        open_note = st.session_state.open_note
+        for note in listed_notes:
+            is_open = open_note is not None and open_note['id'] == note['id']
+            with st.expander(f"📄 {note['topic']} (Last modified: {note['last_modified']})", expanded=is_open):
+                if is_open:
+                    st.write(open_note['content'])
+                    similar = find_similar_notes(st.session_state.user_id, note['id'])
+                    if similar:
+                        st.caption("🔗 Similar notes: " + ", ".join(
+                            f"{other['topic']} ({other['similarity']:.0%})" for other in similar))
+                else:
+                    st.write(note['preview'] + ("…" if note['truncated'] else ""))
+                col1, col2, col3 = st.columns([3, 1, 1])
+                with col1:
+                    st.caption(f"Created: {note['created_date']}")
+                with col2:
+                    if not is_open and note['truncated']:
+                        if st.button("Show All", key=f"open_{note['id']}"):
+                            st.session_state.open_note = get_personal_note(note['id'], st.session_state.user_id)
+                            st.rerun()
+                with col3:
+                    if st.button("Edit", key=f"edit_{note['id']}"):
+                        full_note = open_note if is_open else get_personal_note(note['id'], st.session_state.user_id)
+                        if full_note:
+                            st.session_state.current_note_id = full_note['id']
+                            st.session_state.current_note_topic = full_note['topic']
+                            st.session_state.current_note_content = full_note['content']
+                            st.rerun()
+        
+        if st.session_state.notes_cursor:
+            if st.button("⬇️ Load more notes"):
+                _load_more_notes()
+                st.rerun()
+    else:
+        st.info("📝 You haven't created any notes yet. Start by writing your first note above!")
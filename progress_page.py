@@ -0,0 +1,85 @@
+"""Progress dashboard: goal, note and study session statistics"""
+import streamlit as st
+from datetime import datetime, timedelta
+from analytics import session_trends, study_streak
+from database import get_progress_stats, load_study_goals
+
+def show_progress_page():
+    st.header("📈 Progress Dashboard")
+    
+    stats = get_progress_stats(st.session_state.user_id)
+    total_goals = stats['total_goals']
+    completed_goals = stats['completed_goals']
+    completion_rate = stats['completion_rate']
+    
+    st.subheader(f"📊 {st.session_state.username}'s Progress")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Study Goals", f"{completed_goals}/{total_goals}")
+    
+    with col2:
+        st.metric("Personal Notes", stats['total_notes'])
+    
+    with col3:
+        st.metric("Study Sessions", stats['total_sessions'])
+    
+    with col4:
+        st.metric("Goal Completion", f"{completion_rate:.1f}%" if total_goals else "0%")
+    
+    if stats['total_sessions']:
+        _show_study_activity()
+    
+    if total_goals:
+        st.subheader("🎯 Goal Progress")
+        st.progress(int(completion_rate))
+        st.write(f"**{completed_goals} out of {total_goals} goals completed** ({completion_rate:.1f}%)")
+        
+        goals = load_study_goals(st.session_state.user_id)
+        if completed_goals > 0:
+            st.write("### ✅ Completed Goals")
+            for goal in goals:
+                if goal['completed']:
+                    st.write(f"• {goal['goal']}")
+        
+        pending_goals = [g for g in goals if not g['completed']]
+        if pending_goals:
+            st.write("### ⏳ Pending Goals")
+            for goal in pending_goals:
+                st.write(f"• {goal['goal']}")
+    
+    if stats['recent_notes']:
+        st.subheader("📝 Recent Notes")
+        for note in stats['recent_notes']:
+            st.write(f"**{note['topic']}** - {note['last_modified']}")
+    
+    if not total_goals and not stats['total_notes']:
+        st.info("📊 Start setting goals and taking notes to see your progress here!")
+
+TREND_WEEKS = 12
+
+def _show_study_activity():
+    """Streaks and weekly sessions, read from the session rollups"""
+    st.subheader("📅 Study Activity")
+    streak = study_streak(st.session_state.user_id)
+    today = datetime.now().date()
+    weeks = session_trends(st.session_state.user_id, (today - timedelta(weeks=TREND_WEEKS - 1)).isoformat(),
+                           today.isoformat(), 'week')
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Current Streak", f"{streak['current']} day{'s' if streak['current'] != 1 else ''}")
+    with col2:
+        st.metric("Longest Streak", f"{streak['longest']} day{'s' if streak['longest'] != 1 else ''}")
+    with col3:
+        this_week = weeks[-1] if weeks else None
+        st.metric("Sessions This Week", this_week['sessions'] if this_week else 0)
+    
+    if any(week['sessions'] for week in weeks):
+        st.write(f"**Sessions per week** (last {TREND_WEEKS} weeks)")
+        st.bar_chart({'Sessions': {week['bucket']: week['sessions'] for week in weeks}})
+        scored = [week for week in weeks if week['accuracy'] is not None]
+        if scored:
+            st.write("**Average score per week** (%)")
+            st.line_chart({'Score %': {week['bucket']: round(week['accuracy'], 1) for week in scored}})
@@ -0,0 +1,260 @@
+"""Quizzes generated from personal notes, served from a stored question bank.
+
+A note's content goes through the same analysis as a summary (sentence
+scores and key concepts, shared through the summary cache). The best-scored
+sentences that mention a concept become cloze questions with the concept
+blanked out and other concepts as distractors, and the first sentences
+naming different concepts become one concept-matching question.
+
+Questions are generated once per note and stored in quiz_questions under
+(user_id, note_id, position); starting a quiz is a range read on that key.
+Triggers drop a bank when the note's content changes or the note is
+deleted, so it is regenerated on the next quiz. Banks can be built ahead of
+time:
+
+    python quiz.py build
+    python quiz.py show alice 42
+"""
+import argparse
+import heapq
+import json
+import random
+import re
+import sys
+from datetime import datetime
+
+from database import cached_read, read_cache, save_study_session, transaction
+from instrumentation import timed
+from utils import scored_analysis
+
+# Bump when generation changes, so banks made by an older generator are rebuilt
+GENERATOR_VERSION = 2
+SESSION_TYPE = 'quiz'
+QUIZ_LENGTH = 5
+MAX_CLOZE = 10
+MATCH_PAIRS = 4
+CHOICES = 4
+BLANK = '_____'
+
+_LIST_MARKER_RE = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+')
+_MARKUP_RE = re.compile(r'[*_`#]+')
+_TERMINATORS = ('.', '!', '?')
+
+# ------------------- Generation -------------------
+def _quiz_text(content):
+    """Note content as one line of sentences; list items and lines without a terminator end a sentence.
+
+    Headings ("Key Points:") are left out, so they give no concepts.
+    """
+    sentences = []
+    for line in content.splitlines():
+        line = _MARKUP_RE.sub('', _LIST_MARKER_RE.sub('', line)).strip()
+        if line and not line.endswith(':'):
+            sentences.append(line if line.endswith(_TERMINATORS) else line + '.')
+    return ' '.join(' '.join(sentences).split())
+
+def _concepts(analysis):
+    """Key concepts without case duplicates, in order of first appearance"""
+    lowered = analysis.text.lower()
+    concepts = {}
+    for concept in analysis.key_concepts:
+        concepts.setdefault(concept.lower(), concept)
+    return sorted(concepts.values(), key=lambda concept: (lowered.find(concept.lower()), concept.lower()))
+
+def _distractors(concepts, answer, count):
+    """count other concepts, starting after answer so questions get different ones"""
+    others = concepts[concepts.index(answer) + 1:] + concepts[:concepts.index(answer)]
+    return others[:count]
+
+def generate_questions(content, method=None):
+    """Cloze and matching questions for a note's content, best first.
+
+    A cloze question is {'kind': 'cloze', 'prompt', 'answer', 'choices'}
+    (choices holds the answer and up to CHOICES - 1 distractors; without
+    any the answer is typed). A matching question is {'kind': 'match',
+    'clues', 'answers'}: clue i is answered by answers[i].
+    """
+    text = _quiz_text(content)
+    if not text:
+        return []
+    analysis = scored_analysis(text, method)
+    concepts = _concepts(analysis)
+    if not concepts:
+        return []
+    pattern = re.compile(r'\b(%s)\b' % '|'.join(re.escape(concept) for concept in
+                                                   sorted(concepts, key=len, reverse=True)), re.IGNORECASE)
+    by_lower = {concept.lower(): concept for concept in concepts}
+    ranked = sorted(range(len(analysis)), key=lambda i: (-analysis.scores[i], i))
+
+    def cloze(sentence, answer):
+        # Every occurrence, or a later one would give the answer away
+        prompt = re.sub(r'\b%s\b' % re.escape(answer), BLANK, sentence, flags=re.IGNORECASE)
+        return {'kind': 'cloze', 'prompt': prompt, 'answer': answer,
+                'choices': [answer] + _distractors(concepts, answer, CHOICES - 1)}
+
+    questions = []
+    repeats = []  # sentences whose concepts were all asked already, used only to fill up
+    clues = {}  # concept -> clue sentence, for the matching question
+    for i in ranked:
+        sentence = analysis.sentence(i)
+        if not 5 <= len(sentence.split()) <= 40:
+            continue
+        found = [by_lower[match.group(1).lower()] for match in pattern.finditer(sentence)]
+        if not found:
+            continue
+        fresh = [concept for concept in found if all(question['answer'] != concept for question in questions)]
+        if fresh and len(questions) < MAX_CLOZE:
+            questions.append(cloze(sentence, fresh[0]))
+        elif not fresh:
+            repeats.append((sentence, found[0]))
+        for concept in found:
+            if concept not in clues and sentence not in clues.values():
+                clues[concept] = sentence
+    questions += [cloze(sentence, answer) for sentence, answer in repeats[:MAX_CLOZE - len(questions)]]
+
+    if len(clues) >= 3:
+        pairs = sorted(clues.items(), key=lambda pair: concepts.index(pair[0]))[:MATCH_PAIRS]
+        questions = questions[:1] + [{
+            'kind': 'match',
+            'clues': [re.sub(r'\b%s\b' % re.escape(concept), BLANK, sentence, flags=re.IGNORECASE)
+                      for concept, sentence in pairs],
+            'answers': [concept for concept, _ in pairs],
+        }] + questions[1:]
+    return questions
+
+def question_points(question):
+    """Points a question is worth: 1 for a cloze, one per pair for matching"""
+    return len(question['answers']) if question['kind'] == 'match' else 1
+
+def grade(question, answer):
+    """Points scored by answer: a string for a cloze, a list in clue order for matching"""
+    def same(given, expected):
+        return given is not None and given.strip().lower() == expected.lower()
+    if question['kind'] == 'match':
+        return sum(same(given, expected) for given, expected in zip(answer or [], question['answers']))
+    return int(same(answer, question['answer']))
+
+# ------------------- Question Bank -------------------
+@timed('quiz.build_question_bank')
+def build_question_bank(user_id, note_id, method=None):
+    """Generate and store the questions of one note; returns them, or None for no such note"""
+    with transaction() as c:
+        c.execute('SELECT content FROM personal_notes WHERE id = ? AND user_id = ?', (note_id, user_id))
+        row = c.fetchone()
+    if not row:
+        return None
+    content = row[0] or ''
+    questions = generate_questions(content, method)
+    with transaction() as c:
+        # The note may have been edited while its questions were generated; store nothing then
+        c.execute('SELECT content FROM personal_notes WHERE id = ? AND user_id = ?', (note_id, user_id))
+        row = c.fetchone()
+        if not row or (row[0] or '') != content:
+            return questions
+        c.execute('DELETE FROM quiz_questions WHERE user_id = ? AND note_id = ?', (user_id, note_id))
+        c.executemany('INSERT INTO quiz_questions (user_id, note_id, position, question) VALUES (?, ?, ?, ?)',
+                      [(user_id, note_id, position, json.dumps(question))
+                       for position, question in enumerate(questions)])
+        c.execute('''INSERT OR REPLACE INTO quiz_banks (note_id, user_id, questions, generator, generated_date)
+                     VALUES (?, ?, ?, ?, ?)''', (note_id, user_id, len(questions), GENERATOR_VERSION,
+                                                datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    read_cache.invalidate(user_id, ('quiz_questions',))
+    return questions
+
+@cached_read('personal_notes', 'quiz_questions')
+def stored_questions(user_id, note_id):
+    """The note's stored questions in bank order, or None while it has no current bank"""
+    with transaction() as c:
+        c.execute('SELECT generator FROM quiz_banks WHERE note_id = ? AND user_id = ?', (note_id, user_id))
+        row = c.fetchone()
+        if not row or row[0] != GENERATOR_VERSION:
+            return None
+        c.execute('SELECT question FROM quiz_questions WHERE user_id = ? AND note_id = ? ORDER BY position',
+                  (user_id, note_id))
+        return [json.loads(row[0]) for row in c.fetchall()]
+
+def question_bank(user_id, note_id):
+    """The note's questions, generated and stored on first use"""
+    questions = stored_questions(user_id, note_id)
+    if questions is None:
+        questions = build_question_bank(user_id, note_id) or []
+    return questions
+
+@timed('quiz.start_quiz')
+def start_quiz(user_id, note_id, length=QUIZ_LENGTH, rnd=random):
+    """Up to length questions from the note's bank, the best ones more likely, with shuffled choices"""
+    if not user_id:
+        return []
+    bank = question_bank(user_id, note_id)
+    picked = range(len(bank)) if len(bank) <= length else sorted(_weighted_sample(rnd, len(bank), length))
+    quiz = []
+    for i in picked:
+        question = dict(bank[i])
+        if question['kind'] == 'match':
+            question['choices'] = rnd.sample(question['answers'], len(question['answers']))
+        else:
+            question['choices'] = rnd.sample(question['choices'], len(question['choices']))
+        quiz.append(question)
+    return quiz
+
+def _weighted_sample(rnd, size, count):
+    """count distinct indices below size, index i weighted 1 / (i + 2): the front of a bank is its best"""
+    # Weighted sampling without replacement: the count largest of random() ** (1 / weight)
+    return heapq.nlargest(count, range(size), key=lambda i: rnd.random() ** (i + 2))
+
+def finish_quiz(user_id, questions, answers):
+    """Grade answers (one per question) and record the quiz as a study session; returns (score, total)"""
+    score = sum(grade(question, answer) for question, answer in zip(questions, answers))
+    total = sum(question_points(question) for question in questions)
+    if total:
+        save_study_session(score, total, SESSION_TYPE, user_id)
+    return score, total
+
+@timed('quiz.build_missing_banks')
+def build_missing_banks(user_id=None):
+    """Generate banks for every note without a current one; returns the number of notes done"""
+    where = ' AND n.user_id = ?' if user_id else ''
+    with transaction() as c:
+        c.execute(f'''SELECT n.id, n.user_id FROM personal_notes n LEFT JOIN quiz_banks b ON b.note_id = n.id
+                      WHERE (b.note_id IS NULL OR b.generator != ?){where} ORDER BY n.id''',
+                  (GENERATOR_VERSION, *([user_id] if user_id else [])))
+        notes = c.fetchall()
+    for note_id, owner in notes:
+        build_question_bank(owner, note_id)
+    return len(notes)
+
+# ------------------- Command Line -------------------
+def _user_id(username):
+    with transaction() as c:
+        c.execute('SELECT id FROM users WHERE username = ?', (username,))
+        row = c.fetchone()
+    if not row:
+        raise SystemExit(f"unknown user: {username}")
+    return row[0]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quiz question banks of personal notes")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="generate question banks for notes without one")
+    build.add_argument("--user", help="only this username (default: everyone)")
+    show = commands.add_parser("show", help="print the question bank of one note")
+    show.add_argument("username")
+    show.add_argument("note_id", type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        user_id = _user_id(args.user) if args.user else None
+        print(f"built {build_missing_banks(user_id)} question banks", file=sys.stderr)
+        return 0
+
+    for position, question in enumerate(question_bank(_user_id(args.username), args.note_id), 1):
+        if question['kind'] == 'match':
+            print(f"{position}. match:")
+            for clue, answer in zip(question['clues'], question['answers']):
+                print(f"     {clue}  -> {answer}")
+        else:
+            print(f"{position}. {question['prompt']}  -> {question['answer']}  {question['choices']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Quiz page: cloze and matching questions generated from saved notes"""
+import streamlit as st
+from database import list_note_topics
+from quiz import BLANK, finish_quiz, grade, question_points, start_quiz
+
+def show_quiz_page():
+    st.header("🧠 Quiz")
+
+    topics = dict(list_note_topics(st.session_state.user_id))
+    if not topics:
+        st.info("📝 Save some notes first; quizzes are made from your notes.")
+        return
+
+    note_id = st.selectbox("Quiz me on:", list(topics), format_func=topics.get)
+    if st.button("▶️ Start Quiz"):
+        # A new round number gives the answer widgets fresh keys
+        st.session_state.quiz_round = st.session_state.get('quiz_round', 0) + 1
+        st.session_state.quiz = start_quiz(st.session_state.user_id, note_id)
+        st.session_state.quiz_result = None
+
+    questions = st.session_state.get('quiz')
+    if questions is None:
+        _show_result(st.session_state.get('quiz_result'))
+        return
+    if not questions:
+        st.warning("This note has too few key concepts for a quiz. Add more detail to it and try again.")
+        return
+
+    round_key = st.session_state.quiz_round
+    with st.form("quiz_form"):
+        answers = []
+        for i, question in enumerate(questions):
+            if question['kind'] == 'match':
+                st.write(f"**{i + 1}.** Match each sentence with its missing concept:")
+                answers.append([st.selectbox(clue, question['choices'], index=None, key=f"quiz_{round_key}_{i}_{j}")
+                                for j, clue in enumerate(question['clues'])])
+            elif len(question['choices']) > 1:
+                answers.append(st.radio(f"**{i + 1}.** {question['prompt']}", question['choices'], index=None,
+                                        key=f"quiz_{round_key}_{i}"))
+            else:
+                answers.append(st.text_input(f"**{i + 1}.** {question['prompt']}", key=f"quiz_{round_key}_{i}"))
+        submitted = st.form_submit_button("✅ Submit Answers")
+
+    if submitted:
+        score, total = finish_quiz(st.session_state.user_id, questions, answers)
+        st.session_state.quiz = None
+        st.session_state.quiz_result = {'score': score, 'total': total, 'questions': questions, 'answers': answers}
+        st.rerun()
+
+def _show_result(result):
+    """Score of the last quiz and the answers that were missed"""
+    if not result:
+        return
+    score, total = result['score'], result['total']
+    st.success(f"🎉 You scored {score}/{total} ({100 * score / total:.0f}%)")
+    for i, (question, answer) in enumerate(zip(result['questions'], result['answers'])):
+        if grade(question, answer) == question_points(question):
+            continue
+        if question['kind'] == 'match':
+            solved = [clue.replace(BLANK, f"**{expected}**")
+                      for clue, expected in zip(question['clues'], question['answers'])]
+        else:
+            solved = [question['prompt'].replace(BLANK, f"**{question['answer']}**")]
+        st.write(f"**{i + 1}.** " + "  \n".join(solved))
@@ -0,0 +1,94 @@
+"""Per-user cache for database read results.
+
+Streamlit reruns the whole page script on every interaction, so the same
+goals, notes and statistics would be queried again and again. Results are
+kept per user until a write to one of the tables they were read from
+invalidates them, or until the TTL runs out (which also picks up writes made
+by other processes). The cache is an LRU bounded by entry count.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+READ_CACHE_TTL = float(os.environ.get("STUDY_BUDDY_READ_CACHE_TTL", "300"))
+READ_CACHE_ENTRIES = int(os.environ.get("STUDY_BUDDY_READ_CACHE_ENTRIES", "5000"))
+
+class ReadCache:
+    """LRU of read results with TTL expiry and per-user, per-table invalidation.
+
+    Cached values are shared between callers and must be treated as
+    read-only. A result loaded while a write for the same user was committed
+    is returned but not stored, so invalidation never races with a slow read.
+    """
+
+    def __init__(self, max_entries=READ_CACHE_ENTRIES, ttl=READ_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires, tables, user_id, value)
+        self._user_keys = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_load(self, user_id, key, tables, load):
+        """Return the cached result for key, calling load() and storing it on a miss"""
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return load()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[3]
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            generation = self._generations.get(user_id, 0)
+
+        value = load()
+        with self._lock:
+            if self._generations.get(user_id, 0) == generation:
+                self._remove(key)
+                self._entries[key] = (now + self.ttl, frozenset(tables), user_id, value)
+                self._user_keys.setdefault(user_id, set()).add(key)
+                while len(self._entries) > self.max_entries:
+                    self._remove(next(iter(self._entries)))
+                    self.evictions += 1
+        return value
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._user_keys[entry[2]]
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[entry[2]]
+
+    def invalidate(self, user_id, tables=None):
+        """Drop a user's results read from any of tables (all of them if None)"""
+        tables = None if tables is None else frozenset(tables)
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            for key in list(self._user_keys.get(user_id, ())):
+                if tables is None or self._entries[key][1] & tables:
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+            self._generations.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'users': len(self._user_keys), 'max_entries': self.max_entries,
+                    'ttl': self.ttl, 'hits': self.hits, 'misses': self.misses, 'expirations': self.expirations,
+                    'evictions': self.evictions, 'invalidations': self.invalidations}
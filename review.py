@@ -0,0 +1,204 @@
+"""Spaced-repetition review of personal notes, scheduled with SM-2.
+
+Every note has a review card (created by a trigger when the note is saved)
+holding its SM-2 state and the time it is next due. The due queue is a
+range scan of the (user_id, due_at) index that stops after the first N
+cards, so its cost does not grow with the number of notes. Grades are kept
+in a ReviewSession and written in batches, each one transaction:
+
+    python review.py due alice
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+from database import cached_read, read_cache, save_study_session, transaction
+from instrumentation import timed
+
+SESSION_TYPE = 'review'
+QUEUE_LENGTH = 20
+REVIEW_BATCH_SIZE = 10
+MIN_EASE = 1.3
+# Interval multipliers for Hard and Easy, so the buttons schedule differently (as in Anki)
+HARD_FACTOR = 1.2
+EASY_BONUS = 1.3
+# Days until the first and second review after a remembered one, by quality; a
+# day is the shortest step, so on a new card Hard and Good both mean tomorrow
+EARLY_STEPS = {3: (1, 3), 4: (1, 6), 5: (4, 8)}
+# Button label -> SM-2 quality (0-5); below 3 the note was not remembered
+GRADES = {'Again': 1, 'Hard': 3, 'Good': 4, 'Easy': 5}
+_IN_CHUNK = 500  # note ids per IN (...) list, well below SQLite's variable limit
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+# ------------------- Scheduling -------------------
+def schedule(card, quality):
+    """SM-2 state after a grade: card is (interval_days, ease, repetitions, lapses), quality 0-5.
+
+    A remembered card first follows EARLY_STEPS (1 day, then 6 for Good),
+    never shrinking, then waits its previous interval times its ease
+    (HARD_FACTOR instead for quality 3, ease * EASY_BONUS for 5), and its
+    ease moves with the grade; a forgotten one starts over at 1 day with its
+    ease unchanged.
+    """
+    interval, ease, repetitions, lapses = card
+    if quality < 3:
+        return 1, ease, 0, lapses + 1
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    if repetitions < 2:
+        interval = max(EARLY_STEPS[quality][repetitions], interval)
+    else:
+        factor = HARD_FACTOR if quality == 3 else ease * EASY_BONUS if quality == 5 else ease
+        interval = max(round(interval * factor), interval + 1)
+    return interval, ease, repetitions + 1, lapses
+
+def next_intervals(card):
+    """Days until the card is due again for each button in GRADES"""
+    return {label: schedule(card, quality)[0] for label, quality in GRADES.items()}
+
+@timed('review.record_grades')
+def record_grades(user_id, grades, reviewed_at=None):
+    """Apply (note_id, quality) grades in order, in one transaction; returns the number of cards updated.
+
+    A card graded twice is scheduled from its first grade's result.
+    """
+    if not user_id or not grades:
+        return 0
+    reviewed_at = reviewed_at or _now()
+    reviewed = datetime.strptime(reviewed_at, "%Y-%m-%d %H:%M:%S")
+    note_ids = list(dict.fromkeys(note_id for note_id, _ in grades))
+    with transaction() as c:
+        # Take the write lock first, so no other session grades these cards in between
+        c.execute('BEGIN IMMEDIATE')
+        cards = {}
+        for start in range(0, len(note_ids), _IN_CHUNK):
+            chunk = note_ids[start:start + _IN_CHUNK]
+            # By primary key only: with user_id in the WHERE clause SQLite would scan the user's due index
+            c.execute(f'''SELECT note_id, user_id, interval_days, ease, repetitions, lapses FROM review_cards
+                          WHERE note_id IN ({', '.join('?' * len(chunk))})''', chunk)
+            cards.update((row[0], row[2:]) for row in c.fetchall() if row[1] == user_id)
+        for note_id, quality in grades:
+            if note_id in cards:
+                cards[note_id] = schedule(cards[note_id], quality)
+        c.executemany('''UPDATE review_cards SET interval_days = ?, ease = ?, repetitions = ?, lapses = ?,
+                                                 due_at = ?, last_reviewed = ?
+                         WHERE note_id = ?''',
+                      [(*card, (reviewed + timedelta(days=card[0])).strftime("%Y-%m-%d %H:%M:%S"), reviewed_at,
+                        note_id) for note_id, card in cards.items()])
+    read_cache.invalidate(user_id, ('review_cards',))
+    return len(cards)
+
+# ------------------- Due Queue -------------------
+def _end_of_day(day):
+    return f"{day or datetime.now().strftime('%Y-%m-%d')} 23:59:59"
+
+@timed('review.due_queue')
+@cached_read('review_cards', 'personal_notes')
+def _due_queue(user_id, until, limit):
+    with transaction() as c:
+        c.execute('''SELECT r.note_id, n.topic, r.due_at, r.interval_days, r.ease, r.repetitions, r.lapses
+                     FROM review_cards r JOIN personal_notes n ON n.id = r.note_id
+                     WHERE r.user_id = ? AND r.due_at <= ?
+                     ORDER BY r.due_at, r.note_id LIMIT ?''', (user_id, until, limit))
+        return [{'note_id': row[0], 'topic': row[1], 'due_at': row[2], 'card': tuple(row[3:])}
+                for row in c.fetchall()]
+
+def due_queue(user_id, limit=QUEUE_LENGTH, day=None):
+    """The user's next limit cards due by the end of day (ISO date, default today), most overdue first.
+
+    Each card has note_id, topic, due_at and its SM-2 state as card, for
+    next_intervals().
+    """
+    if not user_id:
+        return []
+    return _due_queue(user_id, _end_of_day(day), limit)
+
+@timed('review.due_count')
+@cached_read('review_cards', 'personal_notes')
+def _due_count(user_id, until):
+    with transaction() as c:
+        c.execute('SELECT COUNT(*) FROM review_cards WHERE user_id = ? AND due_at <= ?', (user_id, until))
+        return c.fetchone()[0]
+
+def due_count(user_id, day=None):
+    """Number of the user's cards due by the end of day; counts index entries only"""
+    return _due_count(user_id, _end_of_day(day)) if user_id else 0
+
+# ------------------- Review Sessions -------------------
+class ReviewSession:
+    """Grades given in one sitting, written to the database REVIEW_BATCH_SIZE at a time.
+
+    Cards graded but not yet written are left out of queue(), so they are
+    not shown twice. finish() writes the rest and records the sitting as a
+    'review' study session (remembered cards over cards reviewed). The app
+    flushes whenever another page is selected; grades still pending when the
+    browser session ends (tab closed, session expired) are lost, at most
+    batch_size - 1 of them.
+    """
+
+    def __init__(self, user_id, batch_size=REVIEW_BATCH_SIZE):
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.pending = []
+        self.reviewed = 0
+        self.remembered = 0
+
+    def grade(self, note_id, quality):
+        self.pending.append((note_id, quality))
+        self.reviewed += 1
+        self.remembered += quality >= 3
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the pending grades now"""
+        if self.pending:
+            record_grades(self.user_id, self.pending)
+            self.pending = []
+
+    def queue(self, limit=QUEUE_LENGTH):
+        pending = {note_id for note_id, _ in self.pending}
+        cards = due_queue(self.user_id, limit + len(pending))
+        return [card for card in cards if card['note_id'] not in pending][:limit]
+
+    def remaining(self):
+        """Cards due today that this session has not graded yet"""
+        pending = {note_id for note_id, _ in self.pending}
+        return due_count(self.user_id) - len(pending)
+
+    def finish(self):
+        """Write pending grades and record the sitting; returns (remembered, reviewed)"""
+        self.flush()
+        result = (self.remembered, self.reviewed)
+        if self.reviewed:
+            save_study_session(self.remembered, self.reviewed, SESSION_TYPE, self.user_id)
+        self.reviewed = self.remembered = 0
+        return result
+
+# ------------------- Command Line -------------------
+def _user_id(username):
+    with transaction() as c:
+        c.execute('SELECT id FROM users WHERE username = ?', (username,))
+        row = c.fetchone()
+    if not row:
+        raise SystemExit(f"unknown user: {username}")
+    return row[0]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Spaced-repetition review queue")
+    commands = parser.add_subparsers(dest="command", required=True)
+    due = commands.add_parser("due", help="print a user's cards due today")
+    due.add_argument("username")
+    due.add_argument("-n", type=int, default=QUEUE_LENGTH, help="cards to list")
+    due.add_argument("--day", help="ISO date (default: today)")
+    args = parser.parse_args(argv)
+
+    user_id = _user_id(args.username)
+    print(f"{due_count(user_id, args.day)} cards due", file=sys.stderr)
+    for card in due_queue(user_id, args.n, args.day):
+        print(f"{card['due_at']}  #{card['note_id']}  {card['topic']}  (every {card['card'][0]} days)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""Review page: today's spaced-repetition queue of saved notes"""
+import streamlit as st
+from database import get_personal_note
+from review import GRADES, ReviewSession, next_intervals
+
+UP_NEXT = 5
+
+def _review_session():
+    session = st.session_state.get('review_session')
+    if session is None or session.user_id != st.session_state.user_id:
+        session = st.session_state.review_session = ReviewSession(st.session_state.user_id)
+    return session
+
+def show_review_page():
+    st.header("🔁 Review")
+    session = _review_session()
+
+    result = st.session_state.pop('review_result', None)
+    if result:
+        remembered, reviewed = result
+        st.success(f"✅ Review saved: {remembered} of {reviewed} notes remembered")
+
+    queue = session.queue(UP_NEXT + 1)
+    if not queue:
+        if session.reviewed:
+            st.session_state.review_result = session.finish()
+            st.rerun()
+        st.info("🎉 Nothing due today. New notes are due right away, then come back at growing intervals.")
+        return
+
+    st.metric("Due Today", session.remaining())
+    card = queue[0]
+    note = get_personal_note(card['note_id'], st.session_state.user_id)
+    st.subheader(f"📄 {card['topic']}")
+    st.caption("Recall what this note says, then check yourself.")
+    with st.expander("Show note"):
+        st.write(note['content'] if note else "")
+
+    intervals = next_intervals(card['card'])
+    cols = st.columns(len(GRADES))
+    for col, (label, quality) in zip(cols, GRADES.items()):
+        with col:
+            days = intervals[label]
+            if st.button(f"{label} ({days} day{'s' if days != 1 else ''})", key=f"grade_{label}"):
+                session.grade(card['note_id'], quality)
+                st.rerun()
+
+    if len(queue) > 1:
+        st.write("**Up next:** " + ", ".join(other['topic'] for other in queue[1:]))
+    if session.reviewed and st.button("🏁 Finish Review"):
+        st.session_state.review_result = session.finish()
+        st.rerun()
@@ -0,0 +1,237 @@
+"""Near-duplicate and related-note lookup with MinHash signatures and LSH banding.
+
+A note's content is reduced to its set of word 3-grams (shingles) and a
+NUM_PERM-value MinHash signature; the fraction of positions where two
+signatures agree estimates the Jaccard similarity of the two shingle sets.
+Each signature is cut into BANDS bands of ROWS values and every band is
+hashed to a bucket kept in note_lsh under (user_id, bucket, note_id). Notes
+that share any bucket with a query are found with one index probe per band,
+however many notes the user has, and only those candidates are compared.
+With 16 bands of 4 rows a pair at 0.5 similarity becomes a candidate with
+probability ~0.64, a pair at 0.8 with ~0.9998.
+
+Signatures are written with the note by save_personal_note,
+update_personal_note and background summary jobs. Bulk imports and notes
+saved before the index existed are indexed afterwards with backfill():
+
+    python similarity.py backfill
+    python similarity.py similar alice 42
+"""
+import argparse
+import hashlib
+import re
+import sys
+import zlib
+
+import numpy as np
+
+from database import cached_read, transaction
+from instrumentation import timed
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+DUPLICATE_THRESHOLD = 0.8
+SIMILAR_THRESHOLD = 0.3
+# Bound on candidates compared per lookup, should one bucket hold many copies of a note
+MAX_CANDIDATES = 1000
+BACKFILL_CHUNK_SIZE = 1000
+
+_WORD_RE = re.compile(r'\w+')
+_SHINGLE_BLOCK = 4096  # shingles hashed at once, bounding the (NUM_PERM, block) work array
+
+def _constants(label, count):
+    """Fixed pseudo-random uint64 constants; signatures are persisted, so they must never change"""
+    return np.array([int.from_bytes(hashlib.blake2b(f"{label}:{i}".encode(), digest_size=8).digest(), 'little')
+                     for i in range(count)], dtype=np.uint64)
+
+# Multiply-shift hash functions ((a * x + b) mod 2^64) >> 32, one per signature position
+_MULTIPLIERS = (_constants('minhash-a', NUM_PERM) | np.uint64(1))[:, None]
+_OFFSETS = _constants('minhash-b', NUM_PERM)[:, None]
+_SHINGLE_MIX = _constants('shingle', 1)[0] | np.uint64(1)
+_BAND_MIX = _constants('band-row', ROWS) | np.uint64(1)
+_BAND_SALT = _constants('band', BANDS)
+
+# ------------------- Signatures -------------------
+def _shingle_hashes(text):
+    """Hashes of the word 3-grams of text (lower-cased), repeats included"""
+    words = _WORD_RE.findall(text.lower())
+    hashes = np.array([zlib.crc32(word.encode()) for word in words], dtype=np.uint64)
+    if len(hashes) < SHINGLE_WORDS:
+        # Shorter texts are one shingle of all their words
+        combined = hashes[:1]
+        for i in range(1, len(hashes)):
+            combined = combined * _SHINGLE_MIX + hashes[i:i + 1]
+        return combined
+    count = len(hashes) - SHINGLE_WORDS + 1
+    combined = hashes[:count]
+    for i in range(1, SHINGLE_WORDS):
+        combined = combined * _SHINGLE_MIX + hashes[i:i + count]
+    return combined
+
+def shingles(text):
+    """Hashes of the distinct word 3-grams of text (lower-cased), as a sorted uint64 array"""
+    return np.unique(_shingle_hashes(text))
+
+def signature(text):
+    """MinHash signature of text's shingles (NUM_PERM uint32 values), or None for text without words"""
+    # Repeated shingles cannot change a minimum, so they are not removed first
+    values = _shingle_hashes(text)
+    if not len(values):
+        return None
+    if len(values) <= _SHINGLE_BLOCK:
+        return ((_MULTIPLIERS * values + _OFFSETS) >> np.uint64(32)).min(axis=1).astype(np.uint32)
+    minimum = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(values), _SHINGLE_BLOCK):
+        hashed = (_MULTIPLIERS * values[start:start + _SHINGLE_BLOCK] + _OFFSETS) >> np.uint64(32)
+        np.minimum(minimum, hashed.min(axis=1), out=minimum)
+    return minimum.astype(np.uint32)
+
+def band_buckets(note_signature):
+    """One signed 64-bit bucket per band; the band number is mixed in, so bands never share buckets"""
+    bands = note_signature.reshape(BANDS, ROWS).astype(np.uint64)
+    return ((bands * _BAND_MIX).sum(axis=1) + _BAND_SALT).view(np.int64).tolist()
+
+def jaccard(a, b):
+    """Exact Jaccard similarity of two texts' shingle sets"""
+    a, b = shingles(a), shingles(b)
+    union = len(np.union1d(a, b))
+    return len(np.intersect1d(a, b, assume_unique=True)) / union if union else 0.0
+
+def _from_blob(blob):
+    return np.frombuffer(blob, dtype=np.uint32)
+
+# ------------------- Index Maintenance -------------------
+def unindex_note(c, user_id, note_id):
+    """Remove a note's signature and buckets, using cursor c"""
+    c.execute('SELECT signature FROM note_signatures WHERE note_id = ? AND user_id = ?', (note_id, user_id))
+    row = c.fetchone()
+    if not row:
+        return
+    c.executemany('DELETE FROM note_lsh WHERE user_id = ? AND bucket = ? AND note_id = ?',
+                  [(user_id, bucket, note_id) for bucket in band_buckets(_from_blob(row[0]))])
+    c.execute('DELETE FROM note_signatures WHERE note_id = ?', (note_id,))
+
+def index_notes(c, user_id, signed_notes, replace=False):
+    """Store (note_id, signature) pairs of one user's notes, using cursor c.
+
+    Signatures are computed before the write transaction, so hashing never
+    holds the database lock. With replace, each note's previous entry is
+    removed first; a None signature (no words) leaves the note unindexed.
+    """
+    rows = []
+    buckets = []
+    for note_id, note_signature in signed_notes:
+        if replace:
+            unindex_note(c, user_id, note_id)
+        if note_signature is None:
+            continue
+        rows.append((note_id, user_id, note_signature.tobytes()))
+        buckets.extend((user_id, bucket, note_id) for bucket in band_buckets(note_signature))
+    c.executemany('INSERT OR REPLACE INTO note_signatures (note_id, user_id, signature) VALUES (?, ?, ?)',
+                  rows)
+    c.executemany('INSERT OR IGNORE INTO note_lsh (user_id, bucket, note_id) VALUES (?, ?, ?)', buckets)
+
+def backfill(user_id=None, chunk_size=BACKFILL_CHUNK_SIZE):
+    """Index every note without a signature, chunk by chunk; returns the number indexed"""
+    indexed = 0
+    last_id = 0
+    where = ' AND user_id = ?' if user_id else ''
+    while True:
+        with transaction() as c:
+            c.execute(f'''SELECT id, user_id, content FROM personal_notes
+                          WHERE id > ?{where}
+                            AND NOT EXISTS (SELECT 1 FROM note_signatures WHERE note_id = personal_notes.id)
+                          ORDER BY id LIMIT ?''', (last_id, *([user_id] if user_id else []), chunk_size))
+            rows = c.fetchall()
+        if not rows:
+            return indexed
+        signed = [(row[0], row[1], signature(row[2] or '')) for row in rows]
+        with transaction() as c:
+            for note_id, owner, note_signature in signed:
+                # Skip notes indexed (by a save) since they were read
+                c.execute('SELECT 1 FROM note_signatures WHERE note_id = ?', (note_id,))
+                if not c.fetchone():
+                    index_notes(c, owner, [(note_id, note_signature)])
+                    indexed += note_signature is not None
+        last_id = rows[-1][0]
+
+# ------------------- Lookups -------------------
+def _similar(c, user_id, note_signature, k, min_similarity, exclude=None):
+    """Candidates sharing a bucket with note_signature, best estimated similarity first"""
+    buckets = band_buckets(note_signature)
+    c.execute(f'''SELECT s.note_id, s.signature, n.topic, n.last_modified
+                  FROM note_signatures s JOIN personal_notes n ON n.id = s.note_id
+                  WHERE s.note_id IN (SELECT DISTINCT note_id FROM note_lsh
+                                      WHERE user_id = ? AND bucket IN ({', '.join('?' * BANDS)}) LIMIT ?)
+                    AND s.note_id != ?''', (user_id, *buckets, MAX_CANDIDATES + 1, exclude or 0))
+    rows = c.fetchall()
+    if not rows:
+        return []
+    signatures = np.frombuffer(b''.join(row[1] for row in rows), dtype=np.uint32).reshape(len(rows), NUM_PERM)
+    similarities = (signatures == note_signature).mean(axis=1)
+    order = np.argsort(-similarities, kind='stable')[:k]
+    return [{'id': rows[i][0], 'topic': rows[i][2], 'last_modified': rows[i][3],
+             'similarity': float(similarities[i])} for i in order if similarities[i] >= min_similarity]
+
+@timed('similarity.find_similar_notes')
+@cached_read('personal_notes')
+def find_similar_notes(user_id, note_id, k=5, min_similarity=SIMILAR_THRESHOLD):
+    """Up to k of the user's other notes most like note_id, by estimated Jaccard similarity.
+
+    Each result has id, topic, last_modified and similarity (0..1). Notes
+    without an indexed signature have no similar notes.
+    """
+    if not user_id:
+        return []
+    with transaction() as c:
+        c.execute('SELECT signature FROM note_signatures WHERE note_id = ? AND user_id = ?', (note_id, user_id))
+        row = c.fetchone()
+        if not row:
+            return []
+        return _similar(c, user_id, _from_blob(row[0]), k, min_similarity, exclude=note_id)
+
+@timed('similarity.find_duplicates')
+def find_duplicates(user_id, content, exclude=None, threshold=DUPLICATE_THRESHOLD, k=3):
+    """Saved notes of the user that content nearly duplicates, for a warning before saving.
+
+    exclude is the id of the note being edited, so it does not match itself.
+    """
+    note_signature = signature(content) if user_id else None
+    if note_signature is None:
+        return []
+    with transaction() as c:
+        return _similar(c, user_id, note_signature, k, threshold, exclude=exclude)
+
+# ------------------- Command Line -------------------
+def _user_id(username):
+    with transaction() as c:
+        c.execute('SELECT id FROM users WHERE username = ?', (username,))
+        row = c.fetchone()
+    if not row:
+        raise SystemExit(f"unknown user: {username}")
+    return row[0]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MinHash index of similar notes")
+    commands = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = commands.add_parser("backfill", help="index notes saved before the similarity index")
+    backfill_parser.add_argument("--user", help="only this username (default: everyone)")
+    similar = commands.add_parser("similar", help="print the notes most similar to one note")
+    similar.add_argument("username")
+    similar.add_argument("note_id", type=int)
+    similar.add_argument("-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == "backfill":
+        user_id = _user_id(args.user) if args.user else None
+        print(f"indexed {backfill(user_id)} notes", file=sys.stderr)
+        return 0
+
+    for note in find_similar_notes(_user_id(args.username), args.note_id, args.k):
+        print(f"{note['similarity']:>5.0%}  #{note['id']}  {note['topic']}  ({note['last_modified']})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
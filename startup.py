@@ -0,0 +1,114 @@
+"""Startup profiling: import time per module, cold start and time to the login form.
+
+Every measurement runs in a fresh interpreter so nothing is already
+imported. ``-X importtime`` gives the cost of the modules behind the login
+screen (``import app``) and of each page module on first navigation;
+AppTest renders the login form, and each page once logged in, to time a
+cold start end to end.
+
+    python startup.py --runs 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from pages import ADMIN_PAGES, PAGES
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _run(args):
+    """Run a Python snippet in a fresh interpreter with the app directory importable"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [APP_DIR, os.environ.get("PYTHONPATH")])))
+    with tempfile.TemporaryDirectory(prefix="ssb-startup-") as tmpdir:
+        # A scratch working directory, so the database the app creates is thrown away
+        return subprocess.run([sys.executable, *args], capture_output=True, text=True, check=True,
+                              cwd=tmpdir, env=env)
+
+def import_times(*modules):
+    """Per top-level import: cumulative ms and the direct imports it triggered, costliest first.
+
+    Modules are imported in order in one interpreter, so each one is only
+    charged for what the previous ones did not already load.
+    """
+    result = _run(["-X", "importtime", "-c", "; ".join(f"import {module}" for module in modules)])
+    groups = {}
+    children = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        if not cumulative_us.strip().isdigit():
+            continue  # the header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if depth == 0:
+            groups[name] = {'ms': int(cumulative_us) / 1e3,
+                            'children': sorted(children, key=lambda child: -child[1])}
+            children = []
+        elif depth == 1:
+            children.append((name, int(cumulative_us) / 1e3))
+    return {module: groups[module] for module in modules if module in groups}
+
+_COLD_START = r"""
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout=60)
+app.run()
+assert app.text_input and not app.exception, app.exception
+login = time.perf_counter()
+times = {'import_streamlit': imported - start, 'login_form': login - imported}
+app.session_state.user_id = 1
+app.session_state.username = "startup"
+app.session_state.logged_in = True
+for i, page in enumerate(json.loads(sys.argv[2])):
+    before = time.perf_counter()
+    # The first run after logging in shows the first menu page
+    (app.run() if i == 0 else app.sidebar.radio[0].set_value(page).run())
+    assert not app.exception, (page, app.exception)
+    times[page] = time.perf_counter() - before
+print(json.dumps(times))
+"""
+
+def cold_start(runs=3):
+    """Best-of-runs seconds for importing streamlit, rendering the login form and each page's first visit"""
+    best = {}
+    for _ in range(runs):
+        script = ["-c", _COLD_START, os.path.join(APP_DIR, "app.py"), json.dumps(list(PAGES))]
+        times = json.loads(_run(script).stdout)
+        for name, seconds in times.items():
+            best[name] = min(seconds, best.get(name, seconds))
+    return best
+
+COLD_START_LABELS = {'import_streamlit': "import streamlit", 'login_form': "login form rendered"}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile app startup in fresh interpreters")
+    parser.add_argument("--runs", type=int, default=3, help="cold starts to take the best of")
+    parser.add_argument("--top", type=int, default=5, help="direct imports listed per module")
+    parser.add_argument("--json", action="store_true", help="print the numbers as JSON")
+    args = parser.parse_args(argv)
+
+    modules = [module for module, _ in [*PAGES.values(), *ADMIN_PAGES.values()]]
+    imports = import_times("app", *modules)
+    cold = cold_start(args.runs)
+    if args.json:
+        print(json.dumps({'imports': imports, 'cold_start': cold}, indent=2))
+        return 0
+
+    print("import time per module (login path first, then each page on first navigation):")
+    for module, entry in imports.items():
+        top = ", ".join(f"{name} {ms:.1f}" for name, ms in entry['children'][:args.top])
+        print(f"  {module:<18} {entry['ms']:>8.1f} ms   {top}")
+    print(f"cold start (best of {args.runs}):")
+    for name, seconds in cold.items():
+        label = COLD_START_LABELS.get(name, f"first visit: {name}")
+        print(f"  {label:<32} {seconds * 1e3:>8.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
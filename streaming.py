@@ -0,0 +1,211 @@
+"""Streaming summarization for documents too large to hold in memory.
+
+The file is read in fixed-size byte chunks and cut into pieces that end at a
+confirmed sentence boundary (segmenter.last_boundary), so sentence splitting
+is identical to the in-memory path. Two passes keep peak memory independent of document size:
+
+1. collect running concept frequencies, the sentence count and the handful
+   of sentences that position bonuses depend on;
+2. score every sentence against the final key concepts while keeping only a
+   bounded top-k heap of candidates.
+
+Inputs smaller than one chunk give exactly the same result as
+``utils.generate_smart_summary``.
+"""
+import codecs
+import heapq
+import io
+import os
+import re
+
+from instrumentation import timed
+from nlp_resources import word_tokenize
+from segmenter import last_boundary
+from utils import (analyze_document, add_concept_scores, basic_points, content_score, finalize_points,
+                   position_score, sentence_spans, simplify_sentence, _concept_candidates,
+                   _fallback_concept_candidates)
+
+CHUNK_SIZE = 1024 * 1024
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def _open_binary(source):
+    """Return (file object, should_close) for a path or a seekable binary file"""
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'rb'), True
+    return source, False
+
+def _source_size(fileobj):
+    current = fileobj.tell()
+    size = fileobj.seek(0, io.SEEK_END)
+    fileobj.seek(current)
+    return size
+
+def _decoded_chunks(fileobj, chunk_size, on_bytes):
+    """Yield decoded text chunks from the start of fileobj, reporting bytes read"""
+    fileobj.seek(0)
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    while True:
+        data = fileobj.read(chunk_size)
+        if not data:
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+            return
+        on_bytes(len(data))
+        yield decoder.decode(data)
+
+def _sentence_pieces(chunks, normalize):
+    """Regroup chunks into pieces that each end a sentence, whatever text follows.
+
+    With normalize, whitespace runs collapse to one space across chunk
+    boundaries and the document is stripped, matching re.sub(r'\\s+', ' ')
+    followed by strip() on the whole text.
+    """
+    buffer = ''
+    previous_space = True  # strips leading whitespace of the document
+    for chunk in chunks:
+        if normalize:
+            chunk = _WHITESPACE_RE.sub(' ', chunk)
+            if previous_space and chunk.startswith(' '):
+                chunk = chunk[1:]
+            if not chunk:
+                continue
+            previous_space = chunk.endswith(' ')
+        buffer += chunk
+        cut = last_boundary(buffer)
+        if cut >= 0:
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+    if normalize:
+        buffer = buffer.rstrip(' ')
+    if buffer:
+        yield buffer
+
+class _Progress:
+    """Maps bytes read across all passes onto a 0..1 callback"""
+
+    def __init__(self, callback, size, passes):
+        self.callback = callback
+        self.size = size
+        self.total = max(size * passes, 1)
+        self.done = 0
+
+    def add_passes(self, passes):
+        self.total += self.size * passes
+
+    def __call__(self, nbytes):
+        self.done += nbytes
+        if self.callback:
+            self.callback(min(self.done / self.total, 1.0))
+
+def _pieces(fileobj, chunk_size, progress, normalize=True):
+    return _sentence_pieces(_decoded_chunks(fileobj, chunk_size, progress), normalize)
+
+def _collect_statistics(fileobj, chunk_size, progress):
+    """Pass 1: concept frequencies, sentence count, first three and last sentence"""
+    concept_counts = {}
+    count = 0
+    opening = []
+    last = None
+    for piece in _pieces(fileobj, chunk_size, progress):
+        try:
+            candidates = _concept_candidates(word_tokenize(piece))
+        except:
+            candidates = _fallback_concept_candidates(piece)
+        for word in candidates:
+            concept_counts[word] = concept_counts.get(word, 0) + 1
+        starts, ends = sentence_spans(piece)
+        for start, end in zip(starts, ends):
+            if len(opening) < 3:
+                opening.append(piece[start:end])
+            last = (start, end, piece)
+        count += len(starts)
+    last_sentence = last[2][last[0]:last[1]] if last else None
+    # Rebuilding the set in first-occurrence order reproduces the in-memory
+    # path's list(set(concepts))[:8] selection exactly.
+    key_concepts = list(set(list(concept_counts)))[:8]
+    return key_concepts, concept_counts, count, opening, last_sentence
+
+def _top_sentences(fileobj, chunk_size, progress, num_points, key_concepts, count, opening, last_sentence):
+    """Pass 2: score each sentence and keep the best num_points in a heap"""
+    first_position = {}
+    for i, sentence in enumerate(opening):
+        first_position.setdefault(sentence, i)
+    last_seen_earlier = False
+    heap = []
+    index = 0
+    for piece in _pieces(fileobj, chunk_size, progress):
+        analysis = analyze_document(piece, key_concepts)
+        scores = [0] * len(analysis)
+        for i in range(len(analysis)):
+            sentence = analysis.sentence(i)
+            if sentence in first_position:
+                bonus = position_score(first_position[sentence], count)
+            elif index == count - 1 and last_seen_earlier:
+                bonus = 0  # the closing sentence repeats an earlier one
+            else:
+                bonus = position_score(index, count)
+            if index < count - 1 and sentence == last_sentence:
+                last_seen_earlier = True
+            scores[i] = bonus + content_score(sentence)
+            index += 1
+        add_concept_scores(analysis, scores)
+        for i, score in enumerate(scores):
+            item = (score, analysis.sentence(i))
+            if len(heap) < num_points:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+    return [sentence for score, sentence in sorted(heap, reverse=True)]
+
+def _all_sentences(fileobj, chunk_size, progress):
+    sentences = []
+    for piece in _pieces(fileobj, chunk_size, progress):
+        starts, ends = sentence_spans(piece)
+        sentences.extend(piece[start:end] for start, end in zip(starts, ends))
+    return sentences
+
+def _raw_sentences(fileobj, chunk_size, progress):
+    """Sentences as create_basic_summary sees them: unnormalized, longer than 20 chars"""
+    for piece in _pieces(fileobj, chunk_size, progress, normalize=False):
+        starts, ends = sentence_spans(piece, min_length=20)
+        for start, end in zip(starts, ends):
+            yield piece[start:end]
+
+def _basic_summary(fileobj, chunk_size, progress, num_points):
+    count = sum(1 for _ in _raw_sentences(fileobj, chunk_size, progress))
+    if count <= num_points:
+        return list(_raw_sentences(fileobj, chunk_size, progress))
+    wanted = {0, count // 2, count - 1, *range(1, num_points)}
+    collected = {i: sentence for i, sentence in enumerate(_raw_sentences(fileobj, chunk_size, progress))
+                 if i in wanted}
+    return basic_points(collected.__getitem__, count, num_points)
+
+@timed('streaming.summarize_stream')
+def summarize_stream(source, num_points=5, chunk_size=CHUNK_SIZE, progress=None):
+    """Summarize a UTF-8 text file (path or seekable binary file) chunk by chunk.
+
+    progress, if given, is called with the completed fraction (0..1).
+    Returns the same points as generate_smart_summary on the full text.
+    """
+    fileobj, should_close = _open_binary(source)
+    try:
+        tracker = _Progress(progress, _source_size(fileobj), passes=2)
+        key_concepts, _, count, opening, last_sentence = _collect_statistics(fileobj, chunk_size, tracker)
+        if count <= num_points:
+            points = [simplify_sentence(s) for s in _all_sentences(fileobj, chunk_size, tracker)]
+        else:
+            points = finalize_points(
+                _top_sentences(fileobj, chunk_size, tracker, num_points, key_concepts, count, opening,
+                               last_sentence),
+                num_points)
+        if not points or len(points) < 2:
+            # Rare fallback; up to three more passes over the raw text
+            tracker.add_passes(3)
+            points = _basic_summary(fileobj, chunk_size, tracker, num_points)
+        if progress:
+            progress(1.0)
+        return points
+    finally:
+        if should_close:
+            fileobj.close()
@@ -0,0 +1,134 @@
+"""Content-addressed cache for summary analyses.
+
+Entries are keyed by a hash of the whitespace-normalized text, so pasting the
+same material again, or only changing the number of points, skips
+tokenization and tagging. The in-process tier is an LRU bounded by an
+estimated byte budget; an optional SQLite tier persists entries across
+restarts and shares them between workers.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+SUMMARY_CACHE_BYTES = int(os.environ.get("STUDY_BUDDY_SUMMARY_CACHE_MB", "64")) * 1024 * 1024
+SUMMARY_CACHE_DB = os.environ.get("STUDY_BUDDY_SUMMARY_CACHE_DB")
+PERSISTENT_MAX_ENTRIES = 10_000
+
+def content_key(normalized_text):
+    """Stable cache key for already normalized text"""
+    return hashlib.sha256(normalized_text.encode("utf-8", "surrogatepass")).hexdigest()
+
+class PersistentTier:
+    """SQLite-backed second tier holding compressed JSON payloads"""
+
+    def __init__(self, path, max_entries=PERSISTENT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        with self._conn:
+            self._conn.execute('''CREATE TABLE IF NOT EXISTS summary_cache
+                                  (key TEXT PRIMARY KEY, payload BLOB, last_used REAL)''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_summary_cache_used ON summary_cache (last_used)')
+
+    def get(self, key):
+        with self._lock, self._conn:
+            row = self._conn.execute('SELECT payload FROM summary_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE summary_cache SET last_used = ? WHERE key = ?', (time.time(), key))
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key, payload):
+        blob = zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8", "surrogatepass"))
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO summary_cache (key, payload, last_used) VALUES (?, ?, ?)',
+                               (key, blob, time.time()))
+            self._conn.execute('''DELETE FROM summary_cache WHERE last_used <
+                                  (SELECT last_used FROM summary_cache ORDER BY last_used DESC LIMIT 1 OFFSET ?)''',
+                               (self.max_entries - 1,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM summary_cache')
+
+class SummaryCache:
+    """Two-tier LRU cache with hit, miss and eviction counters.
+
+    Values must provide ``nbytes()`` for the byte budget. ``dump``/``load``
+    convert values to and from JSON-compatible payloads for the persistent
+    tier, which is only used when a path is configured.
+    """
+
+    def __init__(self, max_bytes=SUMMARY_CACHE_BYTES, persistent_path=SUMMARY_CACHE_DB, dump=None, load=None):
+        self.max_bytes = max_bytes
+        self._dump = dump
+        self._load = load
+        self._persistent = PersistentTier(persistent_path) if persistent_path and dump and load else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes_used = 0
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        if self._persistent is not None:
+            payload = self._persistent.get(key)
+            if payload is not None:
+                value = self._load(payload)
+                with self._lock:
+                    self.persistent_hits += 1
+                self._store(key, value)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        value = compute()
+        self._store(key, value)
+        if self._persistent is not None:
+            self._persistent.put(key, self._dump(value))
+        return value
+
+    def _store(self, key, value):
+        size = value.nbytes()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes_used -= previous[1]
+            self._entries[key] = (value, size)
+            self.bytes_used += size
+            while self.bytes_used > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes_used -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes_used = 0
+        if self._persistent is not None:
+            self._persistent.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes_used': self.bytes_used, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'persistent_hits': self.persistent_hits, 'misses': self.misses,
+                    'evictions': self.evictions}
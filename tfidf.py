@@ -0,0 +1,115 @@
+"""TF-IDF concept extraction over a sparse sentence-term matrix.
+
+An alternative to the POS-tagger concept path in utils: no tagging, and the
+chosen concepts depend only on term weights, with ties broken
+alphabetically, so results are deterministic. The matrix is kept in
+coordinate form as NumPy arrays; per-sentence concept coverage is one sparse
+matrix-vector product.
+"""
+from array import array
+
+import numpy as np
+
+from instrumentation import timed
+from nlp_resources import stopword_set
+from utils import COMMON_WORDS, analyze_document, base_scores
+
+NUM_CONCEPTS = 8
+
+class SentenceTermMatrix:
+    """Sparse counts of candidate terms per sentence (rows) in COO form"""
+
+    def __init__(self, terms, rows, cols, counts, num_sentences):
+        self.terms = terms
+        self.rows = rows
+        self.cols = cols
+        self.counts = counts
+        self.num_sentences = num_sentences
+
+    def term_frequencies(self):
+        return np.bincount(self.cols, weights=self.counts, minlength=len(self.terms))
+
+    def document_frequencies(self):
+        return np.bincount(self.cols, minlength=len(self.terms))
+
+    def tfidf_weights(self):
+        return term_weights(self.term_frequencies(), self.document_frequencies(), self.num_sentences)
+
+    def coverage(self, term_vector):
+        """Matrix-vector product of the binary sentence-term matrix with term_vector"""
+        return np.bincount(self.rows, weights=term_vector[self.cols], minlength=self.num_sentences)
+
+def term_weights(term_frequencies, document_frequencies, num_sentences):
+    """Total term frequency times smoothed inverse sentence frequency"""
+    idf = np.log((1 + num_sentences) / (1 + document_frequencies)) + 1
+    return term_frequencies * idf
+
+def top_terms(terms, weights, k=NUM_CONCEPTS):
+    """Indices of the k highest weights; equal weights resolve alphabetically"""
+    return np.lexsort((np.array(terms), -weights))[:k].tolist()
+
+def _stop_words():
+    try:
+        return stopword_set()
+    except LookupError:
+        return frozenset(COMMON_WORDS)
+
+def build_matrix(analysis):
+    """Sentence-term matrix of an analysis: lowercased alphabetic tokens over 3 chars, no stopwords.
+
+    A trailing period is ignored, since word_tokenize only splits it off at
+    the end of a sentence (e.g. "approx." mid-sentence but "approx" "." last).
+    """
+    stop_words = _stop_words()
+    term_ids = {}
+    sentence_ids = array('l')
+    token_terms = array('l')
+    for token, sentence in zip(analysis.tokens, analysis.token_sentences):
+        token = token.rstrip('.')
+        if sentence < 0 or len(token) <= 3 or not token.isalpha():
+            continue
+        term = token.lower()
+        if term in stop_words:
+            continue
+        sentence_ids.append(sentence)
+        token_terms.append(term_ids.setdefault(term, len(term_ids)))
+    terms = list(term_ids)
+    if not terms:
+        empty = np.zeros(0, dtype=np.int64)
+        return SentenceTermMatrix(terms, empty, empty, empty, len(analysis))
+
+    # Collapse repeated (sentence, term) pairs into counts
+    flat = np.array(sentence_ids, dtype=np.int64) * len(terms) + np.array(token_terms, dtype=np.int64)
+    unique, counts = np.unique(flat, return_counts=True)
+    rows, cols = np.divmod(unique, len(terms))
+    return SentenceTermMatrix(terms, rows, cols, counts, len(analysis))
+
+def select_concepts(matrix, k=NUM_CONCEPTS):
+    """Indices of the k highest-weighted terms; equal weights resolve alphabetically"""
+    if not matrix.terms:
+        return []
+    return top_terms(matrix.terms, matrix.tfidf_weights(), k)
+
+@timed('tfidf.analyze_and_score')
+def analyze_and_score(text, k=NUM_CONCEPTS):
+    """utils-compatible scored analysis using TF-IDF concepts"""
+    analysis = analyze_document(text, key_concepts=[])
+    matrix = build_matrix(analysis)
+    concept_ids = select_concepts(matrix, k)
+    analysis.key_concepts = [matrix.terms[i] for i in concept_ids]
+
+    scores = base_scores(analysis)
+    if concept_ids:
+        indicator = np.zeros(len(matrix.terms))
+        indicator[concept_ids] = 1
+        for i, hits in enumerate(matrix.coverage(indicator).astype(np.int64).tolist()):
+            scores[i] += 2 * hits
+    analysis.scores = scores
+    return analysis
+
+@timed('tfidf.extract_key_concepts')
+def extract_key_concepts(text, k=NUM_CONCEPTS):
+    """Top-k TF-IDF concepts of a text"""
+    analysis = analyze_document(text, key_concepts=[])
+    matrix = build_matrix(analysis)
+    return [matrix.terms[i] for i in select_concepts(matrix, k)]
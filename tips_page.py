@@ -0,0 +1,13 @@
+"""Study Tips page"""
+import streamlit as st
+from utils import get_study_tips
+
+def show_tips_page():
+    st.header("💡 Smart Study Tips")
+    tips = get_study_tips()
+    
+    st.write("### Effective Learning Strategies")
+    for i, tip in enumerate(tips, 1):
+        st.write(f"**{i}.** {tip}")
+    
+    st.info("💪 **Remember**: Consistent practice and smart strategies lead to better learning outcomes!")
@@ -1,90 +1,299 @@
+import os
 import re
+import sys
+import heapq
 import random
+from array import array
 from collections import Counter
-import nltk
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.tag import pos_tag
-from nltk.corpus import stopwords
-
-try:
-    nltk.download('punkt', quiet=True)
-    nltk.download('averaged_perceptron_tagger', quiet=True)
-    nltk.download('stopwords', quiet=True)
-except:
-    pass
-
-def simplify_sentence(sentence):
-    """Simplify a sentence by removing complex clauses and making it more direct"""
-    simplified = re.sub(r'[,;].*?(?=\.|$)', '', sentence)
-    simplified = re.sub(r'\(.*?\)', '', simplified)
-    simplified = re.sub(r'\b(however|although|despite|nevertheless|furthermore|moreover)\b', '', simplified, flags=re.IGNORECASE)
-    
-    simplified = re.sub(r'\b(is|are|was|were)\s+able to\b', 'can', simplified, flags=re.IGNORECASE)
-    simplified = re.sub(r'\b(utilize|utilizes|utilized)\b', 'use', simplified, flags=re.IGNORECASE)
-    simplified = re.sub(r'\b(approximately|roughly|about)\b', '~', simplified, flags=re.IGNORECASE)
-    
-    simplified = re.sub(r'\s+', ' ', simplified).strip()
+from nlp_resources import word_tokenize, pos_tag, stopword_set
+from segmenter import SEGMENTER_VERSION, sentence_spans
+from summary_cache import SummaryCache, content_key
+from instrumentation import stage, timed
+
+# ------------------- Sentence Simplification -------------------
+# A rule is either (pattern, replacement[, flags]) applied with one
+# compiled sub, or a {word: replacement} table matched case-insensitively
+# as whole words in a single alternation pass.
+SIMPLIFY_RULES = [
+    (r'[,;].*?(?=\.|$)', ''),
+    (r'\(.*?\)', ''),
+    # Hedge words and vocabulary never overlap, so they share one pass;
+    # "is able to" must run after hedge words are gone ("is however able to").
+    {
+        'however': '', 'although': '', 'despite': '', 'nevertheless': '', 'furthermore': '', 'moreover': '',
+        'utilize': 'use', 'utilizes': 'use', 'utilized': 'use',
+        'approximately': '~', 'roughly': '~', 'about': '~',
+    },
+    (r'\b(is|are|was|were)\s+able to\b', 'can', re.IGNORECASE),
+]
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def _compile_word_table(table):
+    # One named group per distinct replacement; lastgroup picks the output
+    replacements = []
+    groups = []
+    for replacement in dict.fromkeys(table.values()):
+        words = [re.escape(word) for word, value in table.items() if value == replacement]
+        groups.append(f"(?P<r{len(replacements)}>{'|'.join(words)})")
+        replacements.append(replacement)
+    pattern = re.compile(r'\b(?:' + '|'.join(groups) + r')\b', re.IGNORECASE)
+    return pattern, lambda match: replacements[int(match.lastgroup[1:])]
+
+def compile_rules(rules):
+    """Compile a rule set into (pattern, replacement) passes, applied in order"""
+    passes = []
+    for rule in rules:
+        if isinstance(rule, dict):
+            passes.append(_compile_word_table(rule))
+        else:
+            pattern, replacement, *flags = rule
+            passes.append((re.compile(pattern, *flags), replacement))
+    return passes
+
+_DEFAULT_PASSES = compile_rules(SIMPLIFY_RULES)
+
+@timed('utils.simplify_sentence')
+def simplify_sentence(sentence, rules=None):
+    """Simplify a sentence by removing complex clauses and making it more direct.
+
+    rules replaces the default rule set and must come from compile_rules.
+    """
+    simplified = sentence
+    for pattern, replacement in _DEFAULT_PASSES if rules is None else rules:
+        simplified = pattern.sub(replacement, simplified)
     
-    return simplified
+    return _WHITESPACE_RE.sub(' ', simplified).strip()
+
+def _concept_candidates(words):
+    """Noun tokens that qualify as concepts, in document order"""
+    tagged = pos_tag(words)
+    stop_words = stopword_set()
+    return [word for word, pos in tagged if pos in ['NN', 'NNS', 'NNP', 'NNPS'] 
+            and word.lower() not in stop_words and len(word) > 3]
+
+COMMON_WORDS = ['the', 'and', 'is', 'in', 'of', 'to', 'a', 'that', 'it', 'with', 'for', 'as', 'was', 'on']
+
+def _fallback_concept_candidates(text):
+    """Capitalized words used as concepts when the NLTK models are unavailable"""
+    words = re.findall(r'\b[A-Z][a-z]+\b', text)
+    return [word for word in words if word.lower() not in COMMON_WORDS and len(word) > 3]
+
+def _concepts_from_tokens(words):
+    """Pick key noun concepts from an already tokenized text"""
+    return list(set(_concept_candidates(words)))[:8]
 
-def extract_key_concepts(text):
+def _fallback_concepts(text):
+    return list(set(_fallback_concept_candidates(text)))[:8]
+
+# "tagger" picks nouns with the NLTK POS tagger; "tfidf" ranks terms by
+# TF-IDF weight over sentences (see tfidf.py) and is deterministic.
+CONCEPT_EXTRACTOR = os.environ.get("STUDY_BUDDY_CONCEPT_EXTRACTOR", "tagger")
+
+@timed('utils.extract_key_concepts')
+def extract_key_concepts(text, method=None):
     """Extract important concepts from text"""
+    if (method or CONCEPT_EXTRACTOR) == 'tfidf':
+        import tfidf
+        return tfidf.extract_key_concepts(text)
     try:
-        words = word_tokenize(text)
-        tagged = pos_tag(words)
-        stop_words = set(stopwords.words('english'))
-        concepts = [word for word, pos in tagged if pos in ['NN', 'NNS', 'NNP', 'NNPS'] 
-                   and word.lower() not in stop_words and len(word) > 3]
-        return list(set(concepts))[:8]
+        return _concepts_from_tokens(word_tokenize(text))
     except:
-        words = re.findall(r'\b[A-Z][a-z]+\b', text)
-        common_words = ['the', 'and', 'is', 'in', 'of', 'to', 'a', 'that', 'it', 'with', 'for', 'as', 'was', 'on']
-        concepts = [word for word in words if word.lower() not in common_words and len(word) > 3]
-        return list(set(concepts))[:8]
+        return _fallback_concepts(text)
 
-def identify_main_points(text, num_points=5):
-    """Identify and extract main points from text with proper scoring"""
-    text = re.sub(r'\s+', ' ', text).strip()
+# ------------------- Sentence Scoring -------------------
+_FALLBACK_TOKEN_RE = re.compile(r"\w+|[^\w\s]+")
+_IMPORTANCE_RE = re.compile(r'important|key|main|primary|essential|critical|significant|fundamental', re.IGNORECASE)
+
+def _token_offsets(text, tokens):
+    """Locate each token in text, in order; word_tokenize rewrites double quotes"""
+    offsets = array('l')
+    cursor = 0
+    for token in tokens:
+        found = text.find(token, cursor)
+        if token in ('``', "''"):
+            quote = text.find('"', cursor)
+            if quote >= 0 and (found < 0 or quote < found):
+                found = quote
+                token = '"'
+        if found < 0:
+            offsets.append(cursor)
+        else:
+            offsets.append(found)
+            cursor = found + len(token)
+    return offsets
+
+class DocumentAnalysis:
+    """Sentence spans, document tokens and key concepts of one normalized text.
+
+    The text is tokenized once; every token carries the index of the sentence
+    it falls in (-1 for discarded fragments), so sentences never get
+    re-tokenized or copied while scoring.
+    """
+    __slots__ = ('text', 'starts', 'ends', 'tokens', 'token_sentences', 'key_concepts', 'scores')
+
+    def __init__(self, text, starts, ends, tokens, token_sentences, key_concepts, scores=None):
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+        self.tokens = tokens
+        self.token_sentences = token_sentences
+        self.key_concepts = key_concepts
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.starts)
+
+    def sentence(self, index):
+        return self.text[self.starts[index]:self.ends[index]]
+
+    def nbytes(self):
+        """Approximate memory footprint, used for the summary cache byte budget"""
+        size = sys.getsizeof(self.text) + sys.getsizeof(self.tokens)
+        size += sum(sys.getsizeof(token) for token in self.tokens)
+        for values in (self.starts, self.ends, self.token_sentences, self.scores):
+            if values is not None:
+                size += values.itemsize * len(values)
+        return size
+
+    def to_payload(self):
+        return {'text': self.text, 'starts': self.starts.tolist(), 'ends': self.ends.tolist(),
+                'tokens': self.tokens, 'token_sentences': self.token_sentences.tolist(),
+                'key_concepts': self.key_concepts,
+                'scores': self.scores.tolist() if self.scores is not None else None}
+
+    @classmethod
+    def from_payload(cls, payload):
+        scores = payload['scores']
+        return cls(payload['text'], array('l', payload['starts']), array('l', payload['ends']),
+                   payload['tokens'], array('l', payload['token_sentences']), payload['key_concepts'],
+                   array('l', scores) if scores is not None else None)
+
+def _tokenize(text):
+    try:
+        return word_tokenize(text)
+    except:
+        return _FALLBACK_TOKEN_RE.findall(text)
+
+@timed('utils.analyze_document')
+def analyze_document(text, key_concepts=None):
+    """Segment, tokenize and extract concepts from normalized text in one pass.
+
+    Passing key_concepts skips POS tagging and uses those concepts instead.
+    """
+    starts, ends = sentence_spans(text)
+    if key_concepts is not None:
+        tokens = _tokenize(text)
+    else:
+        try:
+            tokens = word_tokenize(text)
+            key_concepts = _concepts_from_tokens(tokens)
+        except:
+            tokens = _FALLBACK_TOKEN_RE.findall(text)
+            key_concepts = _fallback_concepts(text)
     
-    sentences = [s.strip() for s in re.split(r'[.!?]', text) if len(s.strip()) > 10]
+    token_sentences = array('l')
+    current = 0
+    count = len(starts)
+    with stage('utils.map_tokens'):
+        for offset in _token_offsets(text, tokens):
+            while current < count and ends[current] <= offset:
+                current += 1
+            token_sentences.append(current if current < count and starts[current] <= offset else -1)
     
-    if len(sentences) <= num_points:
-        return [simplify_sentence(s) for s in sentences]
+    return DocumentAnalysis(text, starts, ends, tokens, token_sentences, key_concepts)
+
+def position_score(position, count):
+    """Bonus for the opening sentences and the closing one"""
+    if position == 0:
+        return 3
+    if position < 3:
+        return 2
+    if position == count - 1:
+        return 2
+    return 0
+
+def content_score(sentence):
+    """Bonus for a readable length and for importance indicator words"""
+    score = 0
+    if 8 <= len(sentence.split()) <= 20:
+        score += 1
+    if _IMPORTANCE_RE.search(sentence):
+        score += 3
+    return score
+
+def add_concept_scores(analysis, scores):
+    """Add 2 points per key concept appearing in each sentence of the analysis"""
+    # Concepts that only differ in case each count once per sentence
+    concept_weights = Counter(concept.lower() for concept in analysis.key_concepts)
+    last_hit = {}
+    for token, i in zip(analysis.tokens, analysis.token_sentences):
+        if i < 0:
+            continue
+        word = token.lower()
+        weight = concept_weights.get(word)
+        if weight and last_hit.get(word) != i:
+            last_hit[word] = i
+            scores[i] += 2 * weight
+
+def base_scores(analysis):
+    """Position and content scores of every sentence, without concept hits"""
+    count = len(analysis)
+    scores = array('l', [0]) * count
     
-    key_concepts = extract_key_concepts(text)
+    # Duplicate sentences share the position of their first occurrence
+    first_position = {}
+    for i in range(count):
+        sentence = analysis.sentence(i)
+        scores[i] = position_score(first_position.setdefault(sentence, i), count) + content_score(sentence)
+    return scores
+
+@timed('utils.score_sentences')
+def score_sentences(analysis):
+    """Score every sentence of an analysis in a single linear pass"""
+    scores = base_scores(analysis)
+    add_concept_scores(analysis, scores)
+    return scores
+
+def top_sentences(analysis, scores, num_points):
+    """Select the num_points best sentences with a heap, ties broken as a reverse sort would"""
+    best = heapq.nlargest(num_points, ((scores[i], analysis.sentence(i)) for i in range(len(analysis))))
+    return [sentence for score, sentence in best]
+
+# Analyses are independent of num_points, so one entry serves every slider value
+summary_cache = SummaryCache(dump=DocumentAnalysis.to_payload, load=DocumentAnalysis.from_payload)
+
+def _analyze_and_score(text, method):
+    if method == 'tfidf':
+        import tfidf
+        return tfidf.analyze_and_score(text)
+    analysis = analyze_document(text)
+    analysis.scores = score_sentences(analysis)
+    return analysis
+
+def scored_analysis(text, method=None):
+    """Cached analysis with per-sentence scores for whitespace-normalized text"""
+    method = method or CONCEPT_EXTRACTOR
+    key = f"{method}:{SEGMENTER_VERSION}:{content_key(text)}"
+    return summary_cache.get_or_compute(key, lambda: _analyze_and_score(text, method))
+
+@timed('utils.identify_main_points')
+def identify_main_points(text, num_points=5, method=None):
+    """Identify and extract main points from text with proper scoring"""
+    text = re.sub(r'\s+', ' ', text).strip()
     
-    scored_sentences = []
-    for sentence in sentences:
-        score = 0
-        
-        position = sentences.index(sentence)
-        if position == 0:
-            score += 3
-        elif position < 3:
-            score += 2
-        elif position == len(sentences) - 1:
-            score += 2
-        
-        sentence_words = set(word.lower() for word in word_tokenize(sentence))
-        for concept in key_concepts:
-            if concept.lower() in sentence_words:
-                score += 2
-        
-        word_count = len(sentence.split())
-        if 8 <= word_count <= 20:
-            score += 1
-        
-        importance_indicators = ['important', 'key', 'main', 'primary', 'essential', 'critical', 'significant', 'fundamental']
-        if any(indicator in sentence.lower() for indicator in importance_indicators):
-            score += 3
-        
-        scored_sentences.append((score, sentence))
+    starts, ends = sentence_spans(text)
+    if len(starts) <= num_points:
+        return [simplify_sentence(text[start:end]) for start, end in zip(starts, ends)]
     
-    scored_sentences.sort(reverse=True)
-    top_sentences = [sentence for score, sentence in scored_sentences[:num_points]]
+    analysis = scored_analysis(text, method)
     
+    return finalize_points(top_sentences(analysis, analysis.scores, num_points), num_points)
+
+def finalize_points(sentences, num_points):
+    """Simplify the selected sentences, dropping any that become too short"""
     simplified_points = []
-    for sentence in top_sentences:
+    for sentence in sentences:
         simplified = simplify_sentence(sentence)
         if len(simplified.split()) >= 4:
             simplified = simplified[0].upper() + simplified[1:] if simplified else ""
@@ -92,35 +301,48 @@ def identify_main_points(text, num_points=5):
     
     return simplified_points[:num_points]
 
-def generate_smart_summary(text, num_points=5):
+@timed('utils.generate_smart_summary')
+def generate_smart_summary(text, num_points=5, method=None):
     """Generate a proper summary with main points in simple language"""
-    main_points = identify_main_points(text, num_points)
+    main_points = identify_main_points(text, num_points, method)
     
     if not main_points or len(main_points) < 2:
         return create_basic_summary(text, num_points)
     
     return main_points
 
+@timed('utils.create_basic_summary')
 def create_basic_summary(text, num_points=5):
     """Create basic summary points when automatic extraction fails"""
-    sentences = [s.strip() for s in re.split(r'[.!?]', text) if len(s.strip()) > 20]
+    starts, ends = sentence_spans(text, min_length=20)
     
-    if len(sentences) <= num_points:
-        return [s for s in sentences[:num_points]]
+    def sentence_at(i):
+        return text[starts[i]:ends[i]]
     
+    if len(starts) <= num_points:
+        return [sentence_at(i) for i in range(len(starts))]
+    
+    return basic_points(sentence_at, len(starts), num_points)
+
+def basic_points(sentence_at, count, num_points):
+    """First, middle and last sentences, topped up from the opening ones.
+
+    sentence_at(i) returns the i-th candidate sentence; only indices 0,
+    count // 2, count - 1 and 1..num_points - 1 are ever requested.
+    """
     points = []
-    if sentences:
-        points.append(sentences[0])
-    if len(sentences) > 2:
-        points.append(sentences[len(sentences)//2])
-    if len(sentences) > 1:
-        points.append(sentences[-1])
+    if count:
+        points.append(sentence_at(0))
+    if count > 2:
+        points.append(sentence_at(count // 2))
+    if count > 1:
+        points.append(sentence_at(count - 1))
     
     remaining = num_points - len(points)
     if remaining > 0:
-        for i in range(1, min(remaining + 1, len(sentences) - 1)):
-            if sentences[i] not in points:
-                points.append(sentences[i])
+        for i in range(1, min(remaining + 1, count - 1)):
+            if sentence_at(i) not in points:
+                points.append(sentence_at(i))
     
     return [simplify_sentence(p) for p in points[:num_points]]
 